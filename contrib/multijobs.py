@@ -15,7 +15,7 @@ class SchedMultiJobs(Plugin):
             list_count = len(per_res_list)
             # avoid iterating & push/pop from the same list
             while list_count > 0:
-                job = per_res_list.pop(0)
+                job = per_res_list.popleft()
                 list_count -= 1
                 if "compilation" in job.tags:
                     if not the_set:
@@ -42,7 +42,7 @@ class SchedMultiJobs(Plugin):
                 list_count = len(per_res_list)
                 # avoid iterating & push/pop from the same list
                 while list_count > 0:
-                    job = per_res_list.pop(0)
+                    job = per_res_list.popleft()
                     list_count -= 1
                     if job.has_completed_deps():
                         if not the_set:
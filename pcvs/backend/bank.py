@@ -1,8 +1,7 @@
 import fcntl
 import json
 import os
-import tarfile
-import tempfile
+import shutil
 import time
 from typing import Dict, List, Optional
 
@@ -178,15 +177,20 @@ class Bank(dsl.Bank):
             self._name = os.path.basename(self._path).lower()
         add_banklink(self._name, self._path)
 
-    def save_from_buildir(self, tag: str, buildpath: str, msg: str=None) -> None:
+    def save_from_buildir(self, tag: str, buildpath: str, msg: str=None,
+                          hdl: BuildDirectoryManager=None) -> None:
         """Extract results from the given build directory & store into the bank.
 
         :param tag: overridable default project (if different)
         :type tag: str
         :param buildpath: the directory where PCVS stored results
         :type buildpath: str
+        :param hdl: an already loaded handler to the build directory, defaults
+            to None
+        :type hdl: :class:`BuildDirectoryManager`, optional
         """
-        hdl = BuildDirectoryManager(buildpath)
+        if hdl is None:
+            hdl = BuildDirectoryManager(buildpath)
         hdl.load_config()
         hdl.init_results()
         
@@ -219,7 +223,8 @@ class Bank(dsl.Bank):
         """Extract results from the archive, if used to export results.
 
         This is basically the same as :func:`BanK.save_from_buildir` except
-        the archive is extracted first.
+        results are read from the archive (see
+        :meth:`BuildDirectoryManager.load_from_archive`).
 
         :param tag: overridable default project (if different)
         :type tag: str
@@ -228,11 +233,12 @@ class Bank(dsl.Bank):
         """
         assert (os.path.isfile(archivepath))
 
-        with tempfile.TemporaryDirectory() as tarpath:
-            tarfile.open(os.path.join(archivepath)).extractall(tarpath)
-            d = [x for x in os.listdir(tarpath) if x.startswith("pcvsrun_")]
-            assert(len(d) == 1)
-            self.save_from_buildir(tag, os.path.join(tarpath, d[0]), msg=msg)
+        hdl = BuildDirectoryManager.load_from_archive(archivepath)
+        try:
+            self.save_from_buildir(tag, hdl.prefix, msg=msg, hdl=hdl)
+        finally:
+            hdl.finalize()
+            shutil.rmtree(os.path.dirname(hdl.prefix))
             
     def save_new_run_from_instance(self, target_project: str, hdl: BuildDirectoryManager, msg: str=None) -> None:
         """
@@ -19,6 +19,8 @@ from pcvs.helpers.exceptions import TestException, RunException
 from pcvs.helpers.system import MetaConfig, MetaDict
 from pcvs.orchestration import Orchestrator
 from pcvs.orchestration.publishers import BuildDirectoryManager
+from pcvs.orchestration.scheduling import (SchedPolicy, durations_from_buildir,
+                                           durations_from_tests)
 from pcvs.plugins import Plugin
 from pcvs.testing.tedesc import TEDescriptor
 from pcvs.testing.testfile import TestFile
@@ -205,6 +207,13 @@ def prepare():
 
     utils.start_autokill(valcfg.timeout)
 
+    if valcfg.scheduling.get('policy', SchedPolicy.name) != SchedPolicy.name \
+            or valcfg.scheduling.get('backfill', False):
+        # before the build directory is cleaned up (backfilling relies on
+        # job walltimes as well)
+        io.console.print_item("Load job durations from previous runs")
+        MetaConfig.root.set_internal('sched_history', load_sched_history())
+
     io.console.print_item("Check whether build directory is valid")
     build_man.prepare(reuse=valcfg.reused_build)
 
@@ -213,7 +222,12 @@ def prepare():
         per_file_max_sz = int(valcfg.per_result_file_sz)
     except:
         pass
-    build_man.init_results(per_file_max_sz=per_file_max_sz)
+    if valcfg.result.archive_incremental:
+        build_man.start_archive(codec=valcfg.result.archive_codec)
+    build_man.init_results(per_file_max_sz=per_file_max_sz,
+                           backend=valcfg.result.backend,
+                           async_queue=valcfg.result.async_queue,
+                           fsync=valcfg.result.fsync)
 
     for label in valcfg.dirs.keys():
         build_man.save_extras(os.path.join(NAME_BUILD_SCRATCH, label),
@@ -252,6 +266,42 @@ def prepare():
     build_man.save_config(MetaConfig.root)
 
 
+def load_sched_history():
+    """Load job durations from a previous run, used by scheduling policies.
+
+    The source is set by ``validation.scheduling.history`` and can be a build
+    directory, an archive or a bank (the last run of the current profile). By
+    default, results from the previous run in the current build directory are
+    used. Thus, this function has to be called before the build directory is
+    cleaned up.
+
+    :return: durations in seconds, by test name
+    :rtype: dict
+    """
+    valcfg = MetaConfig.root.validation
+    source = valcfg.scheduling.get('history', None)
+
+    if not source:
+        return durations_from_buildir(valcfg.output)
+    elif utils.check_is_buildir(source):
+        return durations_from_buildir(source)
+    elif utils.check_is_archive(source):
+        hdl = BuildDirectoryManager.load_from_archive(source)
+        durations = durations_from_buildir(hdl.prefix)
+        shutil.rmtree(os.path.dirname(hdl.prefix))
+        return durations
+
+    if source.split('@', 1)[0].lower() not in pvBank.list_banks():
+        io.console.warn("No run history found from '{}'".format(source))
+        return {}
+
+    bank = pvBank.Bank(token=source)
+    serie = bank.get_serie(bank.build_target_branch_name(hash=valcfg.pf_hash))
+    if not serie:
+        return {}
+    return durations_from_tests(serie.last.summary.values())
+
+
 def find_files_to_process(path_dict):
     """Lookup for test files to process, from the list of paths provided as
     parameter.
@@ -553,7 +603,8 @@ def terminate():
 
     io.console.print_section("Prepare results")
     io.console.move_debug_file(outdir)
-    archive_path = build_man.create_archive()
+    archive_path = build_man.create_archive(
+        codec=MetaConfig.root.validation.result.archive_codec)
 
     # if MetaConfig.root.validation.anonymize:
     #    io.console.print_item("Anonymize data")
@@ -594,8 +645,10 @@ def dup_another_build(build_dir, outdir):
 
     # second, copy any xml/sh files to be reused
     for root, _, files, in os.walk(os.path.join(build_dir, "test_suite")):
+        in_shards = TestFile.NAME_SHARD_DIR in root.split(os.sep)
         for f in files:
-            if f in ('dbg-pcvs.yml', 'list_of_tests.sh'):
+            if in_shards or f in ('dbg-pcvs.yml', 'list_of_tests.sh',
+                                  TestFile.NAME_LIST_FILE):
                 src = os.path.join(root, f)
                 dest = os.path.join(outdir,
                                     os.path.relpath(
@@ -219,7 +219,7 @@ def clean(ctx, force, fake, paths, remove_build_dir, interactive):
                 else:
                     for f in archives:
                         arch_date = datetime.strptime(
-                            f.replace('pcvsrun_', '').replace('.tar.gz', ''),
+                            f.replace('pcvsrun_', '').replace('.tar.gz', '').replace('.zip', ''),
                             "%Y%m%d%H%M%S"
                         )
                         delta = datetime.now() - arch_date
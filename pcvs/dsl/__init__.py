@@ -1,5 +1,6 @@
 import json
 import os
+from collections import OrderedDict, namedtuple
 from enum import Enum, IntEnum
 from typing import Dict, List
 
@@ -45,9 +46,26 @@ class Job(Test):
         return self.to_json()
 
 
+#: results of a job, as stored in the run index (``oid`` being the job blob)
+JobSummary = namedtuple("JobSummary", ["name", "state", "time", "rc", "oid"])
+
+
 class Run:
     """Depict a given run -> Git commit
+
+    Along with one blob per job, each run stores an index (:attr:`INDEX`)
+    mapping job names to their results, to answer queries without reading
+    every job.
+
+    :cvar INDEX: path of the index in the run tree
+    :type INDEX: str
+    :cvar CACHE_SIZE: max number of run indexes kept in memory
+    :type CACHE_SIZE: int
     """
+    INDEX = ".pcvs-cache/index.json"
+    CACHE_SIZE = 16
+    # indexes loaded so far, by commit id (a commit never changes)
+    _summaries = OrderedDict()
 
     def __init__(self, repo=None, cid=None, from_serie=None):
         """Create a new run.
@@ -61,6 +79,7 @@ class Run:
 
         self._repo = repo
         self._stage = {}
+        self._index = {}
         self._cid = None
 
         if self._repo:
@@ -76,10 +95,22 @@ class Run:
     def changes(self):
         return self._stage
 
+    @property
+    def index(self):
+        """Getter to the index staged for the next commit.
+
+        :return: the serialized index, None if no job is staged
+        :rtype: str
+        """
+        if not self._index:
+            return None
+        return json.dumps({"fields": list(JobSummary._fields[1:]),
+                           "jobs": self._index}, separators=(",", ":"))
+
     @property
     def previous(self):
         l = self._repo.get_parents(self._cid)
-        if l[0].get_info()['message'] == "INIT" or len(l) < 1:
+        if len(l) < 1 or l[0].get_info()['message'] == "INIT":
             return None
         return Run(repo=self._repo, cid=l[0])
 
@@ -93,11 +124,75 @@ class Run:
 
     @property
     def jobs(self):
-        for file in self._repo.list_files(rev=self._cid):
+        summary = self.__load_index()
+        if summary is not None:
+            files = summary.keys()
+        else:
+            files = [f for f in self._repo.list_files(rev=self._cid)
+                     if not f.startswith(".pcvs-cache/")]
+        for file in files:
             data = self._repo.get_tree(rev=self._cid, prefix=file)
             job = Job(json.loads(str(data)))
             yield job
 
+    def __load_index(self):
+        """Load the run index, None if this run has been stored without.
+
+        :return: job summaries, by name
+        :rtype: dict
+        """
+        cid = self._cid.cid
+        key = str(getattr(cid, 'id', cid))
+        if key in Run._summaries:
+            Run._summaries.move_to_end(key)
+            return Run._summaries[key]
+
+        data = self._repo.get_tree(rev=self._cid, prefix=self.INDEX)
+        if not isinstance(data, git.Blob):
+            return None
+        index = json.loads(str(data))
+        pos = [index['fields'].index(f) for f in JobSummary._fields[1:]]
+        summary = {}
+        for name, entry in index['jobs'].items():
+            state, time, rc, oid = (entry[i] for i in pos)
+            summary[name] = JobSummary(name, Test.State(state), time, rc, oid)
+
+        Run._summaries[key] = summary
+        if len(Run._summaries) > self.CACHE_SIZE:
+            Run._summaries.popitem(last=False)
+        return summary
+
+    @property
+    def summary(self):
+        """Getter to the results of every job, without reading their data.
+
+        Runs stored without index are fully read instead.
+
+        :return: job summaries, by name
+        :rtype: dict
+        """
+        summary = self.__load_index()
+        if summary is None:
+            summary = {j.name: JobSummary(j.name, j.state, j.time,
+                                          j.retcode, None)
+                       for j in self.jobs}
+        return summary
+
+    def get_summary(self, jobname):
+        """Get the results of a single job, without reading its data.
+
+        :param jobname: the job name
+        :type jobname: str
+        :return: the job summary, None if not part of this run
+        :rtype: :class:`JobSummary`
+        """
+        summary = self.__load_index()
+        if summary is None:
+            job = self.get_data(jobname)
+            return None if job is None else JobSummary(
+                job.name, job.state, job.time, job.retcode, None)
+        return summary.get(jobname, None)
+
     @property
     def get_full_data(self):
         root = [j.to_json() for j in self.jobs]
@@ -106,8 +201,8 @@ class Run:
     def get_data(self, jobname):
         res = Job()
         data = self._repo.get_tree(rev=self._cid, prefix=jobname)
-        if not data:
-            return data
+        if not isinstance(data, git.Blob):
+            return None
 
         res.from_json(str(data))
         return res
@@ -116,10 +211,15 @@ class Run:
         if isinstance(data, Job):
             data = data.to_json()
 
+        result = None
         if isinstance(data, dict):
+            result = data.get('result', None)
             data = json.dumps(data, default=lambda x: "Invalid type: {}".format(type(x)))
 
         self._stage[prefix] = data
+        if isinstance(result, dict) and not prefix.startswith(".pcvs-cache/"):
+            self._index[prefix] = [result.get('state'), result.get('time'),
+                                   result.get('rc'), git.hash_blob(data)]
 
     def update_flatdict(self, list_of_updates):
         for k, v in list_of_updates.items():
@@ -185,11 +285,21 @@ class Serie:
             res += "* {}\n".format(Run(repo=self._repo, cid=run).oneline)
         return res
 
-    def history(self):
+    def history(self, depth=None):
+        """List runs from this serie, newest first.
+
+        Runs are not read, their results being loaded on demand (see
+        :attr:`Run.summary`).
+
+        :param depth: max number of runs, defaults to None (all runs)
+        :type depth: int, optional
+        :return: the runs
+        :rtype: list
+        """
         res = []
 
         parent = self.last
-        while parent:
+        while parent and (depth is None or len(res) < depth):
             res.append(parent)
             parent = parent.previous
 
@@ -219,7 +329,6 @@ class Serie:
 
     def commit(self, run, msg=None, metadata={}, timestamp=None):
         assert (isinstance(run, Run))
-        root_tree = None
         msg = "New run" if not msg else msg
         try:
             raw_metadata = json.dumps(metadata)
@@ -230,8 +339,12 @@ class Serie:
 
 {}""".format(msg, raw_metadata)
 
-        for k, v in run.changes.items():
-            root_tree = self._repo.insert_tree(k, v, root_tree)
+        changes = run.changes
+        index = run.index
+        if index is not None:
+            changes = {**changes, Run.INDEX: index}
+        # every tree is written once, not on each job insertion
+        root_tree = self._repo.insert_trees(changes)
         self._repo.commit(tree=root_tree, msg=commit_msg,
                           parent=self._hdl, timestamp=timestamp, orphan=False)
         # self._repo.gc()
@@ -41,7 +41,9 @@ class SimpleAnalysis(BaseAnalysis):
         runs = serie.history()
         cnt = len(runs)
         stats = {Job.Trend(i): {} for i in range(len(Job.Trend))}
-        for test in runs[0].tests:
+        # results are read from run indexes, not from each job
+        summaries = [run.summary for run in runs]
+        for test in summaries[0].values() if summaries else []:
             testname = test.name
             if prefix is not None and not testname.startswith(prefix):
                 continue
@@ -49,7 +51,10 @@ class SimpleAnalysis(BaseAnalysis):
             latest = test.state
             div = Job.Trend.STABLE
             while weight < cnt and (weight < threshold or threshold == 0):
-                other = runs[weight].get_data(testname)
+                other = summaries[weight].get(testname, None)
+                if other is None:
+                    # the test did not exist yet
+                    break
                 if other.state != latest:
                     if latest == Test.State.SUCCESS:
                         div = Job.Trend.PROGRESSION
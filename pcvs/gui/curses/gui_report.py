@@ -23,7 +23,7 @@ class DirForm(npyscreen.ActionPopup):
             if not os.path.isdir(path):
                 continue
             for file in os.listdir(path):
-                if os.path.isfile(os.path.join(path, file)) and file.startswith("pcvsrun_") and file.endswith(".tar.gz"):
+                if os.path.isfile(os.path.join(path, file)) and file.startswith("pcvsrun_") and file.endswith((".tar.gz", ".zip")):
                     l.append(file)
 
         self._box.values = l
@@ -229,10 +229,18 @@ class OrchestratorException(CommonException):
         """Circular dep detected while processing job dep tree."""
         pass
 
+    class UnknownPolicyError(GenericException):
+        """The requested scheduling policy does not exist."""
+        pass
+
 class RunnerException(CommonException):
     class LaunchError(GenericException):
         """Unable to run a remote container"""
         pass
+
+    class UnknownEngineError(GenericException):
+        """The execution engine does not exist"""
+        pass
     
 class PublisherException(CommonException):
     class BadMagicTokenError(GenericException):
@@ -246,6 +254,10 @@ class PublisherException(CommonException):
     class AlreadyExistJobError(GenericException):
         """A single ID leads to multiple jobs."""
         pass
+
+    class WriterError(GenericException):
+        """Background result writer failed to store jobs."""
+        pass
         
 
 class LockException(CommonException):
@@ -266,6 +266,47 @@ class GitByGeneric(ABC):
         """
         pass
 
+    @abstractmethod
+    def insert_trees(self, data):
+        """Create a new tree mapping every prefix from a flat dict at once.
+
+        Unlike successive :meth:`insert_tree` calls, each tree object is
+        written only once, from the bottom up.
+
+        :param data: the data to store, by prefix (path under Git tree)
+        :type data: dict
+        :return: the root tree, to be committed
+        :rtype: :class:`Tree`
+        """
+        pass
+
+    @staticmethod
+    def _group_paths(data):
+        """Group prefixes into a nested dict, one level per path component.
+
+        Leaves hold the data to be stored, as strings.
+
+        :param data: the data to store, by prefix
+        :type data: dict
+        :raises BadEntryError: a prefix is both a file and a directory
+        :return: the nested dict
+        :rtype: dict
+        """
+        root = dict()
+        for prefix, value in data.items():
+            *dirs, name = prefix.split('/')
+            node = root
+            for d in dirs:
+                node = node.setdefault(d, dict())
+                if not isinstance(node, dict):
+                    break
+            if not isinstance(node, dict) or isinstance(node.get(name), dict):
+                raise GitException.BadEntryError(
+                    reason="Prefix is both a file & a directory",
+                    dbg_info={"prefix": prefix})
+            node[name] = str(value)
+        return root
+
     @abstractmethod
     def diff_tree(self, prefix, src_rev, dst_rev):
         """
@@ -472,15 +513,13 @@ class GitByAPI(GitByGeneric):
             return Tree(self, tid, prefix)
 
     def _get_tree(self, chain, tree=None):
-        if len(chain) <= 0:
+        if len(chain) <= 0 or tree is None:
             return tree
-        else:
-            subtree = None
-            for i in tree:
-                if chain[0] == i.name:
-                    subtree = i
-                    break
-            return self._get_tree(chain[1:], subtree)
+        try:
+            # path lookup, without listing each intermediate tree
+            return tree["/".join(chain)]
+        except KeyError:
+            return None
 
     def iterate_over(self, rev=None):
         assert (not rev or isinstance(rev, Reference))
@@ -559,11 +598,13 @@ class GitByAPI(GitByGeneric):
                     dbg_info={"ref": parent}
                 )
 
+        # trees from insert_trees() are already written
+        tid = tree.tid if tree.tid is not None else tree.hdl.write()
         coid = self._repo.create_commit(update_ref,
                                         author,
                                         committer,
                                         msg,
-                                        tree.hdl.write(),
+                                        tid,
                                         parents
                                         )
         ci = self._repo.get(coid)
@@ -634,6 +675,40 @@ class GitByAPI(GitByGeneric):
         treebuild.insert(subtree_name, subtree_oid, pygit2.GIT_FILEMODE_TREE)
         return treebuild.write()
 
+    def insert_trees(self, data):
+        tree = self._group_paths(data)
+
+        # identical data (ex: same job results) are stored once
+        blobs = dict()
+        stack = [tree]
+        while stack:
+            for child in stack.pop().values():
+                if isinstance(child, dict):
+                    stack.append(child)
+                elif child not in blobs:
+                    blobs[child] = self._repo.create_blob(child)
+
+        return Tree(self._repo, self.__write_tree(tree, blobs))
+
+    def __write_tree(self, node, blobs):
+        """Write a tree object, once its subtrees have been written.
+
+        :param node: the nested dict describing the tree
+        :type node: dict
+        :param blobs: blob Oids, by data
+        :type blobs: dict
+        :return: the tree Oid
+        :rtype: :class:`Pygit2.Oid`
+        """
+        treebuild = self._repo.TreeBuilder()
+        for name, child in node.items():
+            if isinstance(child, dict):
+                treebuild.insert(name, self.__write_tree(child, blobs),
+                                 pygit2.GIT_FILEMODE_TREE)
+            else:
+                treebuild.insert(name, blobs[child], pygit2.GIT_FILEMODE_BLOB)
+        return treebuild.write()
+
     def gc(self):
         import sh
         hdl = sh.git.bake(_cwd=self._path)
@@ -741,6 +816,29 @@ class GitByCLI(GitByGeneric):
 
         return root
 
+    def insert_trees(self, data):
+        # only check prefixes: fast-import builds nested trees on its own
+        self._group_paths(data)
+
+        # a single fast-import stream writes every blob & tree (packed), as
+        # a throw-away commit only used to get the root tree back
+        ref = "refs/pcvs/bulk-import"
+        stream = [b"commit " + ref.encode() + b"\n",
+                  b"committer pcvs <pcvs> 0 +0000\n",
+                  b"data 0\n"]
+        for prefix, value in data.items():
+            if prefix.startswith('"') or "\n" in prefix:
+                prefix = '"{}"'.format(prefix.replace("\\", "\\\\").replace(
+                    '"', '\\"').replace("\n", "\\n"))
+            payload = str(value).encode()
+            stream.append(b"M 100644 inline " + prefix.encode() + b"\n")
+            stream.append(b"data %d\n" % len(payload) + payload + b"\n")
+
+        self._git("fast-import", "--quiet", "--force", _in=b"".join(stream))
+        oid = self._git("rev-parse", ref + "^{tree}").strip()
+        self._git("update-ref", "-d", ref)
+        return Tree(self, oid)
+
     def get_tree(self, rev=None, prefix=""):
         oid = None
         assert (not rev or isinstance(rev, Reference))
@@ -780,17 +878,17 @@ class GitByCLI(GitByGeneric):
 
             parent = self._set_or_head(parent)
             parents = self.revparse(parent)
-            commit_id = self._git("commit-tree", tree,
-                                  "-m '{}'".format(msg),
-                                  "-p {}".format(parents.cid)
+            commit_id = self._git("commit-tree", tree.tid,
+                                  "-m", msg,
+                                  "-p", parents.cid
                                   ).strip()
             if isinstance(parent, Branch):
                 self._git.push(
                     ".", "{}:refs/heads/{}".format(commit_id, parent.name))
         # The commit will have no parent
         else:
-            commit_id = self._git("commit-tree", tree,
-                                  "-m '{}'".format(msg),
+            commit_id = self._git("commit-tree", tree.tid,
+                                  "-m", msg,
                                   ).strip()
 
         return self.__obj_to_commit(commit_id)
@@ -875,6 +973,19 @@ def request_git_attr(k) -> str:
     return None
 
 
+def hash_blob(data) -> str:
+    """Compute the Git object id of data, once stored as a blob.
+
+    :param data: data to hash (stringified if not bytes, as stored in banks)
+    :type data: any
+    :return: the object id (hex)
+    :rtype: str
+    """
+    if not isinstance(data, bytes):
+        data = str(data).encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
 def generate_data_hash(data) -> str:
     """Hash data with git protocol.
 
@@ -343,6 +343,7 @@ class MetaConfig(MetaDict):
         subtree.set_nosquash('reused_build', None)
         subtree.set_nosquash('webreport', None)
         subtree.set_nosquash("only_success", False)
+        subtree.set_nosquash("script_format", "indexed")
         subtree.set_nosquash("enable_report", False)
         subtree.set_nosquash('job_timeout', 86400)
         subtree.set_nosquash('per_result_file_sz', 10 * 1024 * 1024)
@@ -364,6 +365,20 @@ class MetaConfig(MetaDict):
             subtree.result.log = 1
         if 'logsz' not in subtree.result:
             subtree.result.logsz = 1024
+        if 'backend' not in subtree.result:
+            subtree.result.backend = 'files'
+        if 'async_queue' not in subtree.result:
+            subtree.result.async_queue = 0
+        if 'fsync' not in subtree.result:
+            subtree.result.fsync = 'never'
+        if 'output_cap' not in subtree.result:
+            subtree.result.output_cap = 0
+        if 'output_spill' not in subtree.result:
+            subtree.result.output_spill = False
+        if 'archive_codec' not in subtree.result:
+            subtree.result.archive_codec = 'deflate'
+        if 'archive_incremental' not in subtree.result:
+            subtree.result.archive_incremental = False
 
         return subtree
 
@@ -378,6 +393,7 @@ class MetaConfig(MetaDict):
         subtree.set_nosquash('nodes', 1)
         subtree.set_nosquash('cores_per_node', 1)
         subtree.set_nosquash('concurrent_run', 1)
+        subtree.set_nosquash('engine', 'thread')
 
         if 'default_partition' not in subtree or 'partitions' not in subtree:
             return
@@ -1,5 +1,6 @@
 import os
 import queue
+import time
 
 from pcvs import NAME_BUILD_RESDIR, io
 from pcvs.backend import session
@@ -7,7 +8,7 @@ from pcvs.helpers import log
 from pcvs.helpers.system import MetaConfig
 from pcvs.orchestration.manager import Manager
 from pcvs.orchestration.set import Set
-from pcvs.orchestration.runner import RunnerAdapter
+from pcvs.orchestration.runner import RunnerAdapter, build_runners
 from pcvs.plugins import Plugin
 from pcvs.testing.test import Test
 
@@ -32,8 +33,12 @@ class Orchestrator:
     :type _manager: :class:`Manager`
     :ivar _maxconcurrent: Max number of sets started at the same time.
     :type _maxconcurrent: int
-
+    :ivar _engine: execution engine running sets ('thread' or 'asyncio')
+    :type _engine: str
+    :cvar FLUSH_PERIOD: max delay (in seconds) between two result flushes.
+    :type FLUSH_PERIOD: int
     """
+    FLUSH_PERIOD = 30
 
     def __init__(self):
         """constructor method"""
@@ -42,10 +47,13 @@ class Orchestrator:
         self._runners = list()
         self._max_res = config_tree.machine.get('nodes', 1)
         self._publisher = config_tree.get_internal('build_manager').results
-        self._manager = Manager(self._max_res, publisher=self._publisher)
-        self._maxconcurrent = config_tree.machine.get('concurrent_run', 1)
         self._complete_q = queue.Queue()
         self._ready_q = queue.Queue()
+        # background evaluations wake the orchestrator up like Sets do
+        self._manager = Manager(self._max_res, publisher=self._publisher,
+                                notify=self._complete_q)
+        self._maxconcurrent = config_tree.machine.get('concurrent_run', 1)
+        self._engine = config_tree.machine.get('engine', 'thread')
 
     def print_infos(self):
         """display pre-run infos."""
@@ -53,7 +61,17 @@ class Orchestrator:
             self._manager.get_count('total')))
         io.console.print_item(
             "Max simultaneous Sets: {}".format(self._maxconcurrent))
+        io.console.print_item("Execution engine: {}".format(self._engine))
         io.console.print_item("Resource count: {}".format(self._max_res))
+        if self._manager.eval_workers:
+            io.console.print_item("Evaluation workers: {}".format(
+                self._manager.eval_workers))
+        if self._manager.capacity:
+            io.console.print_item("Shared resources: {}".format(", ".join(
+                "{}={}".format(k, v) for k, v in self._manager.capacity.items())))
+        io.console.print_item("Scheduling policy: {}{}".format(
+            self._manager.policy.name,
+            " (with backfilling)" if self._manager.backfill else ""))
 
     # This func should only be a passthrough to the job manager
     def add_new_job(self, job):
@@ -78,20 +96,20 @@ class Orchestrator:
             "pColl").invoke_plugins(Plugin.Step.SCHED_BEFORE)
 
         io.console.info("ORCH: initialize runners")
-        for i in range(0, self._maxconcurrent):
-            self.start_new_runner()
+        self.start_runners()
 
         self._manager.resolve_deps()
         if io.console.verb_debug:
             self._manager.print_dep_graph(outfile="./graph.dat")
 
         nb_res = self._max_res
+        nb_inflight = 0
         last_progress = 0
-        pending_list = list()
+        next_flush = time.time() + self.FLUSH_PERIOD
         io.console.info("ORCH: start job scheduling")
         # While some jobs are available to run
         with io.console.table_container(self._manager.get_count()):
-            while self._manager.get_leftjob_count() > 0 or len(pending_list) > 0:
+            while self._manager.get_leftjob_count() > 0:
                 # dummy init value
                 new_set: Set = not None
                 while new_set is not None:
@@ -101,22 +119,39 @@ class Orchestrator:
                         assert(isinstance(nb_res, int))
                         # schedule the set asynchronously
                         nb_res -= new_set.dim
+                        nb_inflight += 1
                         io.console.debug("ORCH: send Set to queue (#{}, sz:{})".format(
                             new_set.id, new_set.size))
                         self._ready_q.put(new_set)
-                    else:
-                        self._manager.prune_non_runnable_jobs()
 
-                # Now, look for a completion
+                if nb_inflight == 0 and not self._manager.evaluating:
+                    # nothing is running: no completion will ever wake us up
+                    # Prune non-runnable jobs & keep looping.
+                    self._manager.prune_non_runnable_jobs()
+                    continue
+
+                # Now, sleep until a completion occurs (releasing resources
+                # or dependents) or the flush timer expires
                 try:
-                    set = self._complete_q.get(block=False, timeout=2)
-                    io.console.debug("ORCH: recv Set from queue (#{}, sz:{})".format(
-                        set.id, set.size))
-                    nb_res += set.dim
-                    self._manager.merge_subset(set)
+                    item = self._complete_q.get(
+                        block=True, timeout=max(0, next_flush - time.time()))
+                    while item is not None:
+                        if isinstance(item, Set):
+                            io.console.debug("ORCH: recv Set from queue (#{}, sz:{})".format(
+                                item.id, item.size))
+                            nb_res += item.dim
+                            nb_inflight -= 1
+                            self._manager.merge_subset(item)
+                        else:
+                            # a job evaluated in background
+                            self._manager.complete_evaluation(item)
+                        # handle any other completion in a single wake-up
+                        try:
+                            item = self._complete_q.get(block=False)
+                        except queue.Empty:
+                            item = None
                 except queue.Empty:
                     self._manager.prune_non_runnable_jobs()
-                    pass
                     # TODO: create backup to allow start/stop
 
                 current_progress = self._manager.get_count(
@@ -124,22 +159,35 @@ class Orchestrator:
 
                 # Condition to trigger a dump of results
                 # info result file at a periodic step of 5% of
-                # the global workload
-                if (current_progress - last_progress) > 0.05:
+                # the global workload or when the flush timer expires
+                if (current_progress - last_progress) > 0.05 or time.time() >= next_flush:
                     # TODO: Publish results periodically
                     # 1. on file system
                     # 2. directly into the selected bank
                     io.console.debug("ORCH: Flush a new progression file")
                     self._publisher.flush()
                     last_progress = current_progress
+                    next_flush = time.time() + self.FLUSH_PERIOD
                     if the_session is not None:
                         session.update_session_from_file(
                             the_session.id, {'progress': current_progress * 100})
 
         self._publisher.flush()
+        self._manager.shutdown()
         assert (self._manager.get_count('executed')
                 == self._manager.get_count('total'))
 
+        io.console.print_item("Makespan: {:.2f} sec(s)".format(
+            self._manager.makespan))
+        io.console.print_item("Resource utilization: {:.1f}%".format(
+            self._manager.utilization * 100))
+        stats = self._publisher.output_stats
+        if stats['stored']:
+            io.console.print_item(
+                "Output deduplication: x{:.2f} ({:.1f} MiB stored for {:.1f} MiB)".format(
+                    stats['total'] / stats['stored'], stats['stored'] / 2**20,
+                    stats['total'] / 2**20))
+
         MetaConfig.root.get_internal(
             "pColl").invoke_plugins(Plugin.Step.SCHED_AFTER)
 
@@ -148,18 +196,31 @@ class Orchestrator:
 
         return 0 if self._manager.get_count('total') - self._manager.get_count(Test.State.SUCCESS) == 0 else 1
 
-    def start_new_runner(self):
-        """Start a new Runner thread & register comm queues."""
+    def start_runners(self):
+        """Start Runner threads, depending on the execution engine, & register
+        comm queues.
+
+        The 'thread' engine starts one runner per concurrent Set, while the
+        'asyncio' one multiplexes every concurrent Set through a single
+        runner.
+        """
         RunnerAdapter.sched_in_progress = True
-        r = RunnerAdapter(buildir=MetaConfig.root.validation.output, ready=self._ready_q, complete=self._complete_q)
-        r.start()
-        self._runners.append(r)
+        for r in build_runners(self._engine,
+                               buildir=MetaConfig.root.validation.output,
+                               ready=self._ready_q,
+                               complete=self._complete_q,
+                               concurrency=self._maxconcurrent):
+            r.start()
+            self._runners.append(r)
 
     def stop_runners(self):
         """Stop all previously started runners.
 
         Wait for their completion."""
         self.stop()
+        # one sentinel per runner, each runner consumes exactly one
+        for _ in self._runners:
+            self._ready_q.put(None)
         for t in self._runners:
             t.join()
 
@@ -1,6 +1,13 @@
+import math
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from pcvs.helpers import log
 from pcvs.helpers.exceptions import OrchestratorException
 from pcvs.helpers.system import MetaConfig, MetaDict
+from pcvs.orchestration.scheduling import SchedPolicy, build_policy
 from pcvs.orchestration.set import Set
 from pcvs.plugins import Plugin
 from pcvs.testing.test import Test
@@ -15,7 +22,7 @@ class Manager:
     Set()s. Once completed Sets are merged to the Manager before publishing the
     results.
 
-    :ivar dims: hierarchical dict storing jobs
+    :ivar dims: hierarchical dict storing ready-to-run jobs (no pending deps)
     :type dims: dict
     :ivar _max_size: max number of resources allowed by the profile
     :type _max_size: int
@@ -23,11 +30,33 @@ class Manager:
     :type _publisher: :class:`ResultFileManager`
     :ivar _count: dict gathering various counters (total, executed...)
     :type _count: dict 
+    :ivar _policy: the scheduling policy, building ready queues
+    :type _policy: :class:`SchedPolicy`
+    :ivar _backfill: True if EASY backfilling is enabled
+    :type _backfill: bool
+    :ivar _running: estimated end time & resources of each running Set
+    :type _running: dict
+    :ivar _capacity: amount of each extra resource (beside nodes) declared
+        by the machine config
+    :type _capacity: dict
+    :ivar _free: amount of each extra resource not booked by running Sets
+    :type _free: dict
+    :ivar _evaluator: pool evaluating executed jobs (metrics, matchers,
+        validation scripts & plugins), None to evaluate them synchronously
+    :type _evaluator: :class:`ThreadPoolExecutor`
+    :ivar _evaluated: queue receiving evaluations once completed
+    :type _evaluated: :class:`queue.Queue`
+    :ivar _evaluating: number of jobs being evaluated, not published yet
+    :type _evaluating: int
+    :cvar BACKFILL_DEPTH: max number of jobs inspected per ready queue to find
+        a backfill candidate.
+    :type BACKFILL_DEPTH: int
     """
     job_hashes = dict()
     dep_rules = dict()
+    BACKFILL_DEPTH = 32
 
-    def __init__(self, max_size=0, builder=None, publisher=None):
+    def __init__(self, max_size=0, builder=None, publisher=None, notify=None):
         """constructor method.
 
         :param max_size: max number of resource allowed to schedule.
@@ -36,10 +65,32 @@ class Manager:
         :type builder: None
         :param publisher: requested publisher by the orchestrator
         :type publisher: :class:`ResultFileManager`
+        :param notify: queue receiving completed evaluations (see
+            :meth:`complete_evaluation`), defaults to a new queue
+        :type notify: :class:`queue.Queue`, optional
         """
         self._comman = MetaConfig.root.get_internal('comman')
         self._plugin = MetaConfig.root.get_internal('pColl')
         self._concurrent_level = MetaConfig.root.machine.get('concurrent_run', 1)
+        self._policy = build_policy(
+            MetaConfig.root.validation.scheduling.get('policy', SchedPolicy.name),
+            MetaConfig.root.get_internal('sched_history'))
+        self._backfill = MetaConfig.root.validation.scheduling.get('backfill', False)
+        self._running = dict()
+        self._capacity = {k: v for k, v in MetaConfig.root.machine.get(
+            'resources', {}).items() if k != 'n_node'}
+        self._free = dict(self._capacity)
+        self._busy_time = 0.0
+        self._first_start = None
+        self._last_end = None
+        self._eval_workers = MetaConfig.root.validation.scheduling.get(
+            'eval_workers', 0)
+        self._evaluator = None
+        if self._eval_workers > 0:
+            self._evaluator = ThreadPoolExecutor(
+                max_workers=self._eval_workers, thread_name_prefix="pcvs-eval")
+        self._evaluated = notify if notify is not None else queue.Queue()
+        self._evaluating = 0
 
         self._dims = dict()
         self._max_size = max_size
@@ -52,15 +103,63 @@ class Manager:
     def get_dim(self, dim):
         """Get the list of jobs satisfying the given dimension.
 
+        Only jobs with no pending dependency are stored there.
+
         :param dim: the target dim
         :type dim: int
         :return: the list of jobs for this dimension, empty if dim is invalid
-        :rtype: list
+        :rtype: deque or :class:`ReadyHeap`
         """
         if dim not in self._dims:
-            return []
+            return deque()
         return self._dims[dim]
 
+    @property
+    def policy(self):
+        """Get the scheduling policy in use.
+
+        :return: the policy
+        :rtype: :class:`SchedPolicy`
+        """
+        return self._policy
+
+    @property
+    def backfill(self):
+        """Check if EASY backfilling is enabled.
+
+        :return: True if enabled
+        :rtype: bool
+        """
+        return self._backfill
+
+    @property
+    def capacity(self):
+        """Get the amount of each extra resource (beside nodes) to share
+        between jobs.
+
+        :return: amounts by resource label
+        :rtype: dict
+        """
+        return self._capacity
+
+    @property
+    def eval_workers(self):
+        """Get the number of threads evaluating executed jobs.
+
+        :return: the pool size, 0 if jobs are evaluated synchronously
+        :rtype: int
+        """
+        return self._eval_workers
+
+    @property
+    def evaluating(self):
+        """Get the number of jobs being evaluated in background.
+
+        :return: the number of jobs not published yet
+        :rtype: int
+        """
+        return self._evaluating
+
     @property
     def nb_dims(self):
         """Get max number of defined dimensions.
@@ -76,15 +175,7 @@ class Manager:
         :param job: The job to append
         :type job: :class:`Test`
         """
-        value = min(self._max_size, job.get_dim())
-
-        if self._max_size < value:
-            self._max_size = value
-
-        if value not in self._dims:
-            self._dims.setdefault(value, list())
-
-        self._dims[value].append(job)
+        self.push_ready_job(job)
 
         hashed = job.jid
         # if test is not know yet, add + increment
@@ -92,7 +183,20 @@ class Manager:
             self.job_hashes[hashed] = job
             self._count.total += 1
             self.save_dependency_rule(job.basename, job)
-            
+
+    def push_ready_job(self, job):
+        """Append a job to the ready queue matching its dimension.
+
+        :param job: the job, should not wait for any dep
+        :type job: :class:`Test`
+        """
+        value = min(self._max_size, job.get_dim())
+
+        if value not in self._dims:
+            self._dims.setdefault(value, self._policy.new_queue())
+
+        self._dims[value].append(job)
+
     def save_dependency_rule(self, pattern, jobs):
         assert(isinstance(pattern, str))
         
@@ -116,18 +220,43 @@ class Manager:
         """Resolve the whole dependency graph.
 
         This function is meant to be called once and browse every single tests
-        to resolve dep names to their real associated object.
+        to resolve dep names to their real associated object. The graph is then
+        walked once to detect circular deps, in O(V+E).
+
+        Once resolved, jobs still waiting for a dep are withdrawn from ready
+        queues. They will be pushed back by :meth:`publish_job` when their
+        last dep completes.
+
+        :raises UndefDependencyError: a depname does not have a related object
+        :raises CircularDependencyError: at least one circular dep is detected,
+            every cycle being reported in debug infos.
         """
-        for joblist in self._dims.values():
-            for job in joblist:
-                self.resolve_single_job_deps(job, list())
+        jobs = [job for joblist in self._dims.values() for job in joblist]
+        for job in jobs:
+            self.resolve_single_job_deps(job)
+
+        order = self.topological_sort(jobs)
+        if len(order) != len(jobs):
+            ordered = set(order)
+            cycles = self.find_circular_deps(
+                [job for job in jobs if job not in ordered])
+            raise OrchestratorException.CircularDependencyError(
+                reason="{} circular dep(s) detected".format(len(cycles)),
+                help_msg="Check the 'depends_on' nodes involving these jobs.",
+                dbg_info={"cycle #{}".format(i): " -> ".join(
+                    [job.name for job in cycle])
+                    for i, cycle in enumerate(cycles, 1)})
+
+        self._policy.prepare(order)
+        for k in self._dims.keys():
+            self._dims[k] = self._policy.new_queue(
+                job for job in self._dims[k] if job.has_completed_deps())
 
     def print_dep_graph(self, outfile=None):
         s = ["digraph D {"]
-        for joblist in self._dims.values():
-            for job in joblist:
-                for d in job.get_dep_graph().keys():
-                    s.append('"{}"->"{}";'.format(job.name, d))
+        for job in self.job_hashes.values():
+            for d in job.job_deps:
+                s.append('"{}"->"{}";'.format(job.name, d.name))
         s.append("}")
         
         if not outfile:
@@ -136,21 +265,15 @@ class Manager:
             with open(outfile, 'w') as fh:
                 fh.write("\n".join(s))
 
-    def resolve_single_job_deps(self, job, chain):
-        """Resolve the dependency graph for a single test.
+    def resolve_single_job_deps(self, job):
+        """Resolve dep names of a single test to their job objects.
 
-        The 'chain' argument contains list of "already-seen" dependency, helping
-        to detect circular deps.
+        Deps of deps are not walked, each job being resolved on its own.
 
         :raises UndefDependencyError: a depname does not have a related object
-        :raises CircularDependencyError: a circular dep is detected from this
-            job.
         :param job: the job to resolve
         :type job: :class:`Test`
-        :param chain: list of already-seen jobs during this walkthrough
-        :type chain: list
         """
-        chain.append(job.name)
         for depname in job.job_depnames:
 
             hashed_dep = Test.get_jid_from_name(depname)
@@ -162,16 +285,91 @@ class Manager:
                 raise OrchestratorException.UndefDependencyError(depname)
 
             for job_dep in job_dep_list:
-                if job_dep.name in chain:
-                    raise OrchestratorException.CircularDependencyError(chain)
-                
-                # without copying the chain, resolution of siblings deps will alter
-                # the same list --> a single dep may appear multiple time and raise
-                # a false CiprcularDep
-                # solution: resolve subdep path in their own chain :)
-                self.resolve_single_job_deps(job_dep, list(chain))
                 job.resolve_a_dep(depname, job_dep)
 
+    @classmethod
+    def topological_sort(cls, jobs):
+        """Order jobs so that any job comes after its deps (Kahn's algorithm).
+
+        Jobs belonging to (or depending on) a circular dep cannot be ordered
+        and are left out of the result.
+
+        :param jobs: the jobs to sort, deps being already resolved
+        :type jobs: list
+        :return: the ordered jobs
+        :rtype: list
+        """
+        indegree = {job: len(job.job_deps) for job in jobs}
+        ready = deque(job for job, deg in indegree.items() if deg == 0)
+        order = []
+        while ready:
+            job = ready.popleft()
+            order.append(job)
+            for dependent in job.job_dependents:
+                if dependent not in indegree:
+                    continue
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        return order
+
+    @classmethod
+    def find_circular_deps(cls, jobs):
+        """List circular deps among jobs (iterative Tarjan's algorithm).
+
+        Each strongly connected component of the dep graph containing more than
+        one job (or a job depending on itself) is a cycle.
+
+        :param jobs: the jobs to analyse, deps being already resolved
+        :type jobs: list
+        :return: the list of cycles, each one being a list of jobs
+        :rtype: list
+        """
+        subgraph = set(jobs)
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+
+        def successors(job):
+            return iter([d for d in job.job_deps if d in subgraph])
+
+        for root in jobs:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            walk = [(root, successors(root))]
+            while walk:
+                job, it = walk[-1]
+                for dep in it:
+                    if dep not in index:
+                        index[dep] = lowlink[dep] = len(index)
+                        stack.append(dep)
+                        on_stack.add(dep)
+                        walk.append((dep, successors(dep)))
+                        break
+                    elif dep in on_stack:
+                        lowlink[job] = min(lowlink[job], index[dep])
+                else:
+                    walk.pop()
+                    if walk:
+                        parent = walk[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[job])
+                    if lowlink[job] == index[job]:
+                        component = []
+                        while True:
+                            elt = stack.pop()
+                            on_stack.discard(elt)
+                            component.append(elt)
+                            if elt is job:
+                                break
+                        if len(component) > 1 or job in job.job_deps:
+                            cycles.append(component[::-1])
+        return cycles
+
     def get_leftjob_count(self):
         """Return the number of jobs remainig to be executed.
 
@@ -181,30 +379,68 @@ class Manager:
         return self._count.total - self._count.executed
 
     def publish_job(self, job, publish_args=None):
+        """Publish a completed job and notify its dependents.
+
+        A successful job releases its dependents, the ones not waiting for any
+        other dep becoming ready to be scheduled. Otherwise, the whole
+        dependent subtree is published as ERR_DEP.
+
+        :param job: the completed job
+        :type job: :class:`Test`
+        :param publish_args: final results to be saved first, defaults to None
+        :type publish_args: dict, optional
+        """
         if publish_args:
             job.save_final_result(**publish_args)
 
+        self.__save_job(job)
+
+        if job.state == Test.State.SUCCESS:
+            for dependent in job.job_dependents:
+                if dependent.release_a_dep():
+                    self.push_ready_job(dependent)
+        else:
+            self.propagate_failed_dep(job)
+
+    def __save_job(self, job):
         if self._comman:
             self._comman.send(job)
         self._count.executed += 1
         self._count[job.state] += 1
         self._publisher.save(job)
 
+    def propagate_failed_dep(self, job):
+        """Publish every job depending (even indirectly) on a failed one.
+
+        These jobs are waiting for at least one dep, they are not part of any
+        ready queue.
+
+        :param job: the failed job
+        :type job: :class:`Test`
+        """
+        stack = list(job.job_dependents)
+        while stack:
+            dependent = stack.pop()
+            # reached through another failed dep already
+            if dependent.been_executed():
+                continue
+            dependent.save_final_result(rc=-1, time=0.0, out=Test.NOSTART_STR,
+                                        state=Test.State.ERR_DEP)
+            self.__save_job(dependent)
+            dependent.display()
+            stack.extend(dependent.job_dependents)
+
     def prune_non_runnable_jobs(self):
         for k in sorted(self._dims.keys(), reverse=True):
-                if len(self._dims[k]) <= 0:
-                    continue
+            if len(self._dims[k]) <= 0:
+                continue
+            kept_jobs = self._policy.new_queue()
+            for job in self._dims[k]:
+                if job.pick_count() > Test.SCHED_MAX_ATTEMPTS:
+                    self.publish_failed_to_run_job(job, Test.MAXATTEMPTS_STR, Test.State.ERR_OTHER)
                 else:
-                    removed_jobs = list()
-                    for job in self._dims[k]:
-                        if job.pick_count() > Test.SCHED_MAX_ATTEMPTS:
-                            self.publish_failed_to_run_job(job, Test.MAXATTEMPTS_STR, Test.State.ERR_OTHER)
-                            removed_jobs.append(job)
-                    for elt in removed_jobs:
-                        self._dims[k].remove(elt)
-            
-
-            
+                    kept_jobs.append(job)
+            self._dims[k] = kept_jobs
 
     def create_subset(self, max_dim):
         """Extract one or more jobs, ready to be run.
@@ -232,52 +468,34 @@ class Manager:
                 max_job_limit=int(self._count.total / self._concurrent_level)
             )
         else:
+            # EASY backfilling: once the widest waiting job cannot start,
+            # resources are booked for it. Smaller jobs can then only start if
+            # they do not delay it.
+            reservation = None
             for k in sorted(self._dims.keys(), reverse=True):
-                if len(self._dims[k]) <= 0 or max_dim < k:
+                if len(self._dims[k]) <= 0:
+                    continue
+                elif max_dim < k:
+                    if self._backfill and reservation is None:
+                        head = self._dims[k].popleft()
+                        self._dims[k].appendleft(head)
+                        reservation = self.reserve_resources(head, max_dim)
                     continue
                 else:
                     # assert(self._builder.job_grabber)
-                    job: Test = self._dims[k].pop(0)
-                    publish_job_args = {}
+                    if reservation is not None or self._capacity:
+                        job = self.__pop_fitting_job(self._dims[k], reservation)
+                        if job is None:
+                            continue
+                    else:
+                        job: Test = self._dims[k].popleft()
                     if job:
                         if job.been_executed() or job.state == Test.State.IN_PROGRESS:
                             # skip job (only a pop() to do)
                             continue
 
-                        elif not job.has_completed_deps():
-
-                            # take the first unresolved dep to be scheduled
-                            # instead
-                            # CAUTION: no schedulable dep may be found at
-                            # present time. In the meantime, the completion may
-                            # occurs concurrently
-                            self._dims[k].append(job)
-                            # pick up a dep
-                            dep_job = job.first_incomplete_dep()
-                            while dep_job and not dep_job.has_completed_deps():
-                                dep_job = dep_job.first_incomplete_dep()
-                            # no "incomplete" task has been found
-                            # this may due to a dep completion in the mean time
-                            # discard for now, wait for another process
-                            # to schedule this job
-                            if dep_job:
-                                job = dep_job
-                            else:
-                                break
-
-                        # from here, it can be the original job or one of its
-                        # dep tree. But we are sure this job can be processed
-
-                        if job.has_failed_dep():
-                            # Cannot be scheduled for dep purposes
-                            # push it to publisher
-                            self.publish_failed_to_run_job(job, Test.NOSTART_STR, Test.State.ERR_DEP)
-                            # Attempt to find another job to schedule
-                            continue
-
-                        # Reached IF Job hasn't be run yet
-                        # Job has completed its dep scheme
-                        # all deps are successful
+                        # ready queues only carry jobs whose deps all
+                        # completed successfully (see publish_job())
                         # => SCHEDULE
                         if user_sched_job:
                             pick_job = self._plugin.invoke_plugins(
@@ -299,8 +517,137 @@ class Manager:
                             else:
                                 self._dims[k].append(job)
         self._plugin.invoke_plugins(Plugin.Step.SCHED_SET_AFTER)
+
+        if the_set:
+            for unit, amount in the_set.resources.items():
+                if unit in self._free:
+                    self._free[unit] -= amount
+            now = time.time()
+            if self._first_start is None:
+                self._first_start = now
+            self._running[the_set.id] = (
+                now + max([self._policy.walltime(j) for j in the_set.content]),
+                the_set.dim)
         return the_set
 
+    def fits(self, job):
+        """Check if enough extra resources are currently free to run a job.
+
+        Nodes are not considered here, they are accounted by the caller.
+
+        :param job: the job
+        :type job: :class:`Test`
+        :return: True if the job can be started
+        :rtype: bool
+        """
+        return all(job.get_dim(unit) <= free
+                   for unit, free in self._free.items())
+
+    def exceeds_capacity(self, job):
+        """Check if a job requests more extra resources than the machine has.
+
+        :param job: the job
+        :type job: :class:`Test`
+        :return: True if the job can never be started
+        :rtype: bool
+        """
+        return any(job.get_dim(unit) > total
+                   for unit, total in self._capacity.items())
+
+    def reserve_resources(self, job, free):
+        """Compute when enough resources will be released for a job to start.
+
+        Running Sets are expected to complete according to their walltime
+        estimation. Only nodes are reserved.
+
+        :param job: the job waiting for resources
+        :type job: :class:`Test`
+        :param free: resources currently free
+        :type free: int
+        :return: the reservation, as (start time, number of resources still
+            free at that time once the job started)
+        :rtype: tuple
+        """
+        needed = job.get_dim()
+        start = time.time()
+        for end, dim in sorted(self._running.values()):
+            if free >= needed:
+                break
+            free += dim
+            start = end
+
+        if free < needed:
+            return (float('inf'), 0)
+        return (start, free - needed)
+
+    def __pop_fitting_job(self, queue, reservation=None):
+        """Extract the first job fitting into free resources, if any.
+
+        When a reservation is set, a job may backfill if it completes before
+        the reservation starts, or if it only uses nodes not booked by it. An
+        unknown walltime (job or running Set) never completes before the
+        reservation.
+        Jobs requesting more than the machine capacity are published as
+        failed.
+
+        :param queue: the ready queue to extract from
+        :type queue: deque or :class:`ReadyHeap`
+        :param reservation: the reservation (see :meth:`reserve_resources`),
+            defaults to None
+        :type reservation: tuple, optional
+        :return: the job, None if no job can be started
+        :rtype: :class:`Test`
+        """
+        now = time.time()
+        skipped = []
+        oversized = []
+        found = None
+        while len(queue) > 0 and len(skipped) < self.BACKFILL_DEPTH:
+            job = queue.popleft()
+            if self.exceeds_capacity(job):
+                oversized.append(job)
+                continue
+            if self.fits(job):
+                if reservation is None:
+                    found = job
+                    break
+                start, extra = reservation
+                end = now + self._policy.walltime(job)
+                if (math.isfinite(start) and end <= start) or \
+                        job.get_dim() <= extra:
+                    found = job
+                    break
+            skipped.append(job)
+
+        for job in reversed(skipped):
+            queue.appendleft(job)
+        for job in oversized:
+            self.publish_failed_to_run_job(job, Test.NORESOURCE_STR, Test.State.ERR_OTHER)
+        return found
+
+    @property
+    def makespan(self):
+        """Get the elapsed time between the first start and the last
+        completion.
+
+        :return: the makespan in seconds
+        :rtype: float
+        """
+        if self._first_start is None or self._last_end is None:
+            return 0.0
+        return self._last_end - self._first_start
+
+    @property
+    def utilization(self):
+        """Get the ratio of resources kept busy by jobs during the run.
+
+        :return: a ratio between 0 and 1
+        :rtype: float
+        """
+        if self.makespan <= 0 or self._max_size <= 0:
+            return 0.0
+        return min(1.0, self._busy_time / (self.makespan * self._max_size))
+
     def publish_failed_to_run_job(self, job, out, state):
         publish_job_args = {
             "rc": -1,
@@ -318,16 +665,62 @@ class Manager:
         :param set: the set handling jobs during the scheduling.
         :type set: :class:`Set`
         """
-        final = list()
+        if self._running.pop(set.id, None) is not None:
+            for unit, amount in set.resources.items():
+                if unit in self._free:
+                    self._free[unit] += amount
+            if not self._running:
+                # avoid any drift from non-integer amounts
+                self._free = dict(self._capacity)
+        self._last_end = time.time()
         for job in set.content:
             if job.been_executed():
-                job.extract_metrics()
-                job.evaluate()
-                self.publish_job(job, publish_args=None)
-                job.display()
+                self._busy_time += job.time * job.get_dim()
+                if self._evaluator:
+                    self._evaluating += 1
+                    future = self._evaluator.submit(self.evaluate_job, job)
+                    future.add_done_callback(self._evaluated.put)
+                else:
+                    self.evaluate_job(job)
+                    self.publish_job(job, publish_args=None)
+                    job.display()
             else:
                 
                 if job.not_picked():
                     self.publish_failed_to_run_job(job, Test.MAXATTEMPTS_STR, Test.State.ERR_OTHER)
                 else:
                     self.add_job(job)
+
+    @staticmethod
+    def evaluate_job(job):
+        """Compute the final state of an executed job (may run in the pool).
+
+        :param job: the executed job
+        :type job: :class:`Test`
+        :return: the same job, evaluated
+        :rtype: :class:`Test`
+        """
+        job.extract_metrics()
+        job.evaluate()
+        return job
+
+    def complete_evaluation(self, future):
+        """Publish a job evaluated in background.
+
+        Dependents are only released at this point, once the job final state
+        is known. This should be called from the scheduling thread, for each
+        future put in the notify queue.
+
+        :param future: the completed evaluation
+        :type future: :class:`concurrent.futures.Future`
+        :raises Exception: any error raised by the evaluation
+        """
+        self._evaluating -= 1
+        job = future.result()
+        self.publish_job(job, publish_args=None)
+        job.display()
+
+    def shutdown(self):
+        """Stop the evaluation pool, waiting for running evaluations."""
+        if self._evaluator:
+            self._evaluator.shutdown(wait=True)
@@ -1,10 +1,20 @@
+import base64
 import bz2
 import datetime
+import hashlib
 import json
 import os
+import queue
 import shutil
+import sqlite3
+import struct
+import sys
 import tarfile
 import tempfile
+import threading
+import zipfile
+import zlib
+from array import array
 from typing import Dict, List, Optional, Iterable
 
 from ruamel.yaml import YAML
@@ -25,15 +35,38 @@ class ResultFile:
     
     A job result is stored in two different files whens given to a single
     ResultFile:
-    * <prefix>.json, containing metadata (rc, command...)
-    * <prefix>.bz2 BZ2-compressed job data.
-    
-    a MAGIC_TOKEN is used to detect file/data corruption.
+    * <prefix>.json, containing metadata (rc, command...). New entries are
+      appended to a journal (<prefix>.jsonl) first, merged back into the
+      JSON file once the journal grows large enough (see :meth:`compact`).
+    * <prefix>.zlib, job data, outputs being gathered into blocks of about
+      BLOCK_SIZE bytes, each block being compressed on its own (zlib
+      frames). An output is located by its block (offset & length in the
+      file) and its position in the decompressed block (record_offset &
+      record_length), so any of them can be read back in constant time.
+
+    Metadata of jobs whose output is stored in the current block are only
+    journaled once this block is written, so the journal never references
+    missing data.
+
+    Job data from previous versions (a single BZ2 stream, <prefix>.bz2) can
+    still be read, see :meth:`migrate` to convert them.
+
+    Outputs are content-addressed: given a blob index (shared by all files of
+    a result directory), an output already stored is not written again, the
+    job metadata referencing the first copy (possibly in another file).
+
+    Blocks are checked by zlib itself. Previous versions stored a magic token
+    along each output to detect file/data corruption: outputs stored one per
+    frame as produced by jobs (BYTES_MAGIC_TOKEN), or base64-encoded in a BZ2
+    stream (MAGIC_TOKEN).
     """
     
     MAGIC_TOKEN = "PCVS-START-RAW-OUTPUT"
+    BYTES_MAGIC_TOKEN = "PCVS-START-RAW-BYTES"
+    COMPACT_MIN_ENTRIES = 1000
+    BLOCK_SIZE = 16 * 1024
 
-    def __init__(self, filepath, filename):
+    def __init__(self, filepath, filename, opener=None, blobs=None):
         """
         Initialize a new pair of output files.
 
@@ -41,47 +74,172 @@ class ResultFile:
         :type filepath: str
         :param filename: prefix filename
         :type filename: str
+        :param opener: function opening job data files (from their name) for
+            reading, if not stored along metadata files (i.e. read from an
+            archive), defaults to None
+        :type opener: Callable, optional
+        :param blobs: stored outputs (location by hash), to store identical
+            outputs once, defaults to None (no deduplication)
+        :type blobs: dict, optional
         """
         self._fileprefix = filename
+        self._opener = opener
+        self._blobs = blobs
+        self._readers = {}
         self._path = filepath
         self._cnt = 0
         self._sz = 0
         self._data = {}
+        self._legacy_data = None
+        self._journal_cnt = 0
+        self._snapshot_cnt = 0
+        # current block: outputs & jobs not written yet
+        self._block = bytearray()
+        self._block_jobs = []
+        self._block_digests = []
+        self._block_cache = None
 
         prefix = os.path.join(filepath, filename)
 
         # R/W access & seek to the start of the file
         self._metadata_file = "{}.json".format(prefix)
-        self._rawdata_file = "{}.bz2".format(prefix)
+        self._journal_file = "{}.jsonl".format(prefix)
+        self._rawdata_file = "{}.zlib".format(prefix)
+        self._legacy_file = "{}.bz2".format(prefix)
 
         try:
-            if os.path.isfile(self._metadata_file):
+            if os.path.isfile(self._metadata_file) or \
+                    os.path.isfile(self._journal_file):
                 self.load()
         except:
             pass
 
-        # no way to have a bz2 be opened R/W at once ? seems not :(
-        self._rawout = bz2.open(self._rawdata_file, "a")
-        self._rawout_reader = bz2.open(self._rawdata_file, "r")
+        self._journal = open(self._journal_file, "a")
+        self._rawout = None
+        self._rawout_reader = None
+        if opener:
+            try:
+                self._rawout_reader = opener(self.rawdata_prefix)
+            except FileNotFoundError:
+                pass
+        if self._rawout_reader is None:
+            self._rawout = open(self._rawdata_file, "ab")
+            self._rawout_reader = open(self._rawdata_file, "rb")
 
     def close(self):
         """
         Close the current instance (flush to disk)
         """
-        self.flush()
+        if not self._journal:
+            return
+        self.compact()
+        self._journal.close()
+        self._journal = None
         if self._rawout:
             self._rawout.close()
             self._rawout = None
+        for fh in self._readers.values():
+            fh.close()
+        self._readers = {}
 
     def flush(self):
         """
-        Sync cache with disk
+        Sync cache with disk.
+
+        The current block is written, even if not full. Only the journal is
+        written, the whole metadata file is rewritten once the journal holds
+        as many entries as the metadata file itself, keeping the amount of
+        data written linear with the number of jobs.
         """
-        with open(self._metadata_file, "w") as fh:
-            json.dump(self._data, fh)
+        self.__write_block()
+        # job data first: the journal never references missing data
+        if self._rawout:
+            self._rawout.flush()
 
+        if self._journal:
+            self._journal.flush()
+
+        if self._journal_cnt >= max(self.COMPACT_MIN_ENTRIES,
+                                    self._snapshot_cnt):
+            self.compact()
+
+    def sync(self):
+        """
+        Flush & force written data to reach the storage device (fsync).
+        """
+        self.flush()
+        for fh in (self._rawout, self._journal):
+            if fh:
+                os.fsync(fh.fileno())
+
+    def __write_block(self):
+        """
+        Compress & write the current block, then journal jobs it stores
+        outputs for.
+        """
+        if not self._block_jobs:
+            return
+        if self._block:
+            start = self._rawout.tell()
+            length = self._rawout.write(zlib.compress(bytes(self._block)))
+            for id, data in self._block_jobs:
+                output = data['result']['output']
+                if output['file'] == self.rawdata_prefix and \
+                        output['offset'] == start:
+                    output['length'] = length
+            for digest in self._block_digests:
+                self._blobs[digest]['length'] = length
+
+        for id, data in self._block_jobs:
+            self._journal.write(json.dumps([id, data]) + "\n")
+        self._journal_cnt += len(self._block_jobs)
+        self._block = bytearray()
+        self._block_jobs = []
+        self._block_digests = []
+
+    def compact(self):
+        """
+        Merge the journal into the metadata file.
+
+        The new metadata file replaces the previous one atomically, the journal
+        is emptied afterwards. Interrupting this step is harmless as replaying
+        a journal over a metadata file already including it is a no-op.
+        """
+        self.__write_block()
         if self._rawout:
             self._rawout.flush()
+        tmp_file = "{}.tmp".format(self._metadata_file)
+        with open(tmp_file, "w") as fh:
+            json.dump(self._data, fh)
+        os.replace(tmp_file, self._metadata_file)
+
+        self._journal.seek(0)
+        self._journal.truncate()
+        self._journal_cnt = 0
+        self._snapshot_cnt = len(self._data)
+
+    def __store(self, output) -> dict:
+        """
+        Append an output to the current block.
+
+        The block length is only known once written (see
+        :meth:`__write_block`).
+
+        :param output: raw output
+        :type output: bytes
+        :return: where the output is stored
+        :rtype: dict
+        """
+        # we consider the raw cursor to always be at the end of the file
+        insert = {
+            'file': self.rawdata_prefix,
+            'offset': self._rawout.tell(),
+            'length': 0,
+            'record_offset': len(self._block),
+            'record_length': len(output)
+        }
+        self._block += output
+        return insert
 
     def save(self, id, data, output):
         """
@@ -97,20 +255,17 @@ class ResultFile:
         assert (type(data) == dict)
         assert ('result' in data.keys())
         insert = {}
-        start = 0
-        length = 0
         if len(output) > 0:
-            # we consider the raw cursor to always be at the end of the file
-            # maybe lock the following to be atomic ?
-            start = self._rawout.tell()
-            length = self._rawout.write(self.MAGIC_TOKEN.encode("utf-8"))
-            length += self._rawout.write(output)
-
-            insert = {
-                'file': self.rawdata_prefix,
-                'offset': start,
-                'length': length
-            }
+            digest = hashlib.blake2b(output, digest_size=16).hexdigest()
+            if self._blobs is not None and digest in self._blobs:
+                # identical output already stored, only referenced
+                insert = dict(self._blobs[digest])
+            else:
+                insert = self.__store(output)
+                if self._blobs is not None:
+                    self._blobs[digest] = dict(insert)
+                    self._block_digests.append(digest)
+            insert['hash'] = digest
 
         else:
             insert = {
@@ -119,50 +274,260 @@ class ResultFile:
                 'length': 0
             }
 
-        data['result']['output'] = insert
+        # keep how the output has been captured (size, truncation...)
+        data['result']['output'].update(insert)
 
         assert (id not in self._data.keys())
         self._data[id] = data
+        if self._block:
+            # journaled once the block is written
+            self._block_jobs.append((id, data))
+        else:
+            self._journal.write(json.dumps([id, data]) + "\n")
+            self._journal_cnt += 1
         self._cnt += 1
-        self._sz = max(start+length, self._sz + len(json.dumps(data)))
+        self._sz = max(self._rawout.tell() + len(self._block),
+                       self._sz + len(json.dumps(data)))
 
-        if self._cnt % 10 == 0:
+        if len(self._block) >= self.BLOCK_SIZE or \
+                (not self._block and self._cnt % 10 == 0):
             self.flush()
 
+    @classmethod
+    def load_metadata(cls, filepath, filename) -> dict:
+        """
+        Read job metadata stored on disk, the metadata file first, then
+        replaying the journal over it.
+
+        A partially written line (the run being interrupted while saving a
+        job) ends the replay. Jobs whose output lies beyond the end of the
+        job data file (not written before the run was interrupted) are kept,
+        without output.
+
+        :param filepath: path where files are located.
+        :type filepath: str
+        :param filename: prefix filename
+        :type filename: str
+        :return: job metadata, by job id
+        :rtype: dict
+        """
+        prefix = os.path.join(filepath, filename)
+        data = {}
+        if os.path.isfile("{}.json".format(prefix)):
+            with open("{}.json".format(prefix), "r") as fh:
+                data = json.load(fh)
+
+        if os.path.isfile("{}.jsonl".format(prefix)):
+            with open("{}.jsonl".format(prefix), "r") as fh:
+                for line in fh:
+                    try:
+                        id, elt = json.loads(line)
+                    except ValueError:
+                        break
+                    data[id] = elt
+
+        sizes = {}
+        for elt in data.values():
+            output = elt['result']['output']
+            filename = output.get('file')
+            if not filename or filename.endswith(".bz2") or output['offset'] < 0:
+                continue
+            if filename not in sizes:
+                # not found: read from elsewhere (see opener)
+                path = os.path.join(filepath, filename)
+                sizes[filename] = os.path.getsize(path) \
+                    if os.path.isfile(path) else None
+            if sizes[filename] is not None and \
+                    output['offset'] + output['length'] > sizes[filename]:
+                for k in ['hash', 'record_offset', 'record_length']:
+                    output.pop(k, None)
+                output.update({'file': "", 'offset': -1, 'length': 0})
+        return data
+
     def load(self):
         """
         Load job data from disk to populate the cache.
         """
-        with open(self._metadata_file, "r") as fh:
-            # when reading metdata_file,
-            # convert string-based keys to int (as managed by Python)
-            content = json.load(fh)
-            self._data = {k: v for k, v in content.items()}
+        self._data = self.load_metadata(self._path, self._fileprefix)
+        self._snapshot_cnt = len(self._data)
 
     @property
     def content(self):
         for name, data in self._data.items():
             elt = Test()
             elt.from_json(data)
-            
-            offset = data['result']['output']['offset']
-            length = data['result']['output']['length']
-            if offset >= 0 and length > 0:
-                elt.encoded_output = self.extract_output(offset, length)
+            elt.raw_output = self.read_output(data['result']['output'])
             yield elt
-    
-    def extract_output(self, offset, length) -> str:
+
+    def read_output(self, output) -> bytes:
+        """
+        Read a job output back, from its location as stored in job metadata.
+
+        :param output: the job output location ('file', 'offset'...)
+        :type output: dict
+        :raises BadMagicTokenError: data is corrupted
+        :return: the job output, empty if none
+        :rtype: bytes
+        """
+        if output['offset'] < 0:
+            return b""
+        if 'record_offset' in output:
+            return self.extract_output(output['offset'], output['length'],
+                                       output['file'],
+                                       output['record_offset'],
+                                       output['record_length'])
+        if output['length'] > 0:
+            return self.extract_output(output['offset'], output['length'],
+                                       output['file'])
+        return b""
+
+    def extract_output(self, offset, length, filename=None,
+                       record_offset=None, record_length=None) -> bytes:
+        """
+        Read a single job output back.
+
+        Without a record position, the whole frame is the output (one frame
+        per job, or a BZ2 stream as stored by previous versions), prefixed by
+        a magic token.
+
+        :param offset: where the block starts in the rawdata file
+        :type offset: int
+        :param length: the (stored) block length
+        :type length: int
+        :param filename: the rawdata file the output is stored to, as set in
+            job metadata, defaults to the current format
+        :type filename: str, optional
+        :param record_offset: where the output starts in the decompressed
+            block, defaults to None
+        :type record_offset: int, optional
+        :param record_length: the output length, defaults to None
+        :type record_length: int, optional
+        :raises BadMagicTokenError: data is corrupted
+        :return: the job output
+        :rtype: bytes
+        """
         assert(offset >= 0)
-        assert(length > 0)
-        
-        self._rawout_reader.seek(offset)
-        rawout = self._rawout_reader.read(length).decode('utf-8')
-                
-        if not rawout.startswith(self.MAGIC_TOKEN):
+
+        if filename and filename.endswith(".bz2"):
+            rawout = self.__read_legacy(offset, length)
+        elif record_offset is not None and self._block and \
+                filename in (None, self.rawdata_prefix) and \
+                offset == self._rawout.tell():
+            # not written yet
+            return bytes(self._block[record_offset:record_offset+record_length])
+        else:
+            rawout = self.__read_block(offset, length, filename)
+
+        if record_offset is not None:
+            return rawout[record_offset:record_offset+record_length]
+
+        token = self.BYTES_MAGIC_TOKEN.encode("utf-8")
+        if rawout.startswith(token):
+            return rawout[len(token):]
+
+        token = self.MAGIC_TOKEN.encode("utf-8")
+        if not rawout.startswith(token):
             raise PublisherException.BadMagicTokenError()
         
-        return rawout[len(self.MAGIC_TOKEN):]
-    
+        return base64.b64decode(rawout[len(token):])
+
+    def __read_block(self, offset, length, filename=None) -> bytes:
+        """
+        Read & decompress a single block (or frame) from a rawdata file.
+
+        The last block read is kept, as outputs are often read in the order
+        they were stored.
+
+        :param offset: where the block starts in the rawdata file
+        :type offset: int
+        :param length: the (stored) block length
+        :type length: int
+        :param filename: the rawdata file, defaults to the current one
+        :type filename: str, optional
+        :raises BadMagicTokenError: data is corrupted
+        :return: the decompressed block
+        :rtype: bytes
+        """
+        assert(length > 0)
+        key = (filename, offset)
+        if self._block_cache and self._block_cache[0] == key:
+            return self._block_cache[1]
+
+        reader = self._rawout_reader
+        if filename and filename != self.rawdata_prefix:
+            # deduplicated output, stored by another file
+            reader = self.__reader(filename)
+        elif self._rawout:
+            self._rawout.flush()
+        reader.seek(offset)
+        try:
+            rawout = zlib.decompress(reader.read(length))
+        except zlib.error:
+            raise PublisherException.BadMagicTokenError()
+        self._block_cache = (key, rawout)
+        return rawout
+
+    def __reader(self, filename):
+        """
+        Open a job data file from the same directory, for reading.
+
+        :param filename: the data file name
+        :type filename: str
+        :return: a binary file object
+        :rtype: file
+        """
+        if filename not in self._readers:
+            path = os.path.join(self._path, filename)
+            if self._opener and not os.path.isfile(path):
+                self._readers[filename] = self._opener(filename)
+            else:
+                self._readers[filename] = open(path, "rb")
+        return self._readers[filename]
+
+    def __read_legacy(self, offset, length) -> bytes:
+        """
+        Read a job output from a previous-version rawdata file (BZ2 stream).
+
+        Such a stream cannot be seeked efficiently: it is decompressed once
+        and kept in memory.
+
+        :param offset: where the output starts in the decompressed stream
+        :type offset: int
+        :param length: the output length
+        :type length: int
+        :return: the stored data (MAGIC_TOKEN included)
+        :rtype: bytes
+        """
+        if self._legacy_data is None:
+            src = self._legacy_file
+            if self._opener and not os.path.isfile(src):
+                src = self._opener(self.legacy_prefix)
+            with bz2.open(src, "rb") as fh:
+                self._legacy_data = fh.read()
+        return self._legacy_data[offset:offset+length]
+
+    def migrate(self):
+        """
+        Convert outputs stored by a previous version (BZ2 stream) to the
+        current format. The legacy file is removed once converted.
+        """
+        if not os.path.isfile(self._legacy_file):
+            return
+
+        for id, data in self._data.items():
+            output = data['result']['output']
+            if not output['file'].endswith(".bz2"):
+                continue
+            raw = self.extract_output(output['offset'], output['length'],
+                                      output['file'])
+            output.update(self.__store(raw))
+            self._block_jobs.append((id, data))
+            if len(self._block) >= self.BLOCK_SIZE:
+                self.__write_block()
+        self.compact()
+        os.remove(self._legacy_file)
+        self._legacy_data = None
+
     def retrieve_test(self, id=None, name=None) -> List[Test]:
         """
         Find jobs based on its id or name and return associated Test object.
@@ -193,20 +558,23 @@ class ResultFile:
 
         res = []
         for elt in lookup_table:
-            offset = elt['result']['output']['offset']
-            length = elt['result']['output']['length']
-            rawout = ""
-            if length > 0:
-                assert elt['result']['output']['file'] in self.rawdata_prefix
-                rawout = self.extract_output(offset, length)
-
             eltt = Test()
             eltt.from_json(elt)
-            eltt.encoded_output = rawout
+            eltt.raw_output = self.read_output(elt['result']['output'])
             res.append(eltt)
 
         return res
 
+    @property
+    def metadata(self):
+        """
+        Getter to job metadata
+
+        :return: job metadata, by job id
+        :rtype: dict
+        """
+        return self._data
+
     @property
     def size(self):
         """
@@ -253,19 +621,145 @@ class ResultFile:
         Getter to the actual rawdata file name
         
 
+        :return: file name
+        :rtype: str
+        """
+        return "{}.zlib".format(self._fileprefix)
+
+    @property
+    def legacy_prefix(self):
+        """
+        Getter to the rawdata file name used by previous versions (BZ2)
+
         :return: file name
         :rtype: str
         """
         return "{}.bz2".format(self._fileprefix)
 
 
+class JobIdSet:
+    """
+    A set of jobs from a run, stored as a sorted array of job ordinals (the
+    rank of each job when saved). Ordinals are mapped back to job ids through
+    a table shared by every set of a run.
+
+    Counting jobs (``len()``) and combining sets (``&``, ``|``, ``-``, for
+    instance failed jobs tagged 'MPI') only deal with ordinals, iterating
+    over a set yields job ids.
+
+    :ivar _table: job ids, by ordinal
+    :type _table: list
+    :ivar _ordinals: the (sorted) job ordinals
+    :type _ordinals: :class:`array`
+    """
+
+    def __init__(self, table, ordinals=()):
+        """
+        Build a new set.
+
+        :param table: job ids, by ordinal
+        :type table: list
+        :param ordinals: initial (sorted) job ordinals, defaults to none
+        :type ordinals: Iterable[int], optional
+        """
+        self._table = table
+        self._ordinals = array('I', ordinals)
+
+    @classmethod
+    def load(cls, table, data):
+        """
+        Build a set from its serialized form.
+
+        :param table: job ids, by ordinal
+        :type table: list
+        :param data: the set, as returned by :meth:`dump`
+        :type data: str
+        :return: the set
+        :rtype: :class:`JobIdSet`
+        """
+        res = cls(table)
+        res._ordinals.frombytes(base64.b64decode(data))
+        if sys.byteorder == "big":
+            res._ordinals.byteswap()
+        return res
+
+    def dump(self) -> str:
+        """
+        Serialize the set (as little-endian ordinals, base64-encoded).
+
+        :return: the serialized set
+        :rtype: str
+        """
+        ordinals = self._ordinals
+        if sys.byteorder == "big":
+            ordinals = array('I', ordinals)
+            ordinals.byteswap()
+        return base64.b64encode(ordinals.tobytes()).decode("ascii")
+
+    def add(self, ordinal) -> None:
+        """
+        Add a job to the set.
+
+        Jobs are expected to be added in increasing ordinal order (the order
+        ordinals are assigned), keeping the array sorted.
+
+        :param ordinal: the job ordinal
+        :type ordinal: int
+        """
+        self._ordinals.append(ordinal)
+
+    @property
+    def ordinals(self) -> array:
+        """
+        Getter to the job ordinals.
+
+        :return: the sorted ordinals
+        :rtype: :class:`array`
+        """
+        return self._ordinals
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        for ordinal in self._ordinals:
+            yield self._table[ordinal]
+
+    def __eq__(self, other):
+        if isinstance(other, JobIdSet) and other._table is self._table:
+            return self._ordinals == other._ordinals
+        return list(self) == list(other)
+
+    def __and__(self, other):
+        other_ordinals = set(other._ordinals)
+        return JobIdSet(self._table,
+                        (i for i in self._ordinals if i in other_ordinals))
+
+    def __or__(self, other):
+        return JobIdSet(self._table,
+                        sorted(set(self._ordinals).union(other._ordinals)))
+
+    def __sub__(self, other):
+        other_ordinals = set(other._ordinals)
+        return JobIdSet(self._table,
+                        (i for i in self._ordinals if i not in other_ordinals))
+
+
 class ResultFileManager:
     """
     Manages multiple class:`ResultFile`. Main purpose is to manage files to
     ensure files stored on disk remain consistent.
+
+    Maps & views are stored together in views.json (previous versions stored
+    maps in a separate maps.json, still read if found). Like job metadata,
+    updates are appended to a journal (index.jsonl) first, one line per saved
+    job, merged into this file by :meth:`compact`.
+
+    Jobs are given an ordinal when saved, views are made of class:`JobIdSet`.
     """
     increment = 0
     file_format = "jobs-{}"
+    journal_name = "index.jsonl"
 
     @classmethod
     def _ret_state_split_dict(cls):
@@ -286,19 +780,24 @@ class ResultFileManager:
         """
         Load existing results from prefix.
         """
-        l = list(
-            filter(lambda x: x.startswith('jobs-') and x.endswith(".json"),
-                   os.listdir(self._outdir)
-                   )
-        )
+        l = sorted(set(
+            os.path.splitext(x)[0] for x in os.listdir(self._outdir)
+            if x.startswith('jobs-') and x.endswith((".json", ".jsonl"))
+        ))
         if len(l) > 0:
             curfile = None
-            for f in list(map(lambda x: os.path.join(self._outdir, x), l)):
-                p = os.path.dirname(f)
-                f = os.path.splitext(os.path.basename(f))[0]
-                curfile = ResultFile(p, f)
-                curfile.load()
+            for f in l:
+                curfile = ResultFile(self._outdir, f, opener=self._opener,
+                                     blobs=self._blobs)
                 self._opened_files[f] = curfile
+                for data in curfile.metadata.values():
+                    output = data['result']['output']
+                    if 'hash' in output:
+                        self._blobs.setdefault(output['hash'], {
+                            k: v for k, v in output.items()
+                            if k in ['file', 'offset', 'length',
+                                     'record_offset', 'record_length']
+                        })
 
             self._current_file = curfile
 
@@ -324,25 +823,96 @@ class ResultFileManager:
     
     def reconstruct_view_data(self) -> None:
         for job in self.browse_tests():
-            state = str(job.state)
-            id = job.jid
-            self._viewdata['status'][state].append(id)
-            for tag in job.tags:
-                if tag not in self._viewdata['tags']:
-                    self.register_view_item(view='tags', item=tag)
-                self._viewdata['tags'][tag][state].append(id)
-
-            self.register_view_item('tree', job.label)
-            self._viewdata['tree'][job.label][state].append(id)
-            if job.subtree:
-                nodes = job.subtree.split('/')
-                nb_nodes = len(nodes)
-                for i in range(1, nb_nodes+1):
-                    name = "/".join([job.label] + nodes[:i])
-                    self.register_view_item('tree', name)
-                    self._viewdata['tree'][name][state].append(id)
-
-    def __init__(self, prefix=".", per_file_max_ent=0, per_file_max_sz=0) -> None:
+            self.__add_to_views(job.jid, str(job.state), self.view_items(job))
+
+    @classmethod
+    def view_items(cls, job) -> list:
+        """
+        List the view items a job belongs to, besides the status view.
+
+        :param job: the job
+        :type job: class:`Test`
+        :return: (view, item) pairs
+        :rtype: list
+        """
+        items = [['tags', tag] for tag in job.tags]
+        items.append(['tree', job.label])
+        if job.subtree:
+            nodes = job.subtree.split('/')
+            nb_nodes = len(nodes)
+            for i in range(1, nb_nodes+1):
+                items.append(['tree', "/".join([job.label] + nodes[:i])])
+        return items
+
+    def __new_view_item(self) -> dict:
+        """
+        initialize an empty view item, split by targeted statuses.
+
+        :return: per-status job sets
+        :rtype: dict
+        """
+        return {state: JobIdSet(self._jids)
+                for state in self._ret_state_split_dict().keys()}
+
+    def __load_views(self, content) -> dict:
+        """
+        Load views, as read from disk.
+
+        Views stored by previous versions (lists of job ids) are converted,
+        job ordinals following the order jobs were saved to result files.
+
+        :param content: views.json content, maps excluded
+        :type content: dict
+        :return: the views
+        :rtype: dict
+        """
+        if 'jids' in content:
+            self._jids.extend(content['jids'])
+
+            def convert(node):
+                if isinstance(node, dict):
+                    return {k: convert(v) for k, v in node.items()}
+                return JobIdSet.load(self._jids, node)
+
+            res = convert(content['views'])
+        else:
+            ordinals = {}
+            for jobs in self._mapdata.values():
+                for id in jobs:
+                    ordinals.setdefault(id, len(ordinals))
+
+            def convert(node):
+                if isinstance(node, dict):
+                    return {k: convert(v) for k, v in node.items()}
+                for id in node:
+                    ordinals.setdefault(id, len(ordinals))
+                return JobIdSet(self._jids, sorted(ordinals[id] for id in node))
+
+            res = convert(content)
+            self._jids.extend(sorted(ordinals, key=ordinals.get))
+
+        res.setdefault('status', self.__new_view_item())
+        return res
+
+    def __dump_views(self) -> dict:
+        """
+        Serialize views, to be stored on disk.
+
+        Maps are stored along, so that both are replaced at once.
+
+        :return: the serialized views, along with the ordinal table & maps
+        :rtype: dict
+        """
+        def convert(node):
+            if isinstance(node, dict):
+                return {k: convert(v) for k, v in node.items()}
+            return node.dump()
+
+        return {'jids': self._jids, 'views': convert(self._viewdata),
+                'maps': self._mapdata}
+
+    def __init__(self, prefix=".", per_file_max_ent=0, per_file_max_sz=0,
+                 opener=None, on_seal=None) -> None:
         """
         Initialize a new instance to manage results in a build directory.
 
@@ -353,9 +923,19 @@ class ResultFileManager:
         :type per_file_max_ent: int, optional
         :param per_file_max_sz: max size (bytes) for a single file, defaults to unlimited
         :type per_file_max_sz: int, optional
+        :param opener: function opening job data files not found in prefix
+            (see :class:`ResultFile`), defaults to None
+        :type opener: Callable, optional
+        :param on_seal: called with a result file once it is complete (a new
+            one being created), defaults to None
+        :type on_seal: Callable, optional
         """
         self._current_file = None
         self._outdir = prefix
+        self._opener = opener
+        self._on_seal = on_seal
+        self._blobs = {}
+        self._output_stats = {'total': 0, 'stored': 0}
         self._opened_files: Dict[ResultFile] = dict()
 
         map_filename = os.path.join(prefix, 'maps.json')
@@ -381,17 +961,24 @@ class ResultFileManager:
             else:
                 return default
 
-        self._mapdata = preload_if_exist(map_filename, {})
+        snapshot = preload_if_exist(view_filename, {})
+        self._mapdata = snapshot.pop('maps', None)
+        if self._mapdata is None:
+            self._mapdata = preload_if_exist(map_filename, {})
         self._mapdata_rev = {}
-        self._viewdata = preload_if_exist(view_filename, {
-            'status': self._ret_state_split_dict(),
-        })
+        self._jids = []
+        self._viewdata = self.__load_views(snapshot)
 
         self._max_entries = per_file_max_ent
         self._max_size = per_file_max_sz
 
         self.build_bidir_map_data()
-        
+        self._snapshot_cnt = len(self._mapdata_rev)
+        self._journal_cnt = 0
+        self._journal_file = os.path.join(prefix, self.journal_name)
+        self.replay_journal()
+        self._journal = open(self._journal_file, "a")
+
         self.discover_result_files()
         if not self._current_file:
             self.create_new_result_file()
@@ -424,29 +1011,78 @@ class ResultFileManager:
             self.create_new_result_file()
 
         # save info to file
-        self._current_file.save(id, job.to_json(), job.encoded_output)
+        nb_blobs = len(self._blobs)
+        self._current_file.save(id, job.to_json(raw_output=False),
+                                job.raw_output)
+        self._output_stats['total'] += len(job.raw_output)
+        if len(self._blobs) > nb_blobs:
+            self._output_stats['stored'] += len(job.raw_output)
 
-        # register this location from the map-id table
-        self._mapdata_rev[id] = self._current_file.prefix
-        assert self._current_file.prefix in self._mapdata
-        self._mapdata[self._current_file.prefix].append(id)
         # record this save as a FAILURE/SUCCESS statistic for multiple views
-        state = str(job.state)
-        self._viewdata['status'][state].append(id)
-        for tag in job.tags:
-            if tag not in self._viewdata['tags']:
-                self.register_view_item(view='tags', item=tag)
-            self._viewdata['tags'][tag][state].append(id)
-
-        self.register_view_item('tree', job.label)
-        self._viewdata['tree'][job.label][state].append(id)
-        if job.subtree:
-            nodes = job.subtree.split('/')
-            nb_nodes = len(nodes)
-            for i in range(1, nb_nodes+1):
-                name = "/".join([job.label] + nodes[:i])
-                self.register_view_item('tree', name)
-                self._viewdata['tree'][name][state].append(id)
+        entry = [id, self._current_file.prefix, str(job.state),
+                 self.view_items(job)]
+        self.__record(*entry)
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal_cnt += 1
+
+    def __record(self, id, fileprefix, state, items) -> None:
+        """
+        Register a saved job into maps & views.
+
+        :param id: job id
+        :type id: str
+        :param fileprefix: the result file the job is stored to
+        :type fileprefix: str
+        :param state: job state
+        :type state: str
+        :param items: (view, item) pairs the job belongs to, besides the
+            status view
+        :type items: list
+        """
+        # register this location from the map-id table
+        self._mapdata_rev[id] = fileprefix
+        self._mapdata.setdefault(fileprefix, list())
+        self._mapdata[fileprefix].append(id)
+        self.__add_to_views(id, state, items)
+
+    def __add_to_views(self, id, state, items) -> None:
+        """
+        Give a new job its ordinal & add it to views.
+
+        :param id: job id
+        :type id: str
+        :param state: job state
+        :type state: str
+        :param items: (view, item) pairs the job belongs to, besides the
+            status view
+        :type items: list
+        """
+        ordinal = len(self._jids)
+        self._jids.append(id)
+
+        self._viewdata['status'][state].add(ordinal)
+        for view, item in items:
+            self.register_view_item(view=view, item=item)
+            self._viewdata[view][item][state].add(ordinal)
+
+    def replay_journal(self) -> None:
+        """
+        Apply maps & views updates not merged yet into views.json.
+
+        Jobs already known are skipped, a partially written line (the run
+        being interrupted while saving a job) ends the replay.
+        """
+        if not os.path.isfile(self._journal_file):
+            return
+
+        with open(self._journal_file, "r") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry[0] not in self._mapdata_rev:
+                    self.__record(*entry)
 
     def retrieve_test(self, id) -> Optional[Test]:
         """
@@ -468,7 +1104,8 @@ class ResultFileManager:
         elif filename in self._opened_files:
             handler = self._opened_files[filename]
         else:
-            handler = ResultFile(self._outdir, filename)
+            handler = ResultFile(self._outdir, filename, opener=self._opener,
+                                 blobs=self._blobs)
             self._mapdata[filename] = handler
 
         res = handler.retrieve_test(id=id)
@@ -536,30 +1173,71 @@ class ResultFileManager:
         if view not in self._viewdata:
             self.register_view(view)
 
-        self._viewdata[view].setdefault(item, self._ret_state_split_dict())
+        if item not in self._viewdata[view]:
+            self._viewdata[view][item] = self.__new_view_item()
 
     def create_new_result_file(self) -> None:
         """
         Initialize a new result file handler upon request.
+
+        The current file is sealed: closed, then given to the `on_seal`
+        callback, if any.
         """
+        if self._current_file:
+            # outputs may be referenced from the new file
+            self._current_file.flush()
+        if self._current_file and self._on_seal:
+            self._current_file.close()
+            self._on_seal(self._current_file)
+
         filename = self.file_format.format(ResultFileManager.increment)
         ResultFileManager.increment += 1
-        self._current_file = ResultFile(self._outdir, filename)
+        self._current_file = ResultFile(self._outdir, filename,
+                                        opener=self._opener, blobs=self._blobs)
         self._opened_files[filename] = self._current_file
         self._mapdata.setdefault(self._current_file.prefix, list())
 
     def flush(self) -> None:
         """
         Ensure everything is in sync with persistent storage.
+
+        views.json is only rewritten once the journal holds as many jobs as it
+        does.
         """
         if self._current_file:
             self._current_file.flush()
 
-        with open(os.path.join(self._outdir, "maps.json"), "w") as fh:
-            json.dump(self._mapdata, fh)
+        self._journal.flush()
+        if self._journal_cnt >= max(ResultFile.COMPACT_MIN_ENTRIES,
+                                    self._snapshot_cnt):
+            self.compact()
+
+    def sync(self) -> None:
+        """
+        Flush & force written data to reach the storage device (fsync).
+        """
+        self.flush()
+        if self._current_file:
+            self._current_file.sync()
+        os.fsync(self._journal.fileno())
+
+    def compact(self) -> None:
+        """
+        Merge the journal into views.json.
+
+        Maps & views are replaced at once, the journal being truncated only
+        then: an interrupted compaction leaves the previous snapshot & the
+        whole journal to be replayed.
+        """
+        path = os.path.join(self._outdir, "views.json")
+        with open("{}.tmp".format(path), "w") as fh:
+            json.dump(self.__dump_views(), fh)
+        os.replace("{}.tmp".format(path), path)
 
-        with open(os.path.join(self._outdir, "views.json"), 'w') as fh:
-            json.dump(self._viewdata, fh)
+        self._journal.seek(0)
+        self._journal.truncate()
+        self._journal_cnt = 0
+        self._snapshot_cnt = len(self._mapdata_rev)
 
     @property
     def views(self):
@@ -591,6 +1269,17 @@ class ResultFileManager:
         """
         return len(self._mapdata_rev.keys())
 
+    @property
+    def output_stats(self):
+        """
+        Returns the amount of job output saved by this instance, and the
+        amount actually stored (identical outputs being stored once).
+
+        :return: sizes in bytes (before compression), keys: 'total', 'stored'
+        :rtype: dict
+        """
+        return dict(self._output_stats)
+
     def map_id(self, id):
         """
         Comnvert a job ID into its class:`Test` representation.
@@ -669,7 +1358,10 @@ class ResultFileManager:
         
         This instance should not be used again after this call.
         """
-        self.flush()
+        if self._journal.closed:
+            return
+        self.compact()
+        self._journal.close()
         if self._current_file:
             self._current_file.close()
 
@@ -677,45 +1369,722 @@ class ResultFileManager:
             f.close()
 
 
-class BuildDirectoryManager:
+class ResultDatabaseManager:
     """
-    This class is intended to serve a build directory from a single entry
-    point. Any module requiring to deal with resources from a run should be
-    compliant with this interface. It provides basic mechanism to load/save any
-    past, present or future executions.
+    Store results from a build directory into a single SQLite database,
+    exposing the same interface as class:`ResultFileManager`.
+
+    Jobs are indexed by id, name, label, subtree & state, views (tags, tree)
+    are stored as (view, item, job) rows, job outputs are kept compressed in
+    a dedicated table. Lookups are then indexed queries instead of scanning
+    every result file.
+    """
+    db_name = "results.db"
+    schema = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            jid TEXT PRIMARY KEY, fq_name TEXT, label TEXT, subtree TEXT,
+            state TEXT, metadata TEXT);
+        CREATE INDEX IF NOT EXISTS jobs_fq_name ON jobs (fq_name);
+        CREATE INDEX IF NOT EXISTS jobs_label ON jobs (label, subtree);
+        CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+        CREATE TABLE IF NOT EXISTS views (
+            view TEXT, item TEXT, jid TEXT);
+        CREATE INDEX IF NOT EXISTS views_item ON views (view, item);
+        CREATE INDEX IF NOT EXISTS views_jid ON views (jid);
+        CREATE TABLE IF NOT EXISTS outputs (
+            jid TEXT PRIMARY KEY, data BLOB);
     """
-    def __init__(self, build_dir="."):
-        """
-        Initialize a new instance.
-        
-        This is not destructive, it won't delete any existing resource created
-        from previous execution. It will mainly flag this directory as a valid
-        PCVS build directory.
 
-        :param build_dir: the build dir, defaults to "."
-        :type build_dir: str, optional
+    @classmethod
+    def exists(cls, prefix) -> bool:
         """
-        if not os.path.isdir(build_dir):
-            raise CommonException.NotFoundError(
-                reason="Invalid build directory, should exist *before* init.",
-                dbg_info={"build prefix": build_dir}
-            )
-
-        self._path = build_dir
-        self._extras = list()
-        self._results = None
-        self._config = None
-        self._scratch = os.path.join(build_dir, pcvs.NAME_BUILD_SCRATCH)
-        old_archive_dir = os.path.join(build_dir, pcvs.NAME_BUILD_ARCHIVE_DIR)
+        Check if results from the given directory are stored in a database.
 
-        open(os.path.join(self._path, pcvs.NAME_BUILDFILE), 'w').close()
+        :param prefix: result directory
+        :type prefix: str
+        :return: True if a database is found
+        :rtype: bool
+        """
+        return os.path.isfile(os.path.join(prefix, cls.db_name))
 
-        if not os.path.isdir(old_archive_dir):
-            os.makedirs(old_archive_dir)
+    def __init__(self, prefix=".") -> None:
+        """
+        Open (or create) the database of a result directory.
 
-    def init_results(self, per_file_max_sz=0):
+        :param prefix: result directory, defaults to "."
+        :type prefix: str, optional
         """
-        Initialize the result handler. 
+        self._outdir = prefix
+        # web reports may serve requests from multiple threads
+        self._db = sqlite3.connect(os.path.join(prefix, self.db_name),
+                                   check_same_thread=False)
+        self._db.executescript(self.schema)
+        self._output_stats = {'total': 0, 'stored': 0}
+
+    def save(self, job: Test):
+        """
+        Add a new job to be saved to the result directory.
+
+        Changes are committed to disk on :meth:`flush`.
+
+        :param job: the job element to store
+        :type job: class:`Test`
+        """
+        id = job.jid
+        if self._db.execute("SELECT 1 FROM jobs WHERE jid = ?",
+                            (id,)).fetchone():
+            raise PublisherException.AlreadyExistJobError(job.name)
+
+        data = job.to_json(raw_output=False)
+        data['result']['output'].update({'file': self.db_name, 'offset': -1,
+                                         'length': len(job.raw_output)})
+        state = str(job.state)
+        self._db.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+                         (id, job.name, job.label, job.subtree, state,
+                          json.dumps(data)))
+
+        items = [('tags', tag) for tag in job.tags]
+        items.append(('tree', job.label))
+        if job.subtree:
+            nodes = job.subtree.split('/')
+            for i in range(1, len(nodes)+1):
+                items.append(('tree', "/".join([job.label] + nodes[:i])))
+        self._db.executemany("INSERT INTO views VALUES (?, ?, ?)",
+                             [(view, item, id) for view, item in items])
+
+        if job.raw_output:
+            self._db.execute("INSERT INTO outputs VALUES (?, ?)",
+                             (id, zlib.compress(job.raw_output)))
+        self._output_stats['total'] += len(job.raw_output)
+        self._output_stats['stored'] += len(job.raw_output)
+
+    def __build_tests(self, rows) -> List[Test]:
+        """
+        Build Test objects from job rows.
+
+        :param rows: (jid, metadata) pairs
+        :type rows: Iterable
+        :return: the tests
+        :rtype: list
+        """
+        res = []
+        for id, metadata in rows:
+            job = Test()
+            job.from_json(json.loads(metadata))
+            data = self._db.execute("SELECT data FROM outputs WHERE jid = ?",
+                                    (id,)).fetchone()
+            if data:
+                job.raw_output = zlib.decompress(data[0])
+            res.append(job)
+        return res
+
+    def retrieve_test(self, id) -> Optional[Test]:
+        """
+        Build the Test object mapped to the given job id.
+
+        :param id: job id
+        :type id: str
+        :return: the test, None if not found
+        :rtype: class:`Test`
+        """
+        res = self.__build_tests(self._db.execute(
+            "SELECT jid, metadata FROM jobs WHERE jid = ?", (id,)))
+        return res[0] if res else None
+
+    def map_id(self, id):
+        """
+        Convert a job ID into its class:`Test` representation.
+
+        :param id: job id
+        :type id: str
+        :return: the associated Test object or None if not found
+        :rtype: class:`Test` or None
+        """
+        return self.retrieve_test(id)
+
+    def browse_metadata(self) -> Iterable[dict]:
+        """
+        Iterate over job metadata, without building Test objects (nor reading
+        job outputs).
+
+        :yield: job metadata, as exported by :meth:`Test.to_json`
+        :rtype: Iterator[dict]
+        """
+        for metadata, in self._db.execute("SELECT metadata FROM jobs"):
+            yield json.loads(metadata)
+
+    def browse_tests(self) -> Iterable[Test]:
+        """
+        Iterate over every job stored into this build directory.
+
+        :yield: Test
+        :rtype: Iterator[Test]
+        """
+        cursor = self._db.execute("SELECT jid, metadata FROM jobs")
+        for row in iter(cursor.fetchone, None):
+            yield self.__build_tests([row])[0]
+
+    def retrieve_tests_by_name(self, name) -> List[Test]:
+        """
+        Locate a test by its name.
+
+        Tests are looked up by their full name first, any test whose name
+        contains `name` is returned otherwise.
+
+        :param name: the test name
+        :type name: str
+        :return: the actual list of test, empty if no one is found
+        :rtype: list
+        """
+        res = self.__build_tests(self._db.execute(
+            "SELECT jid, metadata FROM jobs WHERE fq_name = ?", (name,)))
+        if not res:
+            res = self.__build_tests(self._db.execute(
+                "SELECT jid, metadata FROM jobs WHERE instr(fq_name, ?) > 0",
+                (name,)))
+        return res
+
+    def __build_view(self, view, item=None) -> dict:
+        """
+        Build a view (or a single item) from the database.
+
+        :param view: the view name
+        :type view: str
+        :param item: only this item, defaults to None
+        :type item: str, optional
+        :return: the per-item, per-status job ids
+        :rtype: dict
+        """
+        query = "SELECT v.item, j.state, j.jid FROM views v " \
+                "JOIN jobs j ON v.jid = j.jid WHERE v.view = ?"
+        args = (view,)
+        if item is not None:
+            query += " AND v.item = ?"
+            args += (item,)
+
+        res = {}
+        for item, state, id in self._db.execute(query, args):
+            res.setdefault(item, ResultFileManager._ret_state_split_dict())
+            res[item].setdefault(state, []).append(id)
+        return res
+
+    @property
+    def views(self):
+        """
+        Returns available views for the current instance.
+
+        :return: the views
+        :rtype: dict
+        """
+        return {'status': self.status_view,
+                'tags': self.tags_view,
+                'tree': self.tree_view}
+
+    @property
+    def status_view(self):
+        """
+        Returns the status view provided by PCVS.
+
+        :return: a view
+        :rtype: dict
+        """
+        res = ResultFileManager._ret_state_split_dict()
+        for state, id in self._db.execute("SELECT state, jid FROM jobs"):
+            res.setdefault(state, []).append(id)
+        return res
+
+    @property
+    def tags_view(self):
+        """
+        Get the tags view provided by PCVS.
+
+        :return: a view
+        :rtype: dict
+        """
+        res = {'compilation': ResultFileManager._ret_state_split_dict()}
+        res.update(self.__build_view('tags'))
+        return res
+
+    @property
+    def tree_view(self):
+        """
+        Get the tree view, provided by default.
+
+        :return: a view
+        :rtype: dict
+        """
+        return self.__build_view('tree')
+
+    def subtree_view(self, subtree):
+        """
+        Get a subset of the 'tree' view. Any LABEL/subtree combination is valid.
+
+        :param subtree: the prefix to look for
+        :type subtree: str
+        :return: the dict mapping tests to the request
+        :rtype: dict
+        """
+        return self.__build_view('tree', subtree).get(subtree, None)
+
+    @property
+    def total_cnt(self):
+        """
+        Returns the total number of jobs from that directory (=run).
+
+        :return: number of jobs
+        :rtype: int
+        """
+        return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    @property
+    def output_stats(self):
+        """
+        Returns the amount of job output saved by this instance, and the
+        amount actually stored (outputs are not deduplicated).
+
+        :return: sizes in bytes (before compression), keys: 'total', 'stored'
+        :rtype: dict
+        """
+        return dict(self._output_stats)
+
+    def flush(self) -> None:
+        """
+        Ensure everything is in sync with persistent storage.
+        """
+        self._db.commit()
+
+    def sync(self) -> None:
+        """
+        Flush & force written data to reach the storage device.
+
+        SQLite already syncs the database on commit.
+        """
+        self.flush()
+
+    def finalize(self):
+        """
+        Flush & close the current manager.
+
+        This instance should not be used again after this call.
+        """
+        if self._db is None:
+            return
+        self._db.commit()
+        self._db.close()
+        self._db = None
+
+
+class AsyncResultPublisher:
+    """
+    Offload result storage from the orchestrator to a dedicated writer thread.
+
+    Saved jobs are pushed to a bounded queue, consumed by batches by the writer
+    thread, running the wrapped manager (serialization, compression, file
+    writes). A full queue blocks :meth:`save` until the writer catches up
+    (backpressure), bounding the amount of pending results kept in memory.
+
+    Any other attribute is forwarded to the wrapped manager, once pending jobs
+    are written, so results can be browsed as with the manager itself.
+
+    :ivar _manager: the wrapped result manager
+    :type _manager: :class:`ResultFileManager` or
+        :class:`ResultDatabaseManager`
+    :ivar _fsync: when data are forced to disk: 'never', on each 'flush' or
+        after each 'batch'
+    :type _fsync: str
+    :ivar _error: first exception raised by the writer thread, if any
+    :type _error: Exception
+    """
+    FSYNC_POLICIES = ['never', 'flush', 'batch']
+    BATCH_SIZE = 64
+    _FLUSH = "flush"
+    _STOP = "stop"
+
+    def __init__(self, manager, queue_size=1024, fsync='never') -> None:
+        """
+        Start the writer thread.
+
+        :param manager: the result manager to write jobs to
+        :type manager: :class:`ResultFileManager` or
+            :class:`ResultDatabaseManager`
+        :param queue_size: max number of pending jobs, defaults to 1024
+        :type queue_size: int, optional
+        :param fsync: fsync policy, defaults to 'never'
+        :type fsync: str, optional
+        """
+        assert (fsync in self.FSYNC_POLICIES)
+        self._manager = manager
+        self._fsync = fsync
+        self._error = None
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._writer = threading.Thread(target=self.__write_loop,
+                                        name="pcvs-publisher", daemon=True)
+        self._writer.start()
+
+    def __write_loop(self) -> None:
+        """
+        Writer thread main loop, processing queued requests by batches.
+        """
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(block=False))
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is self._STOP:
+                    running = False
+                # after a failure, requests are only drained to not
+                # block producers
+                elif self._error is None:
+                    try:
+                        self.__process(item)
+                    except Exception as e:
+                        self._error = e
+
+            if self._fsync == 'batch' and self._error is None:
+                try:
+                    self._manager.sync()
+                except Exception as e:
+                    self._error = e
+
+            for _ in batch:
+                self._queue.task_done()
+
+    def __process(self, item) -> None:
+        """
+        Run a single request from the writer thread.
+
+        :param item: a job to save or a flush request
+        :type item: :class:`Test` or str
+        """
+        if item is self._FLUSH:
+            if self._fsync == 'flush':
+                self._manager.sync()
+            else:
+                self._manager.flush()
+        else:
+            self._manager.save(item)
+
+    def __check_error(self) -> None:
+        """
+        Report a failure from the writer thread to the caller.
+
+        :raises PublisherException.WriterError: the writer thread failed
+        """
+        if self._error is not None:
+            raise PublisherException.WriterError(
+                reason="Unable to store job results",
+                dbg_info={"error": repr(self._error)}) from self._error
+
+    def save(self, job: Test) -> None:
+        """
+        Queue a job to be saved, blocking while the queue is full.
+
+        :param job: the job element to store
+        :type job: class:`Test`
+        """
+        self.__check_error()
+        self._queue.put(job)
+
+    def flush(self) -> None:
+        """
+        Request queued jobs to be synced with persistent storage.
+
+        The request is processed by the writer thread in order, this call does
+        not wait for it, see :meth:`drain`.
+        """
+        self.__check_error()
+        self._queue.put(self._FLUSH)
+
+    def drain(self) -> None:
+        """
+        Wait for every queued request to be processed.
+        """
+        if self._writer.is_alive():
+            self._queue.join()
+        self.__check_error()
+
+    def finalize(self) -> None:
+        """
+        Write pending jobs, stop the writer thread & close the wrapped manager.
+
+        This instance should not be used again after this call.
+        """
+        if not self._writer.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._writer.join()
+        # jobs written so far are kept, even if the writer failed
+        if self._fsync != 'never' and self._error is None:
+            self._manager.sync()
+        self._manager.finalize()
+        self.__check_error()
+
+    @property
+    def manager(self):
+        """
+        Getter to the wrapped manager, pending jobs being written first.
+
+        :return: the result manager
+        :rtype: :class:`ResultFileManager` or :class:`ResultDatabaseManager`
+        """
+        self.drain()
+        return self._manager
+
+    def __getattr__(self, name):
+        # only reached for attributes not defined by this class
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.manager, name)
+
+
+class ArchiveMember:
+    """
+    Read-only, seekable file object over a member stored uncompressed into an
+    archive, reading directly from the archive file.
+    """
+
+    def __init__(self, path, offset, size) -> None:
+        """
+        Open a member.
+
+        :param path: the archive path
+        :type path: str
+        :param offset: where member data starts in the archive
+        :type offset: int
+        :param size: the member size
+        :type size: int
+        """
+        self._fh = open(path, "rb")
+        self._start = offset
+        self._size = size
+        self._pos = 0
+
+    def seek(self, offset, whence=os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size=-1) -> bytes:
+        remaining = max(0, self._size - self._pos)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        self._fh.seek(self._start + self._pos)
+        data = self._fh.read(size)
+        self._pos += len(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ArchiveReader:
+    """
+    Serve members of a build directory archive on demand, without extracting
+    it.
+
+    Archives are ZIP files, their central directory indexing the offset of
+    every member. Members already compressed by PCVS (job outputs) are stored
+    as-is (see :attr:`STORED_SUFFIXES`), so any job output can be read back
+    directly from the archive file.
+
+    :cvar STORED_SUFFIXES: members stored uncompressed
+    :type STORED_SUFFIXES: tuple
+    :ivar _members: archive members, by path relative to the build directory
+    :type _members: dict
+    """
+    STORED_SUFFIXES = (".zlib", ".bz2", ".gz")
+
+    def __init__(self, path) -> None:
+        """
+        Load the archive index.
+
+        :param path: the archive path
+        :type path: str
+        """
+        self._path = path
+        self._zip = zipfile.ZipFile(path, "r")
+        self._members = {}
+        self._root = None
+        self._offsets = {}
+        for info in self._zip.infolist():
+            root, _, relpath = info.filename.partition("/")
+            assert (self._root in [None, root])
+            self._root = root
+            if relpath and not info.is_dir():
+                self._members[relpath] = info
+
+    @property
+    def root(self) -> str:
+        """
+        Getter to the archive root directory (pcvsrun_<timestamp>)
+
+        :return: the directory name
+        :rtype: str
+        """
+        return self._root
+
+    @property
+    def members(self) -> List[str]:
+        """
+        List archive members
+
+        :return: member paths, relative to the build directory
+        :rtype: list
+        """
+        return list(self._members.keys())
+
+    def __data_offset(self, info) -> int:
+        """
+        Locate where member data start in the archive file.
+
+        :param info: the member
+        :type info: :class:`zipfile.ZipInfo`
+        :return: the offset
+        :rtype: int
+        """
+        if info.filename not in self._offsets:
+            with open(self._path, "rb") as fh:
+                fh.seek(info.header_offset)
+                header = fh.read(zipfile.sizeFileHeader)
+            name_len, extra_len = struct.unpack("<HH", header[26:30])
+            self._offsets[info.filename] = info.header_offset + \
+                zipfile.sizeFileHeader + name_len + extra_len
+        return self._offsets[info.filename]
+
+    def open(self, relpath):
+        """
+        Open a single member for reading.
+
+        :param relpath: member path, relative to the build directory
+        :type relpath: str
+        :raises FileNotFoundError: no such member
+        :return: a binary file object, seekable in constant time for members
+            stored uncompressed
+        :rtype: :class:`ArchiveMember` or :class:`zipfile.ZipExtFile`
+        """
+        if relpath not in self._members:
+            raise FileNotFoundError(relpath)
+        info = self._members[relpath]
+        if info.compress_type == zipfile.ZIP_STORED:
+            return ArchiveMember(self._path, self.__data_offset(info),
+                                 info.file_size)
+        return self._zip.open(info)
+
+    def opener(self, reldir):
+        """
+        Build a function opening members from a given directory.
+
+        :param reldir: directory path, relative to the build directory
+        :type reldir: str
+        :return: a function opening a member from its file name
+        :rtype: Callable
+        """
+        return lambda name: self.open("/".join([reldir, name]))
+
+    def extract(self, dest, lazy=True) -> str:
+        """
+        Extract archive members to a directory.
+
+        :param dest: the destination directory
+        :type dest: str
+        :param lazy: do not extract members which can be read on demand (job
+            outputs), defaults to True
+        :type lazy: bool, optional
+        :return: the extracted build directory
+        :rtype: str
+        """
+        os.makedirs(os.path.join(dest, self._root), exist_ok=True)
+        for relpath, info in self._members.items():
+            if lazy and relpath.startswith(pcvs.NAME_BUILD_RESDIR + "/") and \
+                    relpath.endswith(self.STORED_SUFFIXES):
+                continue
+            self._zip.extract(info, dest)
+        return os.path.join(dest, self._root)
+
+    def close(self) -> None:
+        """
+        Close the archive.
+        """
+        self._zip.close()
+
+
+class BuildDirectoryManager:
+    """
+    This class is intended to serve a build directory from a single entry
+    point. Any module requiring to deal with resources from a run should be
+    compliant with this interface. It provides basic mechanism to load/save any
+    past, present or future executions.
+
+    :cvar ARCHIVE_CODECS: available archive compressions
+    :type ARCHIVE_CODECS: dict
+    """
+    ARCHIVE_CODECS = {
+        'store': zipfile.ZIP_STORED,
+        'deflate': zipfile.ZIP_DEFLATED,
+        'bzip2': zipfile.ZIP_BZIP2,
+        'lzma': zipfile.ZIP_LZMA,
+    }
+    def __init__(self, build_dir="."):
+        """
+        Initialize a new instance.
+        
+        This is not destructive, it won't delete any existing resource created
+        from previous execution. It will mainly flag this directory as a valid
+        PCVS build directory.
+
+        :param build_dir: the build dir, defaults to "."
+        :type build_dir: str, optional
+        """
+        if not os.path.isdir(build_dir):
+            raise CommonException.NotFoundError(
+                reason="Invalid build directory, should exist *before* init.",
+                dbg_info={"build prefix": build_dir}
+            )
+
+        self._path = build_dir
+        self._extras = list()
+        self._results = None
+        self._archive = None
+        self._archive_file = None
+        self._archive_root = None
+        self._archive_codec = 'deflate'
+        self._archived = set()
+        self._config = None
+        self._scratch = os.path.join(build_dir, pcvs.NAME_BUILD_SCRATCH)
+        old_archive_dir = os.path.join(build_dir, pcvs.NAME_BUILD_ARCHIVE_DIR)
+
+        open(os.path.join(self._path, pcvs.NAME_BUILDFILE), 'w').close()
+
+        if not os.path.isdir(old_archive_dir):
+            os.makedirs(old_archive_dir)
+
+    def init_results(self, per_file_max_sz=0, backend=None, async_queue=0,
+                     fsync='never'):
+        """
+        Initialize the result handler. 
         
         This function is not called directly from the __init__ method as this
         isntance may be used for both reading & writing into the destination
@@ -723,13 +2092,41 @@ class BuildDirectoryManager:
 
         :param per_file_max_sz: max file size, defaults to unlimited
         :type per_file_max_sz: int, optional
+        :param backend: how results are stored ('files' or 'sqlite'), defaults
+            to the one used by existing results ('files' if none)
+        :type backend: str, optional
+        :param async_queue: if not zero, results are written by a background
+            thread, through a queue of this size, defaults to 0
+        :type async_queue: int, optional
+        :param fsync: when results are forced to disk ('never', 'flush' or
+            'batch'), defaults to 'never'
+        :type fsync: str, optional
         """
         resdir = os.path.join(self._path, pcvs.NAME_BUILD_RESDIR)
         if not os.path.exists(resdir):
             os.makedirs(resdir)
 
-        self._results = ResultFileManager(prefix=resdir,
-                                          per_file_max_sz=per_file_max_sz)
+        if backend is None:
+            backend = "sqlite" if ResultDatabaseManager.exists(resdir) \
+                else "files"
+
+        opener = None
+        if self._archive:
+            opener = self._archive.opener(pcvs.NAME_BUILD_RESDIR)
+
+        if backend == "sqlite":
+            self._results = ResultDatabaseManager(prefix=resdir)
+        else:
+            on_seal = self.__archive_sealed_file if self._archive_file \
+                else None
+            self._results = ResultFileManager(prefix=resdir,
+                                              per_file_max_sz=per_file_max_sz,
+                                              opener=opener, on_seal=on_seal)
+
+        if async_queue:
+            self._results = AsyncResultPublisher(self._results,
+                                                 queue_size=async_queue,
+                                                 fsync=fsync)
 
     @property
     def results(self):
@@ -737,7 +2134,8 @@ class BuildDirectoryManager:
         Getter to the result handler, for direct access
 
         :return: the result handler
-        :rtype: class:`ResultFileManager`
+        :rtype: class:`ResultFileManager`, class:`ResultDatabaseManager` or
+            class:`AsyncResultPublisher`
         """
         return self._results
 
@@ -932,14 +2330,95 @@ class BuildDirectoryManager:
                 shutil.move(current,
                             os.path.join(self._path, pcvs.NAME_BUILD_ARCHIVE_DIR, f))
 
-    def create_archive(self, timestamp=None) -> str:
+    def start_archive(self, timestamp=None, codec='deflate') -> str:
+        """
+        Create the archive before the run, result files being appended to it
+        as soon as they are sealed (see :meth:`ResultFileManager.create_new_result_file`).
+
+        :meth:`create_archive` then only adds the remaining files. This should
+        be called before :meth:`init_results`.
+
+        :param timestamp: file suffix, defaults to current timestamp
+        :type timestamp: Datetime, optional
+        :param codec: compression for members not already compressed, defaults
+            to 'deflate' (see :attr:`ARCHIVE_CODECS`)
+        :type codec: str, optional
+        :return: the archive path name
+        :rtype: str
+        """
+        if not timestamp:
+            timestamp = datetime.datetime.now()
+        self._archive_root = "pcvsrun_{}".format(
+            timestamp.strftime('%Y%m%d%H%M%S'))
+        self._archive_file = os.path.join(
+            self._path, "{}.zip".format(self._archive_root))
+        self._archive_codec = codec
+        zipfile.ZipFile(self._archive_file, mode='w').close()
+        return self._archive_file
+
+    def __archive_add(self, archive, path, recursive=False) -> None:
+        """
+        Add a file or a directory (recursively if requested) to the archive.
+
+        Files already archived are skipped.
+
+        :param archive: the opened archive
+        :type archive: :class:`zipfile.ZipFile`
+        :param path: the file to add
+        :type path: str
+        :param recursive: add directory content as well, defaults to False
+        :type recursive: bool, optional
+        """
+        arcname = os.path.join(self._archive_root,
+                               os.path.relpath(path, self._path))
+        if os.path.isdir(path):
+            if arcname not in self._archived:
+                archive.write(path, arcname=arcname)
+                self._archived.add(arcname)
+            if recursive:
+                for f in sorted(os.listdir(path)):
+                    self.__archive_add(archive, os.path.join(path, f),
+                                       recursive)
+            return
+
+        if arcname in self._archived:
+            return
+        # job outputs are already compressed, keep them seekable
+        compression = self.ARCHIVE_CODECS[self._archive_codec]
+        if path.endswith(ArchiveReader.STORED_SUFFIXES):
+            compression = zipfile.ZIP_STORED
+        archive.write(path, arcname=arcname, compress_type=compression)
+        self._archived.add(arcname)
+
+    def __archive_sealed_file(self, result_file) -> None:
+        """
+        Append a sealed result file to the archive (see :meth:`start_archive`).
+
+        :param result_file: the sealed file, not to be written anymore
+        :type result_file: :class:`ResultFile`
+        """
+        resdir = os.path.join(self._path, pcvs.NAME_BUILD_RESDIR)
+        with zipfile.ZipFile(self._archive_file, mode='a',
+                             allowZip64=True) as archive:
+            for name in [result_file.metadata_prefix,
+                         result_file.rawdata_prefix]:
+                path = os.path.join(resdir, name)
+                if os.path.isfile(path):
+                    self.__archive_add(archive, path)
+
+    def create_archive(self, timestamp=None, codec=None) -> str:
         """
         Generate an archive for the build directory.
         
-        This archive will be stored in the root directory..
+        This archive will be stored in the root directory. If the archive has
+        been started before the run (see :meth:`start_archive`), the
+        remaining files are appended to it.
 
         :param timestamp: file suffix, defaults to current timestamp
         :type timestamp: Datetime, optional
+        :param codec: compression for members not already compressed, defaults
+            to 'deflate' (see :attr:`ARCHIVE_CODECS`)
+        :type codec: str, optional
         :return: the archive path name
         :rtype: str
         """
@@ -947,33 +2426,31 @@ class BuildDirectoryManager:
         #ensure all results are flushed away before creating the archive
         self.results.finalize()
         
-        if not timestamp:
-            timestamp = datetime.datetime.now()
-        str_timestamp = timestamp.strftime('%Y%m%d%H%M%S')
-        archive_file = os.path.join(
-            self._path,
-            "pcvsrun_{}.tar.gz".format(str_timestamp)
-        )
-        archive = tarfile.open(archive_file, mode='w:gz')
-
-        def __relative_add(path, recursive=False):
-            archive.add(path,
-                        arcname=os.path.join("pcvsrun_{}".format(str_timestamp),
-                                             os.path.relpath(path, self._path)),
-                        recursive=recursive)
+        if self._archive_file:
+            archive = zipfile.ZipFile(self._archive_file, mode='a',
+                                      allowZip64=True)
+        else:
+            self.start_archive(timestamp, codec or 'deflate')
+            archive = zipfile.ZipFile(self._archive_file, mode='w',
+                                      allowZip64=True)
+        if codec:
+            self._archive_codec = codec
 
         # copy results
-        __relative_add(os.path.join(self._path, pcvs.NAME_BUILD_RESDIR),
-                    recursive=True)
+        self.__archive_add(archive,
+                           os.path.join(self._path, pcvs.NAME_BUILD_RESDIR),
+                           recursive=True)
         # copy the config
-        __relative_add(os.path.join(self._path, pcvs.NAME_BUILD_CONF_FN))
-        __relative_add(os.path.join(self._path, pcvs.NAME_DEBUG_FILE))
+        self.__archive_add(archive,
+                           os.path.join(self._path, pcvs.NAME_BUILD_CONF_FN))
+        self.__archive_add(archive,
+                           os.path.join(self._path, pcvs.NAME_DEBUG_FILE))
 
         not_found_files = list()
         for p in self._extras:
             if not os.path.exists(p):
                 not_found_files.append(p)
-            __relative_add(p)
+            self.__archive_add(archive, p)
             
         if len(not_found_files) > 0:
             raise CommonException.NotFoundError(
@@ -982,7 +2459,7 @@ class BuildDirectoryManager:
                 )
 
         archive.close()
-        return archive_file
+        return self._archive_file
 
     @classmethod
     def load_from_archive(cls, archive_path):
@@ -992,18 +2469,29 @@ class BuildDirectoryManager:
         This object is initially built to load data from a build directory. This
         way, the object is mapped with an existing archive.
         
+        Job outputs from ZIP archives are not extracted, they are read from
+        the archive on demand (see :class:`ArchiveReader`). Archives from
+        previous versions (tar.gz) are fully extracted.
+
         .. warning::
             This method does not support (yet) to save tests after an archive has
             been loaded (as no output directory has been configured).
 
-        :param archive_path: _description_
-        :type archive_path: _type_
-        :return: _description_
-        :rtype: _type_
+        :param archive_path: the archive path
+        :type archive_path: str
+        :return: the handler, over a temporary directory
+        :rtype: :class:`BuildDirectoryManager`
         """
-        archive = tarfile.open(archive_path, mode="r:gz")
-        
         path = tempfile.mkdtemp(prefix="pcvs-archive")
+
+        if zipfile.is_zipfile(archive_path):
+            reader = ArchiveReader(archive_path)
+            hdl = BuildDirectoryManager(build_dir=reader.extract(path))
+            hdl._archive = reader
+            hdl.load_config()
+            return hdl
+
+        archive = tarfile.open(archive_path, mode="r:gz")
         archive.extractall(path)
         archive.close()
         
@@ -1020,6 +2508,8 @@ class BuildDirectoryManager:
         It should not be used to save tests after this call.
         """
         self.results.finalize()
+        if self._archive:
+            self._archive.close()
 
     @property
     def scratch_location(self):
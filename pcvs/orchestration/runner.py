@@ -1,5 +1,9 @@
+import asyncio
+import functools
+import select
 import subprocess
 import queue
+import tempfile
 import time
 import os
 import signal
@@ -7,7 +11,9 @@ import threading
 import json
 
 import pcvs
+from pcvs.testing.capture import OutputCapture
 from pcvs.testing.test import Test
+from pcvs.testing.testfile import TestFile
 from pcvs import io
 from pcvs.helpers.exceptions import RunnerException
 from pcvs.orchestration.publishers import BuildDirectoryManager
@@ -16,28 +22,34 @@ from pcvs.helpers.system import MetaConfig
 
 
 class RunnerAdapter(threading.Thread):
+    """Worker thread, executing Sets pulled from the ready queue.
+
+    A runner sleeps on its ready queue and is only woken up when a Set is
+    pushed to it. It stops when receiving the ``None`` sentinel (one per
+    runner) or once the scheduling has been globally stopped.
+
+    :cvar sched_in_progress: False once runners are requested to stop.
+    :type sched_in_progress: bool
+    """
     sched_in_progress = True
+
     def __init__(self, buildir, context=None, ready=None, complete=None, *args, **kwargs):
         self._prefix = buildir
         self._ctx = context
         self._rq = ready
         self._cq = complete
-        
-        super().__init__()
+
+        # daemon: a runner blocked on its queue won't prevent an interrupted
+        # PCVS from exiting
+        super().__init__(daemon=True)
 
     def run(self):
         while True:
-            try:
-                if self.sched_in_progress:
-                    item = self._rq.get(block=False, timeout=5)
-                    self.execute_set(item)
-                    self._cq.put(item)
-                else:
-                    break
-            except queue.Empty:
-                continue
-            except Exception as e:
-                raise e
+            item = self._rq.get()
+            if item is None or not self.sched_in_progress:
+                break
+            self.execute_set(item)
+            self._cq.put(item)
 
     def execute_set(self, set):
         if set.execmode == Set.ExecMode.LOCAL:
@@ -51,36 +63,60 @@ class RunnerAdapter(threading.Thread):
         :raises Exception: Something occured while running a test"""
         io.console.debug('{}: [LOCAL] Set start'.format(self.ident))
         for job in set.content:
-            try:
-                p = subprocess.Popen('{}'.format(job.invocation_command),
-                                     shell=True,
-                                     stderr=subprocess.STDOUT,
-                                     stdout=subprocess.PIPE,
-                                     start_new_session=True)
-                start = time.time()
-                stdout, _ = p.communicate(timeout=job.timeout)
-                final = time.time() - start
-                
-                # Note: The return code here is coming from the script,
-                # not the test itself. It is transitively transmitted once the
-                # test complete, except if test used matchers to validate.
-                # in that case, a non-zero exit code indicates at least one
-                # matcher failed.
-                # The the engine, no other checks than return code evaluation
-                # is necessary to assess test status.
-                rc = p.returncode
-
-            except subprocess.TimeoutExpired:
-                os.killpg(os.getpgid(p.pid), signal.SIGTERM)
-                stdout, _ = p.communicate()
-                rc = Test.Timeout_RC  # nah, to be changed
-                final = job.timeout
-            except Exception:
-                raise
+            capture = new_capture(job, self._prefix)
+            rc, final, stdout = self.run_job(job, capture)
             job.save_raw_run(time=final, rc=rc, out=stdout)
+            job.save_capture(capture)
             job.save_status(Test.State.EXECUTED)
         set.complete = True
 
+    def run_job(self, job, capture=None):
+        """Run a single job in a new process & wait for its completion.
+
+        :param job: the job to run
+        :type job: :class:`Test`
+        :param capture: where the output is read to, defaults to None (the
+            whole output is kept)
+        :type capture: :class:`OutputCapture`, optional
+        :return: the exit code, the duration & the job output
+        :rtype: tuple
+        """
+        try:
+            launch_args = process_args(job)
+        except RunnerException.LaunchError as e:
+            return 1, 0.0, str(e).encode('utf-8')
+
+        if capture is None:
+            capture = OutputCapture()
+        try:
+            p = subprocess.Popen(**launch_args,
+                                 stderr=subprocess.STDOUT,
+                                 stdout=subprocess.PIPE,
+                                 start_new_session=True)
+            start = time.time()
+            read_output(p, capture, timeout=job.timeout)
+            final = time.time() - start
+
+            # Note: The return code here is coming from the script,
+            # not the test itself. It is transitively transmitted once the
+            # test complete, except if test used matchers to validate.
+            # in that case, a non-zero exit code indicates at least one
+            # matcher failed.
+            # The the engine, no other checks than return code evaluation
+            # is necessary to assess test status.
+            rc = p.returncode
+
+        except subprocess.TimeoutExpired:
+            os.killpg(os.getpgid(p.pid), signal.SIGTERM)
+            read_output(p, capture)
+            rc = Test.Timeout_RC  # nah, to be changed
+            final = job.timeout
+        except OSError as e:
+            # direct exec: the program cannot be started
+            return 127, 0.0, str(e).encode('utf-8')
+        capture.close()
+        return rc, final, capture.output
+
     def remote_exec(self, set: Set) -> None:
         jobman_cfg = {}
         if set.execmode == Set.ExecMode.ALLOC:
@@ -127,18 +163,498 @@ class RunnerAdapter(threading.Thread):
                 dbg_info={'cmd': cmd})
 
 
+def new_capture(job, prefix):
+    """Build the capture receiving a job output, as configured by
+    ``validation.result.output_cap`` (KiB kept at both ends, 0 for no limit) &
+    ``validation.result.output_spill``.
+
+    :param job: the job to run
+    :type job: :class:`Test`
+    :param prefix: the build directory, where side files are stored
+    :type prefix: str
+    :return: the capture
+    :rtype: :class:`OutputCapture`
+    """
+    config = MetaConfig.root.validation.result
+    limit = int(config.get('output_cap', 0) or 0) * 1024
+    if not limit:
+        return OutputCapture()
+
+    spill = None
+    if config.get('output_spill', False) is True:
+        spill = os.path.join(os.path.abspath(prefix), pcvs.NAME_BUILD_RESDIR,
+                             "spill", "{}.gz".format(job.jid))
+    return OutputCapture(limit=limit, spill=spill,
+                         scanner=job.output_scanner())
+
+
+def read_output(p, capture, timeout=None):
+    """Read a process output (chunk by chunk) & wait for its completion.
+
+    :raises TimeoutExpired: the process did not complete in time, it may be
+        killed & its output read again.
+    :param p: the process, its output being piped
+    :type p: :class:`subprocess.Popen`
+    :param capture: where the output is read to
+    :type capture: :class:`OutputCapture`
+    :param timeout: max duration (in seconds), defaults to None (no limit)
+    :type timeout: float, optional
+    """
+    deadline = time.time() + timeout if timeout else None
+    fd = p.stdout.fileno()
+    while True:
+        remaining = None if deadline is None else deadline - time.time()
+        if remaining is not None and remaining <= 0:
+            raise subprocess.TimeoutExpired(p.args, timeout)
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            continue
+        data = os.read(fd, OutputCapture.CHUNK_SIZE)
+        if not data:
+            break
+        capture.feed(data)
+    remaining = None if deadline is None else max(0, deadline - time.time())
+    p.wait(timeout=remaining)
+
+
+@functools.lru_cache(maxsize=None)
+def environment_snapshot(code):
+    """Capture the environment resulting from a piece of shell code.
+
+    This is meant to load package-manager deps (module, spack...) once for
+    all jobs requesting them. Snapshots are cached by code.
+
+    :raises LaunchError: the code failed
+    :param code: the shell code to evaluate
+    :type code: str
+    :return: the resulting environment
+    :rtype: dict
+    """
+    if not code.strip():
+        return dict(os.environ)
+    res = subprocess.run(
+        ["bash", "-c", 'eval "$1" > /dev/null 2>&1 || exit $?; env -0',
+         "pcvs-env", code],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if res.returncode != 0:
+        raise RunnerException.LaunchError(
+            reason="Unable to load the job environment",
+            dbg_info={'rc': res.returncode, 'code': code})
+    env = {}
+    for entry in res.stdout.split(b"\0"):
+        if b"=" in entry:
+            k, v = entry.split(b"=", 1)
+            env[k.decode('utf-8')] = v.decode('utf-8')
+    return env
+
+
+def process_args(job):
+    """Build the arguments to start a job process (see :class:`Popen`).
+
+    Jobs flagged as direct are launched from their argv, without any shell.
+    Their environment is built from a snapshot (the profile & job
+    package-manager deps being loaded) on top of which TE variables are
+    set. Other jobs (or any job during a dry-run) go through their test
+    script.
+
+    :raises LaunchError: the environment cannot be loaded
+    :param job: the job to start
+    :type job: :class:`Test`
+    :return: keyword arguments: args, shell, env, cwd
+    :rtype: dict
+    """
+    if not job.direct_exec or MetaConfig.root.validation.simulated is True:
+        return {'args': '{}'.format(job.invocation_command), 'shell': True,
+                'env': None, 'cwd': None}
+
+    env = dict(environment_snapshot("\n".join(
+        [TestFile.profile_pm_string(), job.pm_load_code])))
+    env.update(job.environment)
+    return {'args': job.argv, 'shell': False, 'env': env, 'cwd': job.cwd}
+
+
+class AsyncRunnerAdapter(RunnerAdapter):
+    """Worker thread multiplexing many Sets through a single event loop.
+
+    Unlike :class:`RunnerAdapter`, processing one Set at a time, up to
+    ``concurrency`` Sets are run at once, job processes being watched by an
+    asyncio event loop. Timeouts are handled by the loop as well, no thread
+    is blocked waiting for a process. Non-local Sets are still processed by
+    the blocking :meth:`remote_exec`, offloaded to a thread pool.
+
+    :ivar _concurrency: max number of Sets processed at the same time
+    :type _concurrency: int
+    """
+
+    def __init__(self, buildir, context=None, ready=None, complete=None,
+                 concurrency=1, *args, **kwargs):
+        super().__init__(buildir, context=context, ready=ready,
+                         complete=complete, *args, **kwargs)
+        self._concurrency = max(1, concurrency)
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        """Pull Sets from the ready queue & process them concurrently.
+
+        A new Set is only pulled once a slot is available. The ``None``
+        sentinel is only expected once every pushed Set completed.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self._concurrency)
+        tasks = set()
+        # the blocking ready queue is drained by a daemon thread, so a runner
+        # waiting for Sets won't prevent an interrupted PCVS from exiting
+        items = asyncio.Queue()
+
+        def forward():
+            while True:
+                item = self._rq.get()
+                loop.call_soon_threadsafe(items.put_nowait, item)
+                if item is None:
+                    break
+
+        threading.Thread(target=forward, daemon=True).start()
+        while True:
+            await slots.acquire()
+            item = await items.get()
+            if item is None or not self.sched_in_progress:
+                break
+            task = loop.create_task(self.process_set(item, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def process_set(self, set, slots):
+        """Execute a single Set and notify its completion.
+
+        The Set is always given back: if its execution fails, jobs not run
+        yet are flagged as executed, the error being their output.
+
+        :param set: the Set to run
+        :type set: :class:`Set`
+        :param slots: the semaphore bounding the number of running Sets
+        :type slots: :class:`asyncio.Semaphore`
+        """
+        try:
+            if set.execmode == Set.ExecMode.LOCAL:
+                await self.async_local_exec(set)
+            else:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.remote_exec, set)
+        except Exception as e:
+            io.console.warn("{}: Set #{} failed: {}".format(
+                self.ident, set.id, e))
+            for job in set.content:
+                if not job.been_executed():
+                    job.save_raw_run(time=0.0, rc=1,
+                                     out=str(e).encode('utf-8'))
+                    job.save_status(Test.State.EXECUTED)
+        finally:
+            slots.release()
+            self._cq.put(set)
+
+    async def async_local_exec(self, set) -> None:
+        """Execute the Set and jobs within it, without blocking the loop.
+
+        :raises Exception: Something occured while running a test"""
+        io.console.debug('{}: [ASYNC] Set start'.format(self.ident))
+        loop = asyncio.get_running_loop()
+        for job in set.content:
+            try:
+                # loading the job environment blocks (see environment_snapshot)
+                launch_args = await loop.run_in_executor(None, process_args,
+                                                         job)
+                if launch_args['shell']:
+                    p = await asyncio.create_subprocess_shell(
+                        launch_args['args'],
+                        stderr=asyncio.subprocess.STDOUT,
+                        stdout=asyncio.subprocess.PIPE,
+                        start_new_session=True)
+                else:
+                    p = await asyncio.create_subprocess_exec(
+                        *launch_args['args'],
+                        env=launch_args['env'],
+                        cwd=launch_args['cwd'],
+                        stderr=asyncio.subprocess.STDOUT,
+                        stdout=asyncio.subprocess.PIPE,
+                        start_new_session=True)
+            except (RunnerException.LaunchError, OSError) as e:
+                job.save_raw_run(time=0.0, rc=127, out=str(e).encode('utf-8'))
+                job.save_status(Test.State.EXECUTED)
+                continue
+            capture = new_capture(job, self._prefix)
+            start = time.time()
+            # output is read in the background, so it is kept if killed
+            comm = asyncio.ensure_future(self.async_read_output(p, capture))
+            done, _ = await asyncio.wait({comm}, timeout=job.timeout)
+            if comm in done:
+                comm.result()
+                final = time.time() - start
+                # see RunnerAdapter.local_exec() about the return code
+                rc = p.returncode
+            else:
+                os.killpg(os.getpgid(p.pid), signal.SIGTERM)
+                await comm
+                rc = Test.Timeout_RC
+                final = job.timeout
+            capture.close()
+            job.save_raw_run(time=final, rc=rc, out=capture.output)
+            job.save_capture(capture)
+            job.save_status(Test.State.EXECUTED)
+        set.complete = True
+
+    @classmethod
+    async def async_read_output(cls, p, capture) -> None:
+        """Read a process output (chunk by chunk) & wait for its completion.
+
+        :param p: the process, its output being piped
+        :type p: :class:`asyncio.subprocess.Process`
+        :param capture: where the output is read to
+        :type capture: :class:`OutputCapture`
+        """
+        while True:
+            data = await p.stdout.read(OutputCapture.CHUNK_SIZE)
+            if not data:
+                break
+            capture.feed(data)
+        await p.wait()
+
+
+class ShellWorker:
+    """Long-lived shell process running tests on demand.
+
+    The worker loads the profile's package-manager environment once, then
+    reads test scripts (NUL-terminated) from its standard input. Each test is
+    run in a background subshell (its own process group, so it can be
+    killed), its output being stored to a file owned by the worker. For each
+    test, the subshell pid then its exit code are written back, one per line.
+
+    :cvar SCRIPT: the worker main loop
+    :type SCRIPT: str
+    :ivar _init: shell code run once at worker startup
+    :type _init: str
+    :ivar _outfile: path to the file storing the output of the last test
+    :type _outfile: str
+    :ivar _proc: the worker process, None if not started
+    :type _proc: :class:`subprocess.Popen`
+    """
+    SCRIPT = """set -m
+eval "$PCVS_WORKER_INIT" > /dev/null 2>&1
+while IFS= read -r -d '' pcvs_job; do
+    ( eval "$pcvs_job" ) < /dev/null > "$PCVS_WORKER_OUT" 2>&1 &
+    pcvs_pid=$!
+    echo "$pcvs_pid"
+    wait "$pcvs_pid"
+    echo "$?"
+done
+"""
+
+    def __init__(self, init_code="", outdir=None):
+        """Constructor method.
+
+        :param init_code: shell code to run once, defaults to ""
+        :type init_code: str, optional
+        :param outdir: where to store test outputs, defaults to None (system
+            temporary directory)
+        :type outdir: str, optional
+        """
+        self._init = init_code
+        self._proc = None
+        self._buf = b""
+        fd, self._outfile = tempfile.mkstemp(prefix="pcvs-worker-",
+                                             suffix=".out", dir=outdir)
+        os.close(fd)
+
+    @property
+    def alive(self):
+        """Check if the worker process is running.
+
+        :return: True if running
+        :rtype: bool
+        """
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        """Start (or restart) the worker process."""
+        env = os.environ.copy()
+        env['PCVS_WORKER_INIT'] = self._init
+        env['PCVS_WORKER_OUT'] = self._outfile
+        self._buf = b""
+        self._proc = subprocess.Popen(["bash", "-c", self.SCRIPT], env=env,
+                                      stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE,
+                                      # job control notifications
+                                      stderr=subprocess.DEVNULL,
+                                      start_new_session=True)
+
+    def stop(self):
+        """Stop the worker process & clean up its output file."""
+        if self.alive:
+            self._proc.stdin.close()
+            self._proc.wait()
+        self._proc = None
+        if os.path.exists(self._outfile):
+            os.remove(self._outfile)
+
+    def __readline(self, timeout=None):
+        """Read a single line written by the worker.
+
+        :raises LaunchError: the worker exited
+        :param timeout: max delay (in seconds), defaults to None (no limit)
+        :type timeout: float, optional
+        :return: the line, None if the timeout expired
+        :rtype: str
+        """
+        deadline = time.time() + timeout if timeout else None
+        fd = self._proc.stdout.fileno()
+        while b"\n" not in self._buf:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            data = os.read(fd, 4096)
+            if not data:
+                raise RunnerException.LaunchError(
+                    reason="Shell worker exited unexpectedly",
+                    dbg_info={'rc': self._proc.wait()})
+            self._buf += data
+        line, self._buf = self._buf.split(b"\n", 1)
+        return line.decode('utf-8')
+
+    def run(self, script, timeout=None, capture=None):
+        """Run a single test through the worker.
+
+        :param script: the shell code running the test
+        :type script: str
+        :param timeout: max duration (in seconds), defaults to None
+        :type timeout: float, optional
+        :param capture: where the output is read to, defaults to None (the
+            whole output is kept)
+        :type capture: :class:`OutputCapture`, optional
+        :return: the exit code, the duration & the test output
+        :rtype: tuple
+        """
+        if not self.alive:
+            self.start()
+        start = time.time()
+        self._proc.stdin.write(script.encode('utf-8') + b"\0")
+        self._proc.stdin.flush()
+        pid = int(self.__readline())
+
+        line = self.__readline(timeout)
+        if line is None:
+            os.killpg(pid, signal.SIGTERM)
+            self.__readline()
+            rc = Test.Timeout_RC
+            final = timeout
+        else:
+            rc = int(line)
+            final = time.time() - start
+
+        if capture is None:
+            capture = OutputCapture()
+        with open(self._outfile, 'rb') as fh:
+            for data in iter(lambda: fh.read(OutputCapture.CHUNK_SIZE), b""):
+                capture.feed(data)
+        capture.close()
+        return rc, final, capture.output
+
+
+class WorkerRunnerAdapter(RunnerAdapter):
+    """Worker thread, running jobs through a pre-warmed shell worker.
+
+    Instead of starting a new shell (parsing the whole test script & loading
+    the profile environment) for each job, jobs are sent to a
+    :class:`ShellWorker`, started once. Only the job's own package-manager
+    deps & environment are applied on top. Non-local Sets are processed as
+    usual.
+
+    :ivar _worker: the shell worker
+    :type _worker: :class:`ShellWorker`
+    """
+
+    def __init__(self, buildir, context=None, ready=None, complete=None,
+                 init_code="", *args, **kwargs):
+        super().__init__(buildir, context=context, ready=ready,
+                         complete=complete, *args, **kwargs)
+        self._worker = ShellWorker(init_code)
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self._worker.stop()
+
+    def local_exec(self, set) -> None:
+        """Execute the Set and jobs within it, through the shell worker.
+
+        :raises Exception: Something occured while running a test"""
+        io.console.debug('{}: [WORKER] Set start'.format(self.ident))
+        simulated = MetaConfig.root.validation.simulated is True
+        for job in set.content:
+            capture = new_capture(job, self._prefix)
+            if job.direct_exec and not simulated:
+                # no shell needed at all
+                rc, final, stdout = self.run_job(job, capture)
+            else:
+                # a dry-run relies on the regular script to display commands
+                script = job.invocation_command if simulated \
+                    else job.generate_worker_script()
+                rc, final, stdout = self._worker.run(script,
+                                                     timeout=job.timeout,
+                                                     capture=capture)
+            job.save_raw_run(time=final, rc=rc, out=stdout)
+            job.save_capture(capture)
+            job.save_status(Test.State.EXECUTED)
+        set.complete = True
+
+
+def build_runners(engine, buildir, ready, complete, concurrency):
+    """Instanciate runners for a given execution engine.
+
+    :raises UnknownEngineError: the engine name is not valid
+    :param engine: the engine name, as set in ``machine.engine``
+    :type engine: str
+    :param buildir: the build directory
+    :type buildir: str
+    :param ready: queue of Sets to be run
+    :type ready: :class:`queue.Queue`
+    :param complete: queue of completed Sets
+    :type complete: :class:`queue.Queue`
+    :param concurrency: max number of Sets run at the same time
+    :type concurrency: int
+    :return: the list of runners (not started)
+    :rtype: list
+    """
+    if engine == "thread":
+        return [RunnerAdapter(buildir=buildir, ready=ready, complete=complete)
+                for _ in range(concurrency)]
+    elif engine == "asyncio":
+        return [AsyncRunnerAdapter(buildir=buildir, ready=ready,
+                                   complete=complete, concurrency=concurrency)]
+    elif engine == "worker":
+        init_code = TestFile.profile_pm_string()
+        return [WorkerRunnerAdapter(buildir=buildir, ready=ready,
+                                    complete=complete, init_code=init_code)
+                for _ in range(concurrency)]
+    raise RunnerException.UnknownEngineError(
+        reason="Unknown execution engine '{}'".format(engine),
+        dbg_info={"valid engines": "thread, asyncio, worker"})
+
+
 def progress_jobs(q, ctx, ev):
     local_cnt = 0
     while local_cnt < ctx.cnt:
-        try:
-            item = q.get(block=False, timeout=5)
-            for job in item.content:
-                ctx.save_result_to_disk(job)
-                local_cnt += 1
-        except queue.Empty:
-            continue
-        except Exception as e:
-            raise e
+        item = q.get()
+        for job in item.content:
+            ctx.save_result_to_disk(job)
+            local_cnt += 1
     ev.set()
 
 class RunnerRemote:
@@ -171,10 +687,10 @@ class RunnerRemote:
             s.add(job)
             rq.put(s)
         
-        while not ev.is_set():
-            time.sleep(1)
-        
-        RunnerAdapter.sched_in_progress = False
+        ev.wait()
+
+        for _ in thr_list:
+            rq.put(None)
         for thr in thr_list:
             thr.join()
         self._ctx.mark_as_completed()
@@ -230,7 +746,7 @@ class RemoteContext:
     def save_result_to_disk(self, job: Test):
         if not self._outfile:
             self._outfile = open(os.path.join(self._path, "output.bin"), 'wb')
-        data = job.encoded_output
+        data = job.raw_output
         self._outfile.writelines([
             "{}:{}:{}:{}:{}\n".format(self.MAGIC_TOKEN, job.jid, len(data), job.time, job.retcode).encode("utf-8"),
             data,
@@ -239,27 +755,22 @@ class RemoteContext:
         
     def load_result_from_disk(self, set):
         with open(os.path.join(self._path, "output.bin"), "rb") as fh:
-            lines = fh.readlines()
-            jobs = list(set.content)
-            for lineum, linedata in enumerate(lines):
-                if lineum % 2 == 0:
-                    # metadata:
-                    try:
-                        magic, jobid, datalen, timexec, retcode = linedata.decode('utf-8').split(":")
-                    except:
-                        raise
-                    assert(magic == self.MAGIC_TOKEN)
-                    datalen = int(datalen)
-                    timexec = float(timexec)
-                    retcode = int(retcode)
-                    data = b""
-                    job: Test = set.find(jobid)
-                    assert(job)
-                    if datalen > 0:
-                        data = lines[lineum+1].strip()
-                        job.encoded_output = data
-                    job.save_raw_run(rc=retcode, time=timexec)
-                    job.save_status(Test.State.EXECUTED)
+            # outputs are stored raw (may contain newlines): rely on the
+            # length given by the metadata line
+            for linedata in iter(fh.readline, b""):
+                magic, jobid, datalen, timexec, retcode = linedata.decode('utf-8').split(":")
+                assert(magic == self.MAGIC_TOKEN)
+                datalen = int(datalen)
+                timexec = float(timexec)
+                retcode = int(retcode)
+                job: Test = set.find(jobid)
+                assert(job)
+                data = fh.read(datalen)
+                fh.read(1)
+                if datalen > 0:
+                    job.raw_output = data
+                job.save_raw_run(rc=retcode, time=timexec)
+                job.save_status(Test.State.EXECUTED)
 
     def mark_as_completed(self):
         if self._outfile:
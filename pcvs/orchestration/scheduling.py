@@ -0,0 +1,277 @@
+import heapq
+import itertools
+import os
+from collections import deque
+
+from pcvs import NAME_BUILD_RESDIR
+from pcvs.helpers.exceptions import OrchestratorException
+from pcvs.orchestration.publishers import ResultDatabaseManager, ResultFile
+from pcvs.testing.test import Test
+
+
+class ReadyHeap:
+    """Ready queue returning jobs sorted by a given key.
+
+    It exposes the subset of the :class:`deque` API used to manipulate ready
+    queues (``append()``, ``appendleft()``, ``popleft()``, ``len()`` &
+    iteration), so policies
+    can be swapped transparently. Jobs with equal keys are returned in
+    insertion order.
+
+    :ivar _key: function computing the sort key of a job
+    :type _key: Callable
+    :ivar _heap: the actual heap
+    :type _heap: list
+    """
+
+    def __init__(self, key, iterable=()):
+        """Constructor method.
+
+        :param key: a function returning the sort key of a given job (the
+            lower, the sooner)
+        :type key: Callable
+        :param iterable: jobs to initially store, defaults to ()
+        :type iterable: Iterable, optional
+        """
+        self._key = key
+        self._seq = itertools.count()
+        self._front_seq = itertools.count(-1, -1)
+        self._heap = [(key(job), next(self._seq), job) for job in iterable]
+        heapq.heapify(self._heap)
+
+    def append(self, job):
+        """Store a new job.
+
+        :param job: the job
+        :type job: :class:`Test`
+        """
+        heapq.heappush(self._heap, (self._key(job), next(self._seq), job))
+
+    def appendleft(self, job):
+        """Store back a job, before any other job with the same key.
+
+        :param job: the job
+        :type job: :class:`Test`
+        """
+        heapq.heappush(self._heap,
+                       (self._key(job), next(self._front_seq), job))
+
+    def popleft(self):
+        """Extract the job with the lowest key.
+
+        :raises IndexError: the queue is empty
+        :return: the job
+        :rtype: :class:`Test`
+        """
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        """Iterate over jobs, in no particular order."""
+        return (elt[2] for elt in self._heap)
+
+
+class SchedPolicy:
+    """Default scheduling policy: jobs are picked in FIFO order.
+
+    A policy is in charge of building ready queues for the :class:`Manager`.
+    It is also provided the whole (ordered) dependency graph before the
+    scheduling starts to precompute any job priority.
+
+    :cvar name: the policy name, as set in ``validation.scheduling.policy``
+    :type name: str
+    :ivar _history: job durations (in sec) from previous runs, by name
+    :type _history: dict
+    """
+    name = "fifo"
+
+    def __init__(self, history=None):
+        """Constructor method.
+
+        :param history: job durations from previous runs, defaults to None
+        :type history: dict, optional
+        """
+        self._history = history if history else {}
+
+    def new_queue(self, iterable=()):
+        """Build a ready queue.
+
+        :param iterable: initial content, defaults to ()
+        :type iterable: Iterable, optional
+        :return: the queue
+        :rtype: deque
+        """
+        return deque(iterable)
+
+    def prepare(self, ordered_jobs):
+        """Precompute data over the dependency graph.
+
+        :param ordered_jobs: jobs sorted topologically (deps first)
+        :type ordered_jobs: list
+        """
+        pass
+
+    def estimate(self, job):
+        """Estimate the duration of a job.
+
+        The duration from previous runs prevails. Otherwise, the expected time
+        set by the TE (``validate.time.mean``) is used.
+
+        :param job: the job
+        :type job: :class:`Test`
+        :return: the duration in seconds, 0 if unknown
+        :rtype: float
+        """
+        if job.name in self._history:
+            return self._history[job.name]
+        return max(0, job.expected_time)
+
+    def walltime(self, job):
+        """Estimate the maximum duration of a job.
+
+        The duration from previous runs prevails. Otherwise, the job timeout
+        is used (itself derived from ``validate.time.mean`` when set).
+
+        :param job: the job
+        :type job: :class:`Test`
+        :return: the duration in seconds, infinite if unknown
+        :rtype: float
+        """
+        if job.name in self._history:
+            return self._history[job.name]
+        return job.timeout if job.timeout else float('inf')
+
+
+class CriticalPathPolicy(SchedPolicy):
+    """Pick jobs on the longest path to the end of the run first.
+
+    The critical-path length of a job is its estimated duration, plus the
+    longest critical-path length among its dependents. Ties are broken by the
+    job duration: longest jobs go first.
+
+    :ivar _priorities: the computed priority for each job
+    :type _priorities: dict
+    """
+    name = "critical_path"
+
+    def __init__(self, history=None):
+        """Constructor method.
+
+        :param history: job durations from previous runs, defaults to None
+        :type history: dict, optional
+        """
+        super().__init__(history)
+        self._priorities = {}
+
+    def new_queue(self, iterable=()):
+        """Build a ready queue sorted by priority.
+
+        :param iterable: initial content, defaults to ()
+        :type iterable: Iterable, optional
+        :return: the queue
+        :rtype: :class:`ReadyHeap`
+        """
+        return ReadyHeap(self.sort_key, iterable)
+
+    def prepare(self, ordered_jobs):
+        """Compute the critical-path length of each job.
+
+        Jobs are walked in reverse topological order, any dependent being
+        processed before its deps.
+
+        :param ordered_jobs: jobs sorted topologically (deps first)
+        :type ordered_jobs: list
+        """
+        critical_path = {}
+        for job in reversed(ordered_jobs):
+            duration = self.estimate(job)
+            longest = max([critical_path[d] for d in job.job_dependents
+                           if d in critical_path], default=0)
+            critical_path[job] = duration + longest
+            self._priorities[job] = (-critical_path[job], -duration)
+
+    def sort_key(self, job):
+        """Get the key ordering a job in ready queues.
+
+        :param job: the job
+        :type job: :class:`Test`
+        :return: negated (critical-path length, estimated duration)
+        :rtype: tuple
+        """
+        if job not in self._priorities:
+            duration = self.estimate(job)
+            self._priorities[job] = (-duration, -duration)
+        return self._priorities[job]
+
+
+def build_policy(name, history=None):
+    """Instanciate a scheduling policy from its name.
+
+    :raises UnknownPolicyError: the name does not match any policy
+    :param name: the policy name
+    :type name: str
+    :param history: job durations from previous runs, defaults to None
+    :type history: dict, optional
+    :return: the policy
+    :rtype: :class:`SchedPolicy`
+    """
+    for policy in [SchedPolicy, CriticalPathPolicy]:
+        if policy.name == name:
+            return policy(history)
+    raise OrchestratorException.UnknownPolicyError(
+        reason="Unknown scheduling policy '{}'".format(name),
+        dbg_info={"valid policies": ", ".join(
+            [SchedPolicy.name, CriticalPathPolicy.name])})
+
+
+def durations_from_tests(tests):
+    """Build the duration table from completed tests.
+
+    Only tests which actually ran are considered.
+
+    :param tests: any iterable of tests
+    :type tests: Iterable
+    :return: durations in seconds, by test name
+    :rtype: dict
+    """
+    return {t.name: t.time for t in tests
+            if t.state in [Test.State.SUCCESS, Test.State.FAILURE]}
+
+
+def durations_from_buildir(path):
+    """Build the duration table from results stored in a build directory.
+
+    Only job metadata are read, not job outputs.
+
+    :param path: the build directory
+    :type path: str
+    :return: durations in seconds, by test name
+    :rtype: dict
+    """
+    res = {}
+    resdir = os.path.join(path, NAME_BUILD_RESDIR)
+    if not os.path.isdir(resdir):
+        return res
+
+    contents = []
+    if ResultDatabaseManager.exists(resdir):
+        hdl = ResultDatabaseManager(resdir)
+        contents.append(list(hdl.browse_metadata()))
+        hdl.finalize()
+
+    prefixes = set(os.path.splitext(f)[0] for f in os.listdir(resdir)
+                   if f.startswith('jobs-') and f.endswith(('.json', '.jsonl')))
+    for prefix in prefixes:
+        try:
+            contents.append(ResultFile.load_metadata(resdir, prefix).values())
+        except (OSError, ValueError):
+            continue
+
+    for content in contents:
+        for data in content:
+            result = data.get('result', {})
+            if result.get('state') in [Test.State.SUCCESS, Test.State.FAILURE]:
+                res[data['id']['fq_name']] = result.get('time', 0)
+    return res
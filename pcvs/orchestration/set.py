@@ -150,6 +150,20 @@ class Set:
         else:
             return max(map(lambda x: x.get_dim(), self._map.values()))
 
+    @property
+    def resources(self):
+        """Getter to resources property (largest amount of each resource
+        requested by a single job, as jobs are run one after another)
+
+        :return: amounts by resource label
+        :rtype: dict
+        """
+        res = dict()
+        for job in self._map.values():
+            for unit, amount in job.resources.items():
+                res[unit] = max(res.get(unit, 0), amount)
+        return res
+
     @property
     def content(self):
         """Generator iterating over the job list."""
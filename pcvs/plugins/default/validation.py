@@ -1,3 +1,5 @@
+import threading
+
 from pcvs.backend import bank
 from pcvs.helpers.system import MetaConfig
 from pcvs.plugins import Plugin
@@ -5,28 +7,43 @@ from pcvs.testing.test import Test
 
 
 class BankValidationPlugin(Plugin):
-    """TODO:
+    """Validate jobs against their history, stored in a bank.
+
+    The bank & the serie matching the current profile are resolved once, job
+    durations from previous runs being loaded once per history depth.
+
+    :ivar _bank_hdl: the bank, None if not resolved yet
+    :type _bank_hdl: :class:`Bank`
+    :ivar _serie: the serie of the current profile, None if no history
+    :type _serie: :class:`Serie`
+    :ivar _history: mean durations (job name -> seconds), by history depth
+    :type _history: dict
     """
     step = Plugin.Step.TEST_RESULT_EVAL
 
     def __init__(self):
         super().__init__()
         self._bank_hdl = None
+        self._serie = None
+        self._history = dict()
+        # jobs may be evaluated concurrently (see eval_workers)
+        self._lock = threading.Lock()
 
     def run(self, *args, **kwargs):
         """TODO:
         """
-        if not self._bank_hdl:
-            bankname = MetaConfig.root.validation.get('target_bank', None)
-            if not bankname:
-                return None
-
-            self._bank_hdl = bank.Bank(path=None, token=bankname)
-            self._bank_hdl.connect()
-        self._serie = self._bank_hdl.get_serie(
-            self._bank_hdl.build_target_branch_name(hash=MetaConfig.root.validation.pf_hash))
-        if not self._serie:
-            # no history, stop !
+        with self._lock:
+            if self._bank_hdl is None:
+                bankname = MetaConfig.root.validation.get('target_bank', None)
+                if not bankname:
+                    return None
+
+                self._bank_hdl = bank.Bank(path=None, token=bankname)
+                self._bank_hdl.connect()
+                self._serie = self._bank_hdl.get_serie(
+                    self._bank_hdl.build_target_branch_name(hash=MetaConfig.root.validation.pf_hash))
+        if self._serie is None:
+            # no history, stop ! (not a truth test: it counts runs)
             return None
 
         node = kwargs.get('analysis', {})
@@ -39,26 +56,44 @@ class BankValidationPlugin(Plugin):
             return func(args, job)
         return None
 
+    def get_mean_durations(self, depth):
+        """Get mean durations of successful jobs over the last runs.
+
+        Runs are read from their index (see :attr:`Run.summary`), only once
+        for a given depth.
+
+        :param depth: number of runs to consider
+        :type depth: int
+        :return: mean durations in seconds, by job name
+        :rtype: dict
+        """
+        with self._lock:
+            if depth not in self._history:
+                total = dict()
+                count = dict()
+                for run in self._serie.history(depth=depth):
+                    for res in run.summary.values():
+                        if res.state == Test.State.SUCCESS:
+                            total[res.name] = total.get(res.name, 0.0) + res.time
+                            count[res.name] = count.get(res.name, 0) + 1
+                self._history[depth] = {k: v / count[k]
+                                        for k, v in total.items()}
+            return self._history[depth]
+
     def not_longer_than_previous_runs(self, args, job):
-        """TODO:
+        """Check a job does not last longer than it used to.
+
+        Its duration is compared to the mean duration of its successful runs
+        among the last ``history_depth`` ones, ``tolerance`` being a
+        percentage.
         """
-        if not self._bank_hdl:
+        if self._bank_hdl is None:
             return Test.State.ERR_OTHER
 
         max_runs = args.get('history_depth', 1)
         tolerance = args.get('tolerance', 0)
-        sum = 0
-        cnt = 0
-        run = self._serie.last
-        while cnt < max_runs:
-            res = run.get_data(job.name)
-            if res and res.state == Test.State.SUCCESS:
-                sum += res.time
-                cnt += 1
-            run = run.previous
-            if run is None:
-                break
-        if cnt >= 0 and job.time >= (sum / cnt) * (1 + tolerance/100):
+        mean = self.get_mean_durations(max_runs).get(job.name, None)
+        if mean is not None and job.time >= mean * (1 + tolerance/100):
             return Test.State.FAILURE
         else:
             return Test.State.SUCCESS
@@ -0,0 +1,302 @@
+import codecs
+import gzip
+import os
+import re
+
+
+class OutputPatterns:
+    """Matchers & metrics regexes of a TE, compiled once (on first use) for
+    all the tests generated from it.
+
+    :ivar _matchers: matcher regexes (``validate.match``), by name
+    :type _matchers: dict
+    :ivar _metrics: metric regexes (``metric``), by name
+    :type _metrics: dict
+    """
+
+    def __init__(self, matchers=None, metrics=None):
+        """Constructor method.
+
+        :param matchers: job matchers (as in ``validate.match``)
+        :type matchers: dict, optional
+        :param metrics: job metrics (as in ``metrics``)
+        :type metrics: dict, optional
+        """
+        self._matchers = {k: v['expr'] for k, v in (matchers or {}).items()}
+        self._metrics = {k: v['key'] for k, v in (metrics or {}).items()}
+        self._compiled = False
+
+    def __compile(self):
+        if not self._compiled:
+            self._matchers = {k: re.compile(v)
+                              for k, v in self._matchers.items()}
+            self._metrics = {k: re.compile(v)
+                             for k, v in self._metrics.items()}
+            self._compiled = True
+
+    @property
+    def empty(self):
+        """Check if there is no pattern at all.
+
+        :return: True if empty
+        :rtype: bool
+        """
+        return not self._matchers and not self._metrics
+
+    @property
+    def matchers(self):
+        """Getter to compiled matchers.
+
+        :return: regexes, by name
+        :rtype: dict
+        """
+        self.__compile()
+        return self._matchers
+
+    @property
+    def metrics(self):
+        """Getter to compiled metrics.
+
+        :return: regexes, by name
+        :rtype: dict
+        """
+        self.__compile()
+        return self._metrics
+
+    def scan(self, output):
+        """Evaluate every matcher & metric over a whole output.
+
+        The output is decoded once (invalid UTF-8 sequences being replaced),
+        only if there is something to evaluate.
+
+        :param output: the job output
+        :type output: bytes
+        :return: found matchers (name -> bool) & metric values (name -> list)
+        :rtype: dict
+        """
+        if not self._matchers and not self._metrics:
+            return {'matchers': {}, 'metrics': {}}
+        self.__compile()
+        text = output.decode('utf-8', errors='replace')
+        return {
+            'matchers': {k: regex.search(text) is not None
+                         for k, regex in self._matchers.items()},
+            'metrics': {k: regex.findall(text)
+                        for k, regex in self._metrics.items()}
+        }
+
+
+class OutputScanner:
+    """Evaluate job matchers & metrics over an output read chunk by chunk.
+
+    The output is split into lines, each regex being applied to every line.
+    It is used when the whole output is not kept in memory (see
+    :class:`OutputCapture`), a regex spanning multiple lines cannot be matched.
+
+    :cvar MAX_LINE: longer lines are split to bound memory usage
+    :type MAX_LINE: int
+    :ivar _matchers: compiled matcher regex, by name
+    :type _matchers: dict
+    :ivar _metrics: compiled metric regex, by name
+    :type _metrics: dict
+    :ivar _found: matchers found so far, by name
+    :type _found: dict
+    :ivar _values: metric values extracted so far, by name
+    :type _values: dict
+    """
+    MAX_LINE = 1 << 20
+
+    def __init__(self, patterns):
+        """Constructor method.
+
+        :param patterns: the patterns to evaluate
+        :type patterns: :class:`OutputPatterns`
+        """
+        self._matchers = patterns.matchers
+        self._metrics = patterns.metrics
+        self._found = {k: False for k in self._matchers}
+        self._values = {k: [] for k in self._metrics}
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ""
+
+    def __scan_line(self, line):
+        for k, regex in self._matchers.items():
+            if not self._found[k] and regex.search(line):
+                self._found[k] = True
+        for k, regex in self._metrics.items():
+            self._values[k].extend(regex.findall(line))
+
+    def feed(self, data):
+        """Scan a new chunk of output.
+
+        :param data: the chunk
+        :type data: bytes
+        """
+        if not self._matchers and not self._metrics:
+            return
+        lines = (self._partial + self._decoder.decode(data)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.__scan_line(line)
+        while len(self._partial) > self.MAX_LINE:
+            self.__scan_line(self._partial[:self.MAX_LINE])
+            self._partial = self._partial[self.MAX_LINE:]
+
+    def close(self):
+        """Scan the remaining (non newline-terminated) output."""
+        self._partial += self._decoder.decode(b"", final=True)
+        if self._partial:
+            self.__scan_line(self._partial)
+            self._partial = ""
+
+    @property
+    def results(self):
+        """Getter to the scan results.
+
+        :return: found matchers (name -> bool) & metric values (name -> list)
+        :rtype: dict
+        """
+        return {'matchers': self._found, 'metrics': self._values}
+
+
+class OutputCapture:
+    """Collect a job output with a bounded memory footprint.
+
+    Only the first and the last ``limit`` bytes are kept. The middle part is
+    written to a gzip side file if requested, dropped otherwise. Once the
+    output is truncated, it is streamed to an :class:`OutputScanner` so the
+    job can still be evaluated over its whole output.
+
+    :cvar MARKER: inserted between the kept head & tail of a truncated output
+    :type MARKER: bytes
+    :cvar CHUNK_SIZE: preferred size of chunks read from a job output
+    :type CHUNK_SIZE: int
+    :ivar _limit: number of bytes kept at both ends, 0 for no limit
+    :type _limit: int
+    :ivar _spill: path to the side file, None to drop the middle part
+    :type _spill: str
+    :ivar _scanner: the scanner, None if not needed
+    :type _scanner: :class:`OutputScanner`
+    :ivar _size: total output size
+    :type _size: int
+    :ivar _truncated: True once some output has been removed
+    :type _truncated: bool
+    """
+    MARKER = b"\n[PCVS: %d bytes omitted]\n"
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, limit=0, spill=None, scanner=None):
+        """Constructor method.
+
+        :param limit: bytes kept at both ends, defaults to 0 (no limit)
+        :type limit: int, optional
+        :param spill: side file storing the middle part, defaults to None
+        :type spill: str, optional
+        :param scanner: scanner to feed once truncated, defaults to None
+        :type scanner: :class:`OutputScanner`, optional
+        """
+        self._limit = limit
+        self._spill = spill
+        self._spill_fh = None
+        self._scanner = scanner
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._size = 0
+        self._truncated = False
+        self._closed = False
+
+    def __truncate(self):
+        """Remove the middle part of the tail, keeping its last bytes."""
+        if not self._truncated:
+            self._truncated = True
+            # from now, the whole output cannot be kept in memory
+            if self._scanner:
+                self._scanner.feed(self._head)
+                self._scanner.feed(self._tail)
+
+        excess = len(self._tail) - self._limit
+        if self._spill:
+            if self._spill_fh is None:
+                os.makedirs(os.path.dirname(self._spill), exist_ok=True)
+                self._spill_fh = gzip.open(self._spill, "wb", compresslevel=1)
+            self._spill_fh.write(self._tail[:excess])
+        del self._tail[:excess]
+
+    def feed(self, data):
+        """Add a new chunk of output.
+
+        :param data: the chunk
+        :type data: bytes
+        """
+        self._size += len(data)
+        if self._truncated and self._scanner:
+            self._scanner.feed(data)
+        if not self._limit:
+            self._head += data
+            return
+
+        room = self._limit - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        self._tail += data
+        # trim by batches, not to move the tail on every chunk
+        if len(self._tail) > 2 * self._limit:
+            self.__truncate()
+
+    def close(self):
+        """Complete the capture, once the whole output has been read."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._limit and len(self._tail) > self._limit:
+            self.__truncate()
+        if self._spill_fh:
+            self._spill_fh.close()
+        if self._truncated and self._scanner:
+            self._scanner.close()
+
+    @property
+    def output(self):
+        """Getter to the kept output.
+
+        :return: the whole output, or its head & tail if truncated
+        :rtype: bytes
+        """
+        if not self._truncated:
+            return bytes(self._head + self._tail)
+        omitted = self._size - len(self._head) - len(self._tail)
+        return bytes(self._head) + (self.MARKER % omitted) + bytes(self._tail)
+
+    @property
+    def truncated(self):
+        """Check if some output has been removed.
+
+        :return: True if truncated
+        :rtype: bool
+        """
+        return self._truncated
+
+    @property
+    def info(self):
+        """Getter to the capture description, stored along the job output.
+
+        :return: total size, truncation flag & side file (if any)
+        :rtype: dict
+        """
+        res = {'size': self._size, 'truncated': self._truncated}
+        if self._spill_fh:
+            res['spill'] = self._spill
+        return res
+
+    @property
+    def scan(self):
+        """Getter to matcher & metric results over the whole output.
+
+        :return: the scan results, None if not truncated (the kept output is
+            then the whole output)
+        :rtype: dict
+        """
+        if not self._truncated or not self._scanner:
+            return None
+        return self._scanner.results
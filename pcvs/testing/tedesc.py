@@ -10,6 +10,7 @@ from pcvs.helpers import pm
 from pcvs.helpers.criterion import Criterion, Serie
 from pcvs.helpers.exceptions import TestException, ProfileException
 from pcvs.helpers.system import MetaConfig, MetaDict
+from pcvs.testing.capture import OutputPatterns
 from pcvs.testing.test import Test
 
 
@@ -158,11 +159,16 @@ class TEDescriptor:
     def init_system_wide(cls, base_criterion_name):
         """Initialize system-wide information (to shorten accesses).
 
+        Beside the base criterion (counting nodes), any resource declared by
+        the machine config (``machine.resources``) may be requested by tests.
+
         :param base_criterion_name: iterator name used as scheduling resource.
         :type base_criterion_name: str
         """
         cls._sys_crit = MetaConfig.root.get_internal('crit_obj')
         cls._base_it = base_criterion_name
+        cls._sys_res = list(MetaConfig.root.get(
+            'machine', {}).get('resources', {}).keys())
 
     def __init__(self, name, node, label, subprefix):
         """constructor method.
@@ -241,6 +247,29 @@ class TEDescriptor:
         else:
             return dflt
 
+    def _requested_resources(self, node, comb=None):
+        """Compute resource amounts requested by a single test.
+
+        Static amounts come from the ``resources`` key of the given node
+        (build or run). A criterion named after a resource (either the base
+        criterion or one declared by ``machine.resources``) overrides it with
+        the value of the current combination.
+
+        :param node: the build or run node
+        :type node: dict
+        :param comb: the test combination, defaults to None
+        :type comb: :class:`Combination`, optional
+        :return: amounts by resource label
+        :rtype: dict
+        """
+        res = dict(node.get('resources', {}))
+        if comb is not None:
+            for unit in [self._base_it] + self._sys_res:
+                value = comb.get(unit, None)
+                if isinstance(value, (int, float)):
+                    res[unit] = value
+        return res
+
     def _compatibility_support(self, compat):
         """Convert tricky keywords from old syntax too complex to be handled
         by the automatic converter.
@@ -508,6 +537,7 @@ class TEDescriptor:
         tags = ["compilation"] + self._tags
 
         command, env = self.__build_exec_process()
+        resources = self._requested_resources(self._build)
 
         # count number of built tests
         self._effective_cnt += 1
@@ -528,7 +558,8 @@ class TEDescriptor:
             rc=self._validation.get("expect_exit", 0),
             artifacts=self._artifacts,
             analysis=self._validation.get("analysis", {}),
-            resources=1,
+            dim=resources.pop(self._base_it, 1),
+            resources=resources,
             wd=chdir
         )
 
@@ -537,6 +568,9 @@ class TEDescriptor:
         te_job_deps = build_job_deps(
             self._run, self._te_label, self._te_subtree)
         te_mod_deps = build_pm_deps(self._run)
+        # compiled once, shared by all the tests from this TE
+        patterns = OutputPatterns(matchers=self._validation.get('match', None),
+                                  metrics=self._metrics)
 
         if self._build:
             fq_name = Test.compute_fq_name(
@@ -593,6 +627,7 @@ class TEDescriptor:
                     cmd=command
                 )
 
+            resources = self._requested_resources(self._run, comb)
             self._effective_cnt += 1
 
             yield Test(
@@ -605,7 +640,9 @@ class TEDescriptor:
                 tags=self._tags,
                 metrics=self._metrics,
                 environment=env,
-                dim=comb.get('n_node', 1),
+                dim=resources.pop(self._base_it, 1),
+                resources=resources,
+                direct_exec=self.get_attr('direct_exec', False),
                 time=self._validation.time.get("mean", -1),
                 delta=self._validation.time.get("tolerance", 0),
                 kill_after=self._validation.time.get('kill_after', None),
@@ -615,7 +652,8 @@ class TEDescriptor:
                 comb=comb,
                 wd=chdir,
                 artifacts=self._artifacts,
-                matchers=self._validation.get('match', None)
+                matchers=self._validation.get('match', None),
+                patterns=patterns
             )
 
     def construct_tests(self):
@@ -2,7 +2,6 @@ import base64
 import json
 import zlib
 import os
-import re
 import shlex
 import sys
 import hashlib
@@ -13,6 +12,7 @@ from pcvs.helpers.criterion import Combination
 from pcvs.helpers.system import MetaConfig, ValidationScheme
 from pcvs.helpers.utils import Program
 from pcvs.plugins import Plugin
+from pcvs.testing.capture import OutputPatterns, OutputScanner
 
 
 class Test:
@@ -36,6 +36,7 @@ class Test:
 
     NOSTART_STR = b"This test cannot be started."
     MAXATTEMPTS_STR = b"This test has failed to be scheduled too many times. Discarded."
+    NORESOURCE_STR = b"This test requests more resources than the machine provides."
 
     class State(IntEnum):
         """Provide Status management, specifically for tests/jobs.
@@ -91,7 +92,10 @@ class Test:
         self._output = b""
         self._state = Test.State.WAITING
         self._dim = kwargs.get('dim', 1)
+        self._resources = dict(kwargs.get('resources', {}))
+        self._resources.pop('n_node', None)
         self._testenv = kwargs.get('environment')
+        self._direct = kwargs.get('direct_exec', False)
         self._id = {
             'te_name': kwargs.get('te_name', 'noname'),
             'label': kwargs.get('label', 'nolabel'),
@@ -118,6 +122,7 @@ class Test:
             'artifacts': kwargs.get('artifacts', {}),
         }
 
+        self._patterns = kwargs.get('patterns')
         self._validation = {
             'matchers': kwargs.get('matchers'),
             'analysis': kwargs.get('analysis'),
@@ -132,6 +137,8 @@ class Test:
         self._mod_deps = kwargs.get("mod_deps", [])
         self._depnames = kwargs.get('job_deps', [])
         self._deps = []
+        self._dependents = []
+        self._pending_deps = 0
         self._invocation_cmd = self._execmd
         self._sched_cnt = 0
         self._output_info = {
@@ -139,6 +146,7 @@ class Test:
             'offset': -1,
             'length': 0
         }
+        self._scan = None
 
     @property
     def jid(self) -> str:
@@ -233,6 +241,54 @@ class Test:
         """
         return self._invocation_cmd
 
+    @property
+    def direct_exec(self):
+        """Check if this test is launched without any shell.
+
+        :return: True if the command is run from its argv
+        :rtype: bool
+        """
+        return self._direct
+
+    @property
+    def argv(self):
+        """Getter for the command, split into arguments.
+
+        :return: the argument list
+        :rtype: list
+        """
+        return shlex.split(self._execmd)
+
+    @property
+    def cwd(self):
+        """Getter for the directory the test is run from.
+
+        :return: the path, None if not set
+        :rtype: str
+        """
+        return self._cwd
+
+    @property
+    def environment(self):
+        """Getter for environment variables set by the TE.
+
+        :return: variables, by name
+        :rtype: dict
+        """
+        if self._testenv is None:
+            return {}
+        return dict(e.split('=', 1) for e in self._testenv)
+
+    @property
+    def pm_load_code(self):
+        """Getter for the shell code loading package-manager deps.
+
+        :return: the shell code, empty if none
+        :rtype: str
+        """
+        return "\n".join([elt.get(load=True, install=True)
+                          for elt in self._mod_deps])
+
     @property
     def job_deps(self):
         """"Getter to the dependency list for this job.
@@ -255,6 +311,26 @@ class Test:
         """
         return self._depnames
 
+    @property
+    def job_dependents(self):
+        """Getter to the list of jobs depending on this one.
+
+        This is the reverse of ``job_deps``, filled during dep resolution.
+
+        :return: the list of jobs waiting for this one to complete
+        :rtype: list
+        """
+        return self._dependents
+
+    @property
+    def pending_deps(self):
+        """Getter to the number of deps not completed yet.
+
+        :return: the number of deps this job still waits for
+        :rtype: int
+        """
+        return self._pending_deps
+
     @property
     def mod_deps(self):
         """Getter to the list of pack-manager rules defined for this job.
@@ -293,6 +369,18 @@ class Test:
 
         if obj not in self._deps:
             self._deps.append(obj)
+            obj._dependents.append(self)
+            if not obj.been_executed():
+                self._pending_deps += 1
+
+    def release_a_dep(self):
+        """Notify the job one of its deps has completed.
+
+        :return: True if the job does not wait for any other dep
+        :rtype: bool
+        """
+        self._pending_deps -= 1
+        return self._pending_deps <= 0
 
     def has_completed_deps(self):
         """Check if the test can be scheduled.
@@ -303,7 +391,7 @@ class Test:
         :return: True if the job can be scheduled
         :rtype: bool
         """
-        return len([d for d in self._deps if not d.been_executed()]) == 0
+        return self._pending_deps <= 0
 
     def has_failed_dep(self):
         """Check if at least one dep is blocking this job from ever be
@@ -360,10 +448,24 @@ class Test:
         :param unit: the resource label, such label should exist within the test
         :type unit: str
 
-        :return: The number of resource this Test is requesting.
+        :return: The number of resource this Test is requesting, 0 if the
+            resource is not requested.
         :rtype: int
         """
-        return self._dim
+        if unit == "n_node":
+            return self._dim
+        return self._resources.get(unit, 0)
+
+    @property
+    def resources(self):
+        """Get every resource amount requested by this test.
+
+        :return: amounts by resource label (including 'n_node')
+        :rtype: dict
+        """
+        res = {'n_node': self._dim}
+        res.update(self._resources)
+        return res
 
     def save_final_result(self, rc=0, time=None, out=b'', state=None):
         """Build the final Test result node.
@@ -395,25 +497,72 @@ class Test:
         if rc is not None:
             self._rc = rc
         if out is not None:
-            self._output = base64.b64encode(out)
-            self._output_info['raw'] = self._output
+            self._output = out
+            self._scan = None
         if time is not None:
             self._exectime = time
 
-    def extract_metrics(self):
-        """TODO:
+    @property
+    def patterns(self):
+        """Getter to the compiled matchers & metrics.
+
+        Shared by all tests from the same TE (see :class:`TEDescriptor`),
+        built from this test otherwise.
+
+        :return: the patterns
+        :rtype: :class:`OutputPatterns`
+        """
+        if self._patterns is None:
+            self._patterns = OutputPatterns(
+                matchers=self._validation['matchers'],
+                metrics=self._data['metrics'])
+        return self._patterns
+
+    def output_scanner(self):
+        """Build a scanner evaluating this test matchers & metrics over an
+        output read chunk by chunk.
+
+        :return: the scanner
+        :rtype: :class:`OutputScanner`
+        """
+        return OutputScanner(self.patterns)
+
+    def scan_output(self):
+        """Evaluate matchers & metrics over the output, once (results are
+        shared by :meth:`extract_metrics` & :meth:`evaluate`).
+
+        :return: found matchers (name -> bool) & metric values (name -> list)
+        :rtype: dict
         """
-        raw_output = self.output
-        for name in self._data['metrics'].keys():
-            node = self._data['metrics'][name]
+        if self._scan is None:
+            self._scan = self.patterns.scan(self._output)
+        return self._scan
+
+    def save_capture(self, capture):
+        """Save how the output has been captured (total size, truncation).
 
-            try:
-                ens = set if node['attributes']['unique'] else list
-            except KeyError:
-                ens = list
+        If the output has been truncated, matchers & metrics are evaluated
+        from the capture scan, over the whole output (see :meth:`scan_output`).
 
-            self._data['metrics'][name]['values'] = list(
-                ens(re.findall(node['key'], raw_output)))
+        :param capture: the completed capture
+        :type capture: :class:`OutputCapture`
+        """
+        self._output_info.update(capture.info)
+        self._scan = capture.scan
+
+    def extract_metrics(self):
+        """TODO:
+        """
+        if not self._data['metrics']:
+            return
+        results = self.scan_output()['metrics']
+        # metric nodes are shared by all tests from the same TE
+        metrics = dict()
+        for name, node in self._data['metrics'].items():
+            attributes = node.get('attributes') or {}
+            ens = set if attributes.get('unique', False) else list
+            metrics[name] = {**node, 'values': list(ens(results[name]))}
+        self._data['metrics'] = metrics
 
     def evaluate(self):
         """TODO:
@@ -423,13 +572,12 @@ class Test:
         if self._validation['expect_rc'] != self._rc:
             state = Test.State.FAILURE
 
-        raw_output = self.output
-
         # if test should be validated through a matching regex
         if state == Test.State.SUCCESS and self._validation['matchers'] is not None:
+            results = self.scan_output()['matchers']
             for k, v in self._validation['matchers'].items():
                 expected = (v.get('expect', True) is True)
-                found = re.search(v['expr'], raw_output)
+                found = results[k]
                 if (found and not expected) or (not found and expected):
                     state = Test.State.FAILURE
                     break
@@ -449,6 +597,8 @@ class Test:
             if self._validation['expect_rc'] != p.rc:
                 state = Test.State.FAILURE
         self._state = state
+        # last step using the scan, do not keep results alive for every job
+        self._scan = None
 
     def save_status(self, state):
         self.executed(state)
@@ -517,18 +667,35 @@ class Test:
         return self._state
 
     @property
-    def encoded_output(self) -> bytes:
+    def raw_output(self) -> bytes:
+        """Getter for the job output, as produced by the job.
+
+        :return: the output
+        :rtype: bytes
+        """
         return self._output
+
+    @raw_output.setter
+    def raw_output(self, v: bytes) -> None:
+        self._output = v
+        self._scan = None
+
+    @property
+    def encoded_output(self) -> bytes:
+        """Getter for the job output, base64-encoded (as exported in JSON).
+
+        :return: the encoded output
+        :rtype: bytes
+        """
+        return base64.b64encode(self._output)
     
     @encoded_output.setter
     def encoded_output(self, v) -> None:
-        self._output = v
-        self._output_info['raw'] = v
+        self._output = base64.b64decode(v)
+        self._scan = None
 
     def get_raw_output(self, encoding="utf-8") -> bytes:
-        base = base64.b64decode(self._output)
-
-        return base if not encoding else base.decode(encoding)
+        return self._output if not encoding else self._output.decode(encoding)
 
     @property
     def output(self) -> str:
@@ -544,16 +711,35 @@ class Test:
         """
         return self._exectime
     
+    @property
+    def expected_time(self):
+        """Getter for the expected execution time (``validate.time.mean``).
+
+        :return: time in seconds, -1 if not set
+        :rtype: float
+        """
+        return self._validation['time']
+
     @property
     def retcode(self):
         return self._rc
 
-    def to_json(self, strstate=False):
+    def to_json(self, strstate=False, raw_output=True):
         """Serialize the whole Test as a JSON object.
 
+        The job output is base64-encoded only here, as an str (``raw`` key).
+
+        :param strstate: export the state as a string, defaults to False
+        :type strstate: bool, optional
+        :param raw_output: include the job output, defaults to True
+        :type raw_output: bool, optional
         :return: a JSON object mapping the test
         :rtype: str
         """
+        output = dict(self._output_info)
+        if raw_output and self._output:
+            output['raw'] = self.encoded_output.decode('ascii')
+
         res = {
             "id": self._id,
             "exec": self._execmd,
@@ -561,7 +747,7 @@ class Test:
                 "rc": self._rc,
                 "state": str(self._state) if strstate else self._state,
                 "time": self._exectime,
-                "output": self._output_info
+                "output": output
             },
             "data": self._data
         }
@@ -603,51 +789,59 @@ class Test:
         self._rc = res.get("rc", -1)
         self._state = Test.State(res.get("state", Test.State.ERR_OTHER))
         self._exectime = res.get("time", 0)
-        self._output_info = res.get("output", {})
-        self._output = self._output_info.get('raw', b"")
-        if type(self._output) == str:
-            # should only be managed as bytes (as produced by b64 encoding)
-            self._output = self._output.encode('utf-8')
-
-    def generate_script(self, srcfile):
-        """Serialize test logic to its Shell representation.
-
-        This script provides the shell sequence to put in a shell script
-        switch-case, in order to reach that test from script arguments.
-
-        :param srcfile: script filepath, to store the actual wrapped command.
-        :type srcfile: str
-        :return: the shell-compliant instruction set to build the test
-        :rtype: str
+        self._output_info = dict(res.get("output") or {})
+        try:
+            self._output = base64.b64decode(self._output_info.pop('raw', b""))
+        except ValueError:
+            # older banks may hold a non-serializable output placeholder
+            self._output = b""
+        self._scan = None
+
+    def __script_parts(self):
+        """Build the shell code parts running this test.
+
+        :return: the code to change directory, to load package-manager deps,
+            to set the environment & to run the test command.
+        :rtype: tuple
         """
         pm_code = ""
         cd_code = ""
         env_code = ""
         cmd_code = ""
-        post_code = ""
-
-        self._invocation_cmd = 'bash {} {}'.format(
-            srcfile, self._id['fq_name'])
 
         # if changing directory is required by the test
         if self._cwd is not None:
             cd_code += "cd '{}'".format(shlex.quote(self._cwd))
 
         # manage package-manager deps
-        for elt in self._mod_deps:
-            pm_code += "\n".join([elt.get(load=True, install=True)])
+        pm_code = self.pm_load_code
 
         # manage environment variables defined in TE
         if self._testenv is not None:
             envs = []
-            for e in self._testenv:
-                k, v = e.split('=', 1)
+            for k, v in self.environment.items():
                 envs.append("{k}={v}; export {k}".format(k=shlex.quote(k),
                                                          v=shlex.quote(v)))
             env_code = "\n".join(envs)
-            
-                
+
         cmd_code = self._execmd
+        return cd_code, pm_code, env_code, cmd_code
+
+    def generate_script(self, srcfile):
+        """Serialize test logic to its Shell representation.
+
+        This script provides the shell sequence to put in a shell script
+        switch-case, in order to reach that test from script arguments.
+
+        :param srcfile: script filepath, to store the actual wrapped command.
+        :type srcfile: str
+        :return: the shell-compliant instruction set to build the test
+        :rtype: str
+        """
+        self._invocation_cmd = 'bash {} {}'.format(
+            srcfile, self._id['fq_name'])
+
+        cd_code, pm_code, env_code, cmd_code = self.__script_parts()
 
         return """
         "{name}")
@@ -663,6 +857,46 @@ class Test:
             name=self._id['fq_name']
         )
 
+    def generate_script_shard(self, srcfile):
+        """Serialize test logic to its own Shell file.
+
+        Unlike :meth:`generate_script`, the result is stored to a dedicated
+        file, sourced by the launcher script when this test is requested.
+
+        :param srcfile: launcher filepath, to store the actual wrapped command.
+        :type srcfile: str
+        :return: the shell-compliant instruction set to build the test
+        :rtype: str
+        """
+        self._invocation_cmd = 'bash {} {}'.format(
+            srcfile, self._id['fq_name'])
+
+        cd_code, pm_code, env_code, cmd_code = self.__script_parts()
+
+        return "{cd_code}\npcvs_load={pm_code}\npcvs_env={env_code}\npcvs_cmd={cmd_code}\n".format(
+            cmd_code=shlex.quote(cmd_code),
+            env_code=shlex.quote(env_code),
+            pm_code=shlex.quote(pm_code),
+            cd_code=cd_code)
+
+    def generate_worker_script(self):
+        """Serialize test logic to be run by a shell worker.
+
+        Unlike :meth:`generate_script`, the code is self-contained: it is meant
+        to be run in a subshell of a worker which already loaded the profile's
+        package-manager environment.
+
+        :return: the shell code running this test
+        :rtype: str
+        """
+        cd_code, pm_code, env_code, cmd_code = self.__script_parts()
+        return "\n".join([
+            "{} || exit $?".format(cd_code) if cd_code else "",
+            'eval {} || exit "$?"'.format(shlex.quote(pm_code)),
+            'eval {} || exit "$?"'.format(shlex.quote(env_code)),
+            'eval {} || exit "$?"'.format(shlex.quote(cmd_code)),
+        ])
+
     @classmethod
     def compute_fq_name(self, label, subtree, name, combination=None, suffix=None):
         """Generate the fully-qualified (dq) name for a test, based on :
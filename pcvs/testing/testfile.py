@@ -1,3 +1,4 @@
+import shutil
 import tempfile
 import re
 import functools
@@ -99,6 +100,8 @@ class TestFile:
 
     cc_pm_string = ""
     rt_pm_string = ""
+    NAME_SHARD_DIR = "list_of_tests.d"
+    NAME_LIST_FILE = "list_of_tests.lst"
     val_scheme = None
 
     def __init__(self, file_in, path_out, data=None, label=None, prefix=None):
@@ -235,22 +238,35 @@ class TestFile:
             # register debug informations relative to the loaded TEs
             self._debug[k] = td.get_debug()
 
-    def flush_sh_file(self):
-        """Store the given input file into their destination."""
-        fn_sh = os.path.join(self._path_out, "list_of_tests.sh")
+    @classmethod
+    def profile_pm_string(cls):
+        """Get the shell code loading the profile's package-manager deps
+        (compiler & runtime).
+
+        :return: the shell code
+        :rtype: str
+        """
         cobj = MetaConfig.root.get_internal('cc_pm')
-        if TestFile.cc_pm_string == "" and cobj:
-            TestFile.cc_pm_string = "\n".join([
+        if cls.cc_pm_string == "" and cobj:
+            cls.cc_pm_string = "\n".join([
                 e.get(load=True, install=False)
                 for e in cobj
             ])
 
         robj = MetaConfig.root.get_internal('rt_pm')
-        if TestFile.rt_pm_string == "" and robj:
-            TestFile.rt_pm_string = "\n".join([
+        if cls.rt_pm_string == "" and robj:
+            cls.rt_pm_string = "\n".join([
                 e.get(load=True, install=False)
                 for e in robj
             ])
+        return "\n".join([cls.cc_pm_string, cls.rt_pm_string])
+
+    def flush_sh_file(self):
+        """Store the given input file into their destination."""
+        fn_sh = os.path.join(self._path_out, "list_of_tests.sh")
+        pm_string = TestFile.profile_pm_string()
+        indexed = MetaConfig.root.validation.get(
+            'script_format', 'indexed') == 'indexed'
 
         with open(fn_sh, 'w') as fh_sh:
             fh_sh.write("""#!/bin/sh
@@ -274,54 +290,95 @@ fi
 
 for arg in "$@"; do case $arg in
 """.format(simulated="sim" if MetaConfig.root.validation.simulated is True else "",
-                pm_string="\n".join([
-                        TestFile.cc_pm_string,
-                        TestFile.rt_pm_string
-                        ])))
-
-            for test in self._tests:
-                fh_sh.write(test.generate_script(fn_sh))
-                MetaConfig.root.get_internal('orchestrator').add_new_job(test)
+                pm_string=pm_string))
+
+            if indexed:
+                self.flush_sh_shards(fn_sh)
+                fh_sh.write("""
+        --list) cat "$(dirname "$0")/{list_file}"; exit 0;;
+        *) pcvs_shard="$(dirname "$0")/{shard_dir}/$arg.sh"
+           if test -f "$pcvs_shard"; then
+               . "$pcvs_shard"
+           else
+               printf "Invalid test-name \'$arg\'\\n"; exit 1
+           fi;;
+        esac
+    done
+""".format(list_file=self.NAME_LIST_FILE, shard_dir=self.NAME_SHARD_DIR))
+            else:
+                for test in self._tests:
+                    fh_sh.write(test.generate_script(fn_sh))
+                    MetaConfig.root.get_internal('orchestrator').add_new_job(test)
 
-            fh_sh.write("""
+                fh_sh.write("""
         --list) printf "{list_of_tests}\\n"; exit 0;;
         *) printf "Invalid test-name \'$arg\'\\n"; exit 1;;
         esac
     done
-    
+""".format(list_of_tests="\n".join([
+                    t.name
+                    for t in self._tests
+                ])))
+
+            fh_sh.write("""
     if test -z "$PCVS_SHOW"; then
-        eval "${{pcvs_load}}" || exit "$?"
-        eval "${{pcvs_env}}" || exit "$?"
-        eval "${{pcvs_cmd}}" || exit "$?"
+        eval "${pcvs_load}" || exit "$?"
+        eval "${pcvs_env}" || exit "$?"
+        eval "${pcvs_cmd}" || exit "$?"
         exit $?
     else   
         if test -n "$PCVS_SHOW_MOD"; then
             test -n "$PCVS_VERBOSE" && echo "#### MODULE LOADED ####"
 cat<<EOF
-${{pcvs_load}}
+${pcvs_load}
 EOF
         fi
         
         if test -n "$PCVS_SHOW_ENV"; then
         test -n "$PCVS_VERBOSE" && echo "###### SETUP ENV ######"
 cat<<EOF
-${{pcvs_env}}
+${pcvs_env}
 EOF
         fi
         if test -n "$PCVS_SHOW_CMD"; then
         test -n "$PCVS_VERBOSE" && echo "##### RUN COMMAND #####"
 cat<<EOF
-${{pcvs_cmd}}
+${pcvs_cmd}
 EOF
         fi
     fi
-    exit $?\n""".format(list_of_tests="\n".join([
-                t.name
-                for t in self._tests
-            ])))
+    exit $?\n""")
 
         self.generate_debug_info()
 
+    def flush_sh_shards(self, fn_sh):
+        """Store each test logic to its own file, next to the launcher script.
+
+        The launcher only sources the file matching the requested test, its
+        cost does not depend on the number of tests in the input file.
+
+        :param fn_sh: the launcher script path
+        :type fn_sh: str
+        """
+        shard_dir = os.path.join(self._path_out, self.NAME_SHARD_DIR)
+        # drop shards from a previous run
+        if os.path.isdir(shard_dir):
+            shutil.rmtree(shard_dir)
+
+        created = set()
+        for test in self._tests:
+            fn_shard = os.path.join(shard_dir, test.name + ".sh")
+            dirname = os.path.dirname(fn_shard)
+            if dirname not in created:
+                os.makedirs(dirname, exist_ok=True)
+                created.add(dirname)
+            with open(fn_shard, 'w') as fh:
+                fh.write(test.generate_script_shard(fn_sh))
+            MetaConfig.root.get_internal('orchestrator').add_new_job(test)
+
+        with open(os.path.join(self._path_out, self.NAME_LIST_FILE), 'w') as fh:
+            fh.write("".join(["{}\n".format(t.name) for t in self._tests]))
+
     def generate_debug_info(self):
         """Dump debug info to the appropriate file for the input object."""
         if len(self._debug) and io.console.verb_debug:
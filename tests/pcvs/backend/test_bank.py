@@ -9,9 +9,11 @@ from ruamel.yaml import YAML
 
 import pcvs
 from pcvs import NAME_BUILD_RESDIR, NAME_BUILDIR
+from pcvs import dsl
 from pcvs.backend import bank as tested
 from pcvs.helpers import utils, git
 from pcvs.helpers.system import MetaDict
+from pcvs.testing import test
 
 
 @pytest.fixture
@@ -107,3 +109,76 @@ def test_save_run(mock_repo_fs, dummy_run, capsys):
     repo.open()
     assert(len(list(repo.branches)) == 3)
 
+
+
+def test_run_index(mock_repo_fs):
+    pcvs.io.init()
+    obj = tested.Bank(path=mock_repo_fs, token="dummy@original-tag")
+    obj.connect()
+    obj.set_id("author", "a@pcvs", "committer", "c@pcvs")
+    serie = obj.new_serie("dummy/profile_hash")
+    for t in [1.0, 2.0]:
+        run = dsl.Run(from_serie=serie)
+        for i in range(3):
+            job = test.Test(te_name="job{}".format(i), label="label", subtree="sub")
+            job.save_final_result(rc=i, time=t * i, out=b"output",
+                                  state=test.Test.State(2 + i))
+            run.update(job.name, job.to_json())
+        run.update(".pcvs-cache/conf.json", {"validation": {}})
+        serie.commit(run, metadata={}, msg="run", timestamp=int(t))
+
+    run = serie.last
+    name = "label/sub/job1"
+    assert(sorted(run.summary) == ["label/sub/job{}".format(i) for i in range(3)])
+    summary = run.get_summary(name)
+    job = run.get_data(name)
+    assert(summary.state == job.state == test.Test.State.FAILURE)
+    assert(summary.time == job.time == 2.0)
+    assert(summary.rc == job.retcode == 1)
+    # the index refers to the job blob
+    blob = obj._repo.get_tree(rev=run._cid, prefix=name)
+    assert(summary.oid == str(blob.tid.id))
+    assert(sorted(j.name for j in run.jobs) == sorted(run.summary))
+    assert(run.get_summary("unknown") is None)
+    assert(run.get_data("unknown") is None)
+
+    history = serie.history()
+    assert(len(history) == 2)
+    assert(history[1].get_summary(name).time == 1.0)
+    assert(len(serie.history(depth=1)) == 1)
+    obj.disconnect()
+
+
+def test_validation_plugin_history(mock_repo_fs):
+    from pcvs.plugins.default.validation import BankValidationPlugin
+    pcvs.io.init()
+    obj = tested.Bank(path=mock_repo_fs, token="dummy@original-tag")
+    obj.connect()
+    obj.set_id("author", "a@pcvs", "committer", "c@pcvs")
+    serie = obj.new_serie("dummy/profile_hash")
+    for t, state in [(1.0, 2), (2.0, 2), (10.0, 3)]:
+        run = dsl.Run(from_serie=serie)
+        job = test.Test(te_name="job", label="label", subtree="sub")
+        job.save_final_result(rc=0, time=t, out=b"", state=test.Test.State(state))
+        run.update(job.name, job.to_json())
+        serie.commit(run, metadata={}, msg="run", timestamp=int(t))
+
+    plugin = BankValidationPlugin()
+    plugin._bank_hdl = obj
+    plugin._serie = serie
+    check = {"method": "not_longer_than_previous_runs",
+             "args": {"history_depth": 2, "tolerance": 10}}
+    job = test.Test(te_name="job", label="label", subtree="sub")
+    other = test.Test(te_name="other", label="label", subtree="sub")
+    with patch.object(dsl.Serie, "history", wraps=serie.history) as history:
+        # the last failed run is ignored: mean = 2.0
+        job.save_final_result(time=2.5)
+        assert(plugin.run(analysis=check, job=job) == test.Test.State.FAILURE)
+        job.save_final_result(time=2.1)
+        assert(plugin.run(analysis=check, job=job) == test.Test.State.SUCCESS)
+        # no history
+        assert(plugin.run(analysis=check, job=other) == test.Test.State.SUCCESS)
+        # runs are only read once per depth
+        assert(history.call_count == 1)
+    assert(plugin.get_mean_durations(3) == {job.name: 1.5})
+    obj.disconnect()
@@ -0,0 +1,57 @@
+import shutil
+
+import pytest
+
+from pcvs.helpers import git as tested
+from pcvs.helpers.exceptions import GitException
+
+DATA = {
+    "label/sub/test_a.json": '{"rc": 0}',
+    "label/sub/test_b.json": '{"rc": 0}',
+    "label/other/test_c.json": '{"rc": 1}',
+    ".pcvs-cache/conf.json": {"validation": {}},
+}
+
+
+@pytest.mark.skipif(not tested.has_pygit2, reason="requires pygit2")
+def test_bulk_insert_api(tmpdir):
+    repo = tested.GitByAPI(str(tmpdir))
+    repo.open()
+    root = None
+    for k, v in DATA.items():
+        root = repo.insert_tree(k, v, root)
+
+    # same tree as successive insertions, built at once
+    tree = repo.insert_trees(DATA)
+    assert(tree.tid == root.hdl.write())
+    repo.set_identity("author", "a@pcvs", "committer", "c@pcvs")
+    commit = repo.commit(tree, "bulk", orphan=True)
+    assert(commit.cid.tree.id == tree.tid)
+    assert(repo.get_tree(commit, "label/sub/test_b.json").data == b'{"rc": 0}')
+    repo.close()
+
+
+@pytest.mark.skipif(not shutil.which("git"), reason="requires git")
+def test_bulk_insert_cli(tmpdir):
+    repo = tested.GitByCLI(str(tmpdir.join("cli")))
+    repo.open()
+    tree = repo.insert_trees(DATA)
+    assert(repo._git("cat-file", "-p", "{}:label/other/test_c.json".format(
+        tree.tid)).strip() == '{"rc": 1}')
+    # the temporary ref used by fast-import is removed
+    assert(not repo._git("for-each-ref").strip())
+    if tested.has_pygit2:
+        api = tested.GitByAPI(str(tmpdir.join("api")))
+        api.open()
+        assert(str(api.insert_trees(DATA).tid) == tree.tid)
+        api.close()
+    repo.close()
+
+
+def test_bulk_insert_conflict():
+    with pytest.raises(GitException.BadEntryError):
+        tested.GitByGeneric._group_paths({"a/b": "file", "a/b/c": "file"})
+    with pytest.raises(GitException.BadEntryError):
+        tested.GitByGeneric._group_paths({"a/b/c": "file", "a/b": "file"})
+    assert(tested.GitByGeneric._group_paths({"a/b": 1, "c": 2}) ==
+           {"a": {"b": "1"}, "c": "2"})
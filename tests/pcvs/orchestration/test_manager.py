@@ -0,0 +1,271 @@
+import queue
+import threading
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+
+from pcvs.helpers import system
+from pcvs.helpers.exceptions import OrchestratorException
+from pcvs.orchestration import manager as tested
+from pcvs.plugins import Collection
+from pcvs.testing import test
+
+
+class DummyPublisher:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, job):
+        self.saved.append(job)
+
+
+@pytest.fixture
+def make_jobman():
+    """Build a manager, machine & validation config being overridden.
+
+    Managers are shut down (evaluation pool included) on teardown.
+    """
+    tested.Manager.job_hashes.clear()
+    tested.Manager.dep_rules.clear()
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(test.Test, "display"))
+
+        def make(max_size=1, machine=None, validation=None, notify=None,
+                 history=None):
+            config = system.MetaConfig({
+                "machine": {"concurrent_run": 1, **(machine or {})},
+                "validation": validation or {},
+            })
+            config.set_internal("pColl", Collection())
+            config.set_internal("sched_history", history)
+            stack.enter_context(
+                patch("pcvs.helpers.system.MetaConfig.root", config))
+            manager = tested.Manager(max_size=max_size,
+                                     publisher=DummyPublisher(),
+                                     notify=notify)
+            stack.callback(manager.shutdown)
+            return manager
+
+        yield make
+    tested.Manager.job_hashes.clear()
+    tested.Manager.dep_rules.clear()
+
+
+@pytest.fixture
+def jobman(make_jobman):
+    return make_jobman()
+
+
+def make_chain(jobman, length):
+    jobs = []
+    for i in range(length):
+        deps = ["label/job{}".format(i - 1)] if i > 0 else []
+        job = test.Test(te_name="job{}".format(i), label="label", job_deps=deps)
+        jobman.add_job(job)
+        jobs.append(job)
+    jobman.resolve_deps()
+    return jobs
+
+
+def test_only_ready_jobs_are_queued(jobman):
+    jobs = make_chain(jobman, 3)
+    assert(list(jobman.get_dim(1)) == [jobs[0]])
+    assert(jobs[1].pending_deps == 1)
+    assert(jobs[0].job_dependents == [jobs[1]])
+
+
+def test_success_releases_dependent(jobman):
+    jobs = make_chain(jobman, 3)
+    s = jobman.create_subset(1)
+    assert(list(s.content) == [jobs[0]])
+    assert(jobman.create_subset(1) is None)
+
+    jobman.publish_job(jobs[0], publish_args={"state": test.Test.State.SUCCESS})
+    assert(jobs[1].has_completed_deps())
+    assert(list(jobman.get_dim(1)) == [jobs[1]])
+    assert(list(jobman.create_subset(1).content) == [jobs[1]])
+
+
+def test_failure_propagates_to_subtree(jobman):
+    jobs = make_chain(jobman, 4)
+    jobman.create_subset(1)
+    jobman.publish_job(jobs[0], publish_args={"state": test.Test.State.FAILURE})
+
+    assert(all(j.state == test.Test.State.ERR_DEP for j in jobs[1:]))
+    assert(jobman.get_leftjob_count() == 0)
+    assert(len(jobman.get_dim(1)) == 0)
+
+
+def test_circular_deps_are_all_reported(jobman):
+    for name, dep in [("a", "b"), ("b", "a"), ("c", "c"), ("d", "a")]:
+        jobman.add_job(test.Test(te_name=name, label="label",
+                                 job_deps=["label/{}".format(dep)]))
+    with pytest.raises(OrchestratorException.CircularDependencyError) as err:
+        jobman.resolve_deps()
+    cycles = sorted(err.value.dbg.values())
+    assert(cycles == ["label/a -> label/b", "label/c"] or
+           cycles == ["label/b -> label/a", "label/c"])
+
+
+def test_undefined_dep(jobman):
+    jobman.add_job(test.Test(te_name="a", label="label", job_deps=["nope"]))
+    with pytest.raises(OrchestratorException.UndefDependencyError):
+        jobman.resolve_deps()
+
+
+def test_topological_sort(jobman):
+    jobs = make_chain(jobman, 5)
+    assert(tested.Manager.topological_sort(jobs[::-1]) == jobs)
+
+
+@pytest.fixture
+def backfill_jobman(make_jobman):
+    return make_jobman(max_size=4,
+                       validation={"scheduling": {"backfill": True}})
+
+
+def test_backfill(backfill_jobman):
+    jobman = backfill_jobman
+    running = test.Test(te_name="running", label="label", dim=2, time=100)
+    jobman.add_job(running)
+    assert(list(jobman.create_subset(4).content) == [running])
+
+    wide = test.Test(te_name="wide", label="label", dim=4, time=10)
+    short = test.Test(te_name="short", label="label", dim=1, time=1)
+    long = test.Test(te_name="long", label="label", dim=1, time=1000)
+    for job in [wide, long, short]:
+        jobman.add_job(job)
+
+    # the wide job will start once the running one completes
+    start, extra = jobman.reserve_resources(wide, 2)
+    assert(extra == 0)
+    # only the short job does not delay the wide one
+    assert(list(jobman.create_subset(2).content) == [short])
+    assert(jobman.create_subset(1) is None)
+    assert(list(jobman.get_dim(1)) == [long])
+    assert(list(jobman.get_dim(4)) == [wide])
+
+
+def test_backfill_history(make_jobman):
+    # fifo policy: job timeouts are all the same, durations come from history
+    jobman = make_jobman(max_size=4,
+                         validation={"job_timeout": 100,
+                                     "scheduling": {"backfill": True}},
+                         history={"label/running": 50, "label/short": 1})
+    running = test.Test(te_name="running", label="label", dim=2)
+    jobman.add_job(running)
+    assert(list(jobman.create_subset(4).content) == [running])
+
+    wide = test.Test(te_name="wide", label="label", dim=4)
+    long = test.Test(te_name="long", label="label", dim=1)
+    short = test.Test(te_name="short", label="label", dim=1)
+    for job in [wide, long, short]:
+        jobman.add_job(job)
+
+    assert(list(jobman.create_subset(2).content) == [short])
+    assert(list(jobman.get_dim(1)) == [long])
+
+
+def test_backfill_unknown_walltime(backfill_jobman):
+    jobman = backfill_jobman
+    # no timeout nor history: the running job may never complete
+    running = test.Test(te_name="running", label="label", dim=2)
+    jobman.add_job(running)
+    assert(list(jobman.create_subset(4).content) == [running])
+
+    wide = test.Test(te_name="wide", label="label", dim=4)
+    narrow = test.Test(te_name="narrow", label="label", dim=1)
+    for job in [wide, narrow]:
+        jobman.add_job(job)
+
+    assert(jobman.reserve_resources(wide, 2)[0] == float('inf'))
+    # the wide job would be delayed forever
+    assert(jobman.create_subset(2) is None)
+    assert(list(jobman.get_dim(1)) == [narrow])
+
+
+def test_reserve_unreachable(backfill_jobman):
+    job = test.Test(te_name="huge", label="label", dim=8)
+    assert(backfill_jobman.reserve_resources(job, 4) == (float('inf'), 0))
+
+
+@pytest.fixture
+def shared_jobman(make_jobman):
+    return make_jobman(machine={"concurrent_run": 8,
+                                "resources": {"n_core": 8, "license": 1}})
+
+
+def test_vector_packing(shared_jobman):
+    jobman = shared_jobman
+    jobs = [test.Test(te_name="omp{}".format(i), label="label", dim=0,
+                      resources={"n_core": 3}) for i in range(3)]
+    licensed = test.Test(te_name="lic", label="label", dim=0,
+                         resources={"n_core": 1, "license": 1})
+    for job in jobs + [licensed]:
+        jobman.add_job(job)
+
+    # nodes are shared: only cores & licences limit the packing
+    sets = [jobman.create_subset(1) for _ in range(3)]
+    assert([list(s.content) for s in sets] == [[jobs[0]], [jobs[1]], [licensed]])
+    assert(jobman.create_subset(1) is None)
+
+    jobs[0].save_final_result(time=1.0, state=test.Test.State.SUCCESS)
+    jobman.merge_subset(sets[0])
+    assert(list(jobman.create_subset(1).content) == [jobs[2]])
+
+
+def test_exceeding_capacity(shared_jobman):
+    jobman = shared_jobman
+    job = test.Test(te_name="huge", label="label", resources={"n_core": 16})
+    jobman.add_job(job)
+    assert(jobman.create_subset(1) is None)
+    assert(job.state == test.Test.State.ERR_OTHER)
+    assert(jobman.get_leftjob_count() == 0)
+
+
+@pytest.fixture
+def eval_jobman(make_jobman):
+    notify = queue.Queue()
+    return make_jobman(validation={"scheduling": {"eval_workers": 2}},
+                       notify=notify), notify
+
+
+def test_background_evaluation(eval_jobman):
+    jobman, notify = eval_jobman
+    assert(jobman.eval_workers == 2)
+    jobs = make_chain(jobman, 3)
+    release = threading.Event()
+    evaluate = test.Test.evaluate
+
+    def slow_evaluate(job):
+        assert(release.wait(5))
+        if job is jobs[1]:
+            raise RuntimeError("plugin failure")
+        evaluate(job)
+
+    with patch.object(test.Test, "evaluate", slow_evaluate):
+        s = jobman.create_subset(1)
+        jobs[0].save_raw_run(rc=0, time=1.0)
+        jobs[0].executed()
+        # does not wait for the evaluation
+        jobman.merge_subset(s)
+        assert(jobman.evaluating == 1)
+        assert(jobman.get_leftjob_count() == 3)
+        # the dependent waits for the evaluated state
+        assert(jobman.create_subset(1) is None)
+
+        release.set()
+        jobman.complete_evaluation(notify.get(timeout=5))
+        assert(jobman.evaluating == 0)
+        assert(jobs[0].state == test.Test.State.SUCCESS)
+        assert(jobman._publisher.saved == [jobs[0]])
+
+        s = jobman.create_subset(1)
+        assert(list(s.content) == [jobs[1]])
+        jobs[1].save_raw_run(rc=0, time=1.0)
+        jobs[1].executed()
+        jobman.merge_subset(s)
+        # evaluation errors are raised to the scheduling thread
+        with pytest.raises(RuntimeError):
+            jobman.complete_evaluation(notify.get(timeout=5))
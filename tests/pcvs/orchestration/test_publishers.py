@@ -0,0 +1,428 @@
+import bz2
+import json
+import os
+import shutil
+import zipfile
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from pcvs.helpers.exceptions import PublisherException
+from pcvs.orchestration import publishers as tested
+from pcvs.testing import test
+
+
+def make_job(name, output):
+    job = test.Test(te_name=name, label="label")
+    job.save_final_result(time=1.0, state=test.Test.State.SUCCESS,
+                          out=output)
+    return job
+
+
+def test_result_file(tmpdir):
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    jobs = [make_job("job{}".format(i), "output #{}".format(i).encode() * i)
+            for i in range(20)]
+    for job in jobs:
+        hdl.save(job.jid, job.to_json(), job.raw_output)
+
+    # random access, even before any flush
+    for job in reversed(jobs):
+        res = hdl.retrieve_test(id=job.jid)
+        assert(len(res) == 1)
+        assert(res[0].output == job.output)
+    hdl.close()
+
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(sorted(j.output for j in hdl.content) ==
+           sorted(j.output for j in jobs))
+    assert(os.path.isfile(os.path.join(str(tmpdir), "jobs-0.zlib")))
+    assert(not os.path.exists(os.path.join(str(tmpdir), "jobs-0.bz2")))
+
+    with pytest.raises(PublisherException.BadMagicTokenError):
+        hdl.extract_output(1, 10, hdl.rawdata_prefix)
+
+
+def test_result_file_blocks(tmpdir):
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    jobs = [make_job("job{}".format(i), "output #{}\n".format(i).encode() * 100)
+            for i in range(10)]
+    for job in jobs:
+        hdl.save(job.jid, job.to_json(), job.raw_output)
+    # outputs are kept until the block is full, jobs are journaled then
+    assert(os.path.getsize(os.path.join(str(tmpdir), "jobs-0.zlib")) == 0)
+    assert(os.path.getsize(os.path.join(str(tmpdir), "jobs-0.jsonl")) == 0)
+    hdl.flush()
+
+    # a single block, records following each other
+    outputs = [hdl.metadata[j.jid]['result']['output'] for j in jobs]
+    assert(len(set((o['offset'], o['length']) for o in outputs)) == 1)
+    assert([o['record_offset'] for o in outputs] ==
+           [sum(len(j.raw_output) for j in jobs[:i]) for i in range(10)])
+    assert(os.path.getsize(os.path.join(str(tmpdir), "jobs-0.zlib")) <
+           sum(len(j.raw_output) for j in jobs) // 10)
+    hdl.close()
+
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    for job in jobs:
+        assert(hdl.retrieve_test(id=job.jid)[0].raw_output == job.raw_output)
+
+
+def test_frame_result_file(tmpdir):
+    # data layout as written by previous versions: one zlib frame per job
+    jobs = [make_job("job{}".format(i), "frame #{}".format(i).encode())
+            for i in range(5)]
+    metadata = {}
+    with open(os.path.join(str(tmpdir), "jobs-0.zlib"), "wb") as fh:
+        for job in jobs:
+            data = job.to_json()
+            raw = tested.ResultFile.BYTES_MAGIC_TOKEN.encode() + job.raw_output
+            data['result']['output'] = {'file': "jobs-0.zlib",
+                                        'offset': fh.tell(),
+                                        'length': fh.write(zlib.compress(raw))}
+            metadata[job.jid] = data
+    with open(os.path.join(str(tmpdir), "jobs-0.json"), "w") as fh:
+        json.dump(metadata, fh)
+
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(hdl.retrieve_test(id=jobs[3].jid)[0].output == "frame #3")
+    assert(sorted(j.output for j in hdl.content) ==
+           sorted(j.output for j in jobs))
+
+
+def test_legacy_result_file(tmpdir):
+    # data layout as written by previous versions: one BZ2 stream
+    jobs = [make_job("job{}".format(i), "legacy #{}".format(i).encode())
+            for i in range(5)]
+    metadata = {}
+    with bz2.open(os.path.join(str(tmpdir), "jobs-0.bz2"), "w") as fh:
+        for job in jobs:
+            data = job.to_json()
+            raw = tested.ResultFile.MAGIC_TOKEN.encode() + job.encoded_output
+            data['result']['output'] = {'file': "jobs-0.bz2",
+                                        'offset': fh.tell(),
+                                        'length': fh.write(raw)}
+            metadata[job.jid] = data
+    with open(os.path.join(str(tmpdir), "jobs-0.json"), "w") as fh:
+        json.dump(metadata, fh)
+
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(hdl.retrieve_test(id=jobs[3].jid)[0].output == "legacy #3")
+
+    hdl.migrate()
+    assert(not os.path.exists(os.path.join(str(tmpdir), "jobs-0.bz2")))
+    hdl.close()
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(sorted(j.output for j in hdl.content) ==
+           sorted(j.output for j in jobs))
+
+
+def test_result_file_journal(tmpdir):
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    jobs = [make_job("job{}".format(i), b"out") for i in range(5)]
+    for job in jobs:
+        hdl.save(job.jid, job.to_json(), job.raw_output)
+    hdl.flush()
+    # metadata are only journaled until the journal grows large enough
+    assert(not os.path.exists(os.path.join(str(tmpdir), "jobs-0.json")))
+
+    # interrupted run: last entry partially written
+    with open(os.path.join(str(tmpdir), "jobs-0.jsonl"), "a") as fh:
+        fh.write('["partial", {"id"')
+    content = tested.ResultFile.load_metadata(str(tmpdir), "jobs-0")
+    assert(sorted(content.keys()) == sorted(j.jid for j in jobs))
+
+    hdl.close()
+    assert(os.path.getsize(os.path.join(str(tmpdir), "jobs-0.jsonl")) == 0)
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(hdl.retrieve_test(id=jobs[2].jid)[0].output == "out")
+
+
+def test_result_file_journal_missing_data(tmpdir):
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    jobs = [make_job("job{}".format(i), "out #{}".format(i).encode())
+            for i in range(3)]
+    for job in jobs[:2]:
+        hdl.save(job.jid, job.to_json(), job.raw_output)
+    hdl.flush()
+    size = os.path.getsize(os.path.join(str(tmpdir), "jobs-0.zlib"))
+    hdl.save(jobs[2].jid, jobs[2].to_json(), jobs[2].raw_output)
+    hdl.flush()
+
+    # interrupted run: journaled, but job data did not reach the disk
+    with open(os.path.join(str(tmpdir), "jobs-0.zlib"), "r+b") as fh:
+        fh.truncate(size)
+    hdl = tested.ResultFile(str(tmpdir), "jobs-0")
+    assert(hdl.retrieve_test(id=jobs[0].jid)[0].output == "out #0")
+    res = hdl.retrieve_test(id=jobs[2].jid)[0]
+    assert(res.state == test.Test.State.SUCCESS)
+    assert(res.output == "")
+
+
+def test_result_file_manager_journal(tmpdir):
+    man = tested.ResultFileManager(prefix=str(tmpdir))
+    jobs = []
+    for i in range(4):
+        job = test.Test(te_name="job{}".format(i), label="label",
+                        tags=["tag"])
+        job.save_final_result(time=1.0, state=test.Test.State.SUCCESS,
+                              out=b"out")
+        man.save(job)
+        jobs.append(job)
+    man.flush()
+    assert(not os.path.exists(os.path.join(str(tmpdir), "views.json")))
+
+    # maps & views are rebuilt from the journal only
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.total_cnt == 4)
+    assert(len(other.status_view[str(test.Test.State.SUCCESS)]) == 4)
+    assert(len(other.tags_view['tag'][str(test.Test.State.SUCCESS)]) == 4)
+
+    man.finalize()
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.total_cnt == 4)
+    assert(len(other.tree_view['label'][str(test.Test.State.SUCCESS)]) == 4)
+    assert(other.map_id(jobs[1].jid).output == "out")
+
+
+@pytest.mark.parametrize("replaced", [False, True])
+def test_result_file_manager_interrupted_compact(tmpdir, replaced):
+    man = tested.ResultFileManager(prefix=str(tmpdir))
+    jobs = []
+    for i in range(4):
+        job = test.Test(te_name="job{}".format(i), label="label",
+                        tags=["tag"])
+        job.save_final_result(time=1.0, state=test.Test.State.SUCCESS,
+                              out=b"out")
+        man.save(job)
+        jobs.append(job)
+        if i == 1:
+            man.compact()
+
+    # the run is interrupted while compacting, before or after the new
+    # snapshot replaced the former one (the journal not being truncated yet)
+    def interrupt(src, dst):
+        if replaced:
+            real_replace(src, dst)
+        raise KeyboardInterrupt()
+
+    real_replace = os.replace
+    man.flush()
+    with patch("pcvs.orchestration.publishers.os.replace",
+               side_effect=interrupt):
+        with pytest.raises(KeyboardInterrupt):
+            man.compact()
+
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.total_cnt == 4)
+    assert(len(other.status_view[str(test.Test.State.SUCCESS)]) == 4)
+    assert(len(other.tags_view['tag'][str(test.Test.State.SUCCESS)]) == 4)
+    assert(other.map_id(jobs[3].jid).output == "out")
+
+
+def test_result_database_manager(tmpdir):
+    os.makedirs(os.path.join(str(tmpdir), "files"))
+    os.makedirs(os.path.join(str(tmpdir), "sqlite"))
+    files = tested.ResultFileManager(prefix=os.path.join(str(tmpdir), "files"))
+    db = tested.ResultDatabaseManager(prefix=os.path.join(str(tmpdir), "sqlite"))
+    jobs = []
+    for i, (subtree, state) in enumerate([("a", test.Test.State.SUCCESS),
+                                          ("a/b", test.Test.State.FAILURE),
+                                          (None, test.Test.State.SUCCESS)]):
+        job = test.Test(te_name="job{}".format(i), label="label",
+                        subtree=subtree, tags=["tag{}".format(i % 2)])
+        job.save_final_result(time=1.0, state=state,
+                              out="out #{}".format(i).encode())
+        files.save(job)
+        db.save(job)
+        jobs.append(job)
+    db.flush()
+
+    with pytest.raises(PublisherException.AlreadyExistJobError):
+        db.save(jobs[0])
+
+    assert(db.total_cnt == files.total_cnt == 3)
+    assert(db.status_view == files.status_view)
+    assert(db.tags_view == files.tags_view)
+    assert(db.tree_view == files.tree_view)
+    assert(db.subtree_view("label/a") == files.subtree_view("label/a"))
+    assert(db.subtree_view("label/none") is None)
+    assert(db.map_id(jobs[1].jid).output == "out #1")
+    assert(db.retrieve_test("unknown") is None)
+    assert([j.jid for j in db.retrieve_tests_by_name(jobs[2].name)] ==
+           [jobs[2].jid])
+    assert(len(db.retrieve_tests_by_name("label/a")) == 2)
+    assert(sorted(j.output for j in db.browse_tests()) ==
+           sorted(j.output for j in files.browse_tests()))
+    db.finalize()
+    files.finalize()
+
+    # the backend is detected when loading existing results
+    buildir = os.path.join(str(tmpdir), "build")
+    os.makedirs(os.path.join(buildir, "rawdata"))
+    shutil.copy(os.path.join(str(tmpdir), "sqlite", "results.db"),
+                os.path.join(buildir, "rawdata"))
+    man = tested.BuildDirectoryManager(build_dir=buildir)
+    man.init_results()
+    assert(isinstance(man.results, tested.ResultDatabaseManager))
+    assert(man.results.total_cnt == 3)
+    man.finalize()
+
+
+def test_job_id_set():
+    table = ["j{}".format(i) for i in range(10)]
+    evens = tested.JobIdSet(table, range(0, 10, 2))
+    small = tested.JobIdSet(table, [1, 2, 3, 4])
+    assert(len(evens) == 5)
+    assert(list(evens & small) == ["j2", "j4"])
+    assert(list(evens | small) == ["j0", "j1", "j2", "j3", "j4", "j6", "j8"])
+    assert(list(small - evens) == ["j1", "j3"])
+    assert(tested.JobIdSet.load(table, evens.dump()) == evens)
+    assert(evens == ["j0", "j2", "j4", "j6", "j8"])
+
+
+def test_result_file_manager_views(tmpdir):
+    man = tested.ResultFileManager(prefix=str(tmpdir))
+    jobs = []
+    for i in range(6):
+        job = test.Test(te_name="job{}".format(i), label="label",
+                        subtree="a/b" if i % 2 else "a",
+                        tags=["MPI"] if i % 3 else [])
+        state = test.Test.State.FAILURE if i < 3 else test.Test.State.SUCCESS
+        job.save_final_result(time=1.0, state=state, out=b"")
+        man.save(job)
+        jobs.append(job)
+
+    failed = man.status_view[str(test.Test.State.FAILURE)]
+    mpi = man.tags_view['MPI']
+    tagged = mpi[str(test.Test.State.FAILURE)] | mpi[str(test.Test.State.SUCCESS)]
+    assert(list(failed & tagged) == [jobs[1].jid, jobs[2].jid])
+    assert(len(man.subtree_view("label/a/b")[str(test.Test.State.SUCCESS)]) == 2)
+    man.finalize()
+
+    views = man.views
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.views == views)
+
+    # maps.json & views.json as stored by previous versions (job ids)
+    with open(os.path.join(str(tmpdir), "maps.json"), "w") as fh:
+        json.dump(other._mapdata, fh)
+    with open(os.path.join(str(tmpdir), "views.json"), "w") as fh:
+        json.dump({name: {k: list(v) if isinstance(v, tested.JobIdSet) else
+                          {s: list(ids) for s, ids in v.items()}
+                          for k, v in view.items()}
+                   for name, view in views.items()}, fh)
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.views == views)
+    assert(other.map_id(list(other.tags_view['MPI'][str(
+        test.Test.State.SUCCESS)])[0]).jid == jobs[4].jid)
+
+
+@pytest.mark.parametrize("fsync", tested.AsyncResultPublisher.FSYNC_POLICIES)
+def test_async_result_publisher(tmpdir, fsync):
+    man = tested.ResultFileManager(prefix=str(tmpdir))
+    pub = tested.AsyncResultPublisher(man, queue_size=2, fsync=fsync)
+    jobs = [make_job("job{}".format(i), "out #{}".format(i).encode())
+            for i in range(100)]
+    for job in jobs:
+        pub.save(job)
+    pub.flush()
+
+    # reads wait for pending jobs to be written
+    assert(pub.total_cnt == 100)
+    assert(pub.map_id(jobs[42].jid).output == "out #42")
+
+    pub.save(jobs[0])
+    with pytest.raises(PublisherException.WriterError):
+        pub.drain()
+    with pytest.raises(PublisherException.WriterError):
+        pub.finalize()
+    pub.finalize()
+
+    other = tested.ResultFileManager(prefix=str(tmpdir))
+    assert(other.total_cnt == 100)
+
+
+def test_archive(tmpdir):
+    buildir = str(tmpdir)
+    man = tested.BuildDirectoryManager(build_dir=buildir)
+    man.save_config({"validation": {"output": buildir}})
+    open(os.path.join(buildir, "pcvs-debug.log"), "w").close()
+    man.init_results()
+    jobs = [make_job("job{}".format(i), "output #{}".format(i).encode() * i)
+            for i in range(10)]
+    for job in jobs:
+        man.results.save(job)
+    path = man.create_archive()
+    assert(path.endswith(".zip"))
+
+    hdl = tested.BuildDirectoryManager.load_from_archive(path)
+    try:
+        # job outputs are not extracted, but read from the archive
+        resdir = os.path.join(hdl.prefix, "rawdata")
+        assert(not [f for f in os.listdir(resdir) if f.endswith(".zlib")])
+        hdl.init_results()
+        assert(hdl.results.total_cnt == 10)
+        assert(hdl.results.map_id(jobs[7].jid).output == "output #7" * 7)
+        assert(sorted(j.output for j in hdl.results.browse_tests()) ==
+               sorted(j.output for j in jobs))
+        hdl.finalize()
+    finally:
+        shutil.rmtree(os.path.dirname(hdl.prefix))
+
+
+def test_incremental_archive(tmpdir):
+    buildir = str(tmpdir)
+    man = tested.BuildDirectoryManager(build_dir=buildir)
+    man.save_config({"validation": {"output": buildir}})
+    open(os.path.join(buildir, "pcvs-debug.log"), "w").close()
+    path = man.start_archive(codec='lzma')
+    # a new result file every ~1KB
+    man.init_results(per_file_max_sz=1024)
+    jobs = [make_job("job{}".format(i), os.urandom(512)) for i in range(10)]
+    for job in jobs:
+        man.results.save(job)
+
+    with zipfile.ZipFile(path) as archive:
+        sealed = [n for n in archive.namelist() if n.endswith(".zlib")]
+    assert(len(sealed) > 1)
+
+    assert(man.create_archive() == path)
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        assert(len(names) == len(set(names)))
+        info = archive.getinfo(sealed[0])
+        assert(info.compress_type == zipfile.ZIP_STORED)
+
+    hdl = tested.BuildDirectoryManager.load_from_archive(path)
+    try:
+        hdl.init_results()
+        assert(sorted(j.raw_output for j in hdl.results.browse_tests()) ==
+               sorted(j.raw_output for j in jobs))
+        hdl.finalize()
+    finally:
+        shutil.rmtree(os.path.dirname(hdl.prefix))
+
+
+def test_output_deduplication(tmpdir):
+    man = tested.ResultFileManager(prefix=str(tmpdir), per_file_max_sz=1024)
+    jobs = [make_job("job{}".format(i), b"PASSED\n" * 100 if i % 2
+                     else os.urandom(600)) for i in range(10)]
+    for job in jobs:
+        man.save(job)
+    assert(len(man._opened_files) > 1)
+    assert(man.output_stats == {'total': 5 * 600 + 5 * 700,
+                                'stored': 5 * 600 + 700})
+    man.finalize()
+
+    # identical outputs are stored once, possibly referenced by another file
+    man = tested.ResultFileManager(prefix=str(tmpdir))
+    stored = set()
+    for job in man.browse_tests():
+        stored.add((job.output_info['file'], job.output_info['offset'],
+                    job.output_info['record_offset']))
+    assert(len(stored) == 6)
+    for job in jobs:
+        assert(man.map_id(job.jid).raw_output == job.raw_output)
+    man.finalize()
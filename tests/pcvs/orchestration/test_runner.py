@@ -0,0 +1,234 @@
+import os
+import queue
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pcvs.helpers import system
+from pcvs.helpers.exceptions import RunnerException
+from pcvs.orchestration import runner as tested
+from pcvs.orchestration.set import Set
+from pcvs.testing import test
+
+
+def make_set(name, command, kill_after=None):
+    s = Set(execmode=Set.ExecMode.LOCAL)
+    s.add(test.Test(te_name=name, label="label", command=command,
+                    kill_after=kill_after))
+    return s
+
+
+@patch("pcvs.helpers.system.MetaConfig.root", system.MetaConfig({}))
+def test_build_runners():
+    rq, cq = queue.Queue(), queue.Queue()
+    runners = tested.build_runners("thread", "/tmp", rq, cq, 4)
+    assert(len(runners) == 4)
+    assert(all(type(r) == tested.RunnerAdapter for r in runners))
+
+    runners = tested.build_runners("asyncio", "/tmp", rq, cq, 4)
+    assert(len(runners) == 1)
+    assert(isinstance(runners[0], tested.AsyncRunnerAdapter))
+
+    runners = tested.build_runners("worker", "/tmp", rq, cq, 2)
+    assert(len(runners) == 2)
+    assert(all(isinstance(r, tested.WorkerRunnerAdapter) for r in runners))
+    for r in runners:
+        r._worker.stop()
+
+    with pytest.raises(RunnerException.UnknownEngineError):
+        tested.build_runners("fork", "/tmp", rq, cq, 4)
+
+
+@patch("pcvs.helpers.system.MetaConfig.root",
+       system.MetaConfig({"validation": {"job_timeout": 30}}))
+@patch("pcvs.io.console")
+def test_async_runner(mock_console):
+    rq, cq = queue.Queue(), queue.Queue()
+    r = tested.AsyncRunnerAdapter("/tmp", ready=rq, complete=cq,
+                                  concurrency=8)
+    sets = [make_set("job{}".format(i), "sleep 0.5; echo job{}".format(i))
+            for i in range(8)]
+    sets.append(make_set("fail", "exit 3"))
+    sets.append(make_set("hang", "echo start; sleep 10", kill_after=0.5))
+    tested.RunnerAdapter.sched_in_progress = True
+    r.start()
+    for s in sets:
+        rq.put(s)
+
+    done = [cq.get(timeout=5) for _ in sets]
+    rq.put(None)
+    r.join(timeout=5)
+    assert(not r.is_alive())
+    assert(sorted(s.id for s in done) == sorted(s.id for s in sets))
+
+    jobs = {j.te_name: j for s in sets for j in s.content}
+    assert(jobs["job3"].retcode == 0)
+    assert(jobs["job3"].output.strip() == "job3")
+    # jobs are run concurrently
+    assert(jobs["job3"].time < 2)
+    assert(jobs["fail"].retcode == 3)
+    assert(jobs["hang"].retcode == test.Test.Timeout_RC)
+    assert(jobs["hang"].output.strip() == "start")
+
+
+@patch("pcvs.helpers.system.MetaConfig.root",
+       system.MetaConfig({"validation": {"job_timeout": 30}}))
+@patch("pcvs.io.console")
+def test_async_runner_launch_off_loop(mock_console):
+    rq, cq = queue.Queue(), queue.Queue()
+    r = tested.AsyncRunnerAdapter("/tmp", ready=rq, complete=cq,
+                                  concurrency=2)
+    threads = []
+    process_args = tested.process_args
+
+    def slow_process_args(job):
+        threads.append(threading.current_thread())
+        if job.te_name == "slow":
+            # i.e. loading a package-manager environment
+            time.sleep(1)
+        return process_args(job)
+
+    sets = [make_set("slow", "true"), make_set("fast", "true")]
+    tested.RunnerAdapter.sched_in_progress = True
+    with patch("pcvs.orchestration.runner.process_args", slow_process_args):
+        r.start()
+        rq.put(sets[0])
+        rq.put(sets[1])
+        # the other Set is not stalled
+        assert(cq.get(timeout=5) is sets[1])
+        assert(cq.get(timeout=5) is sets[0])
+        rq.put(None)
+        r.join(timeout=5)
+    assert(r not in threads)
+
+
+@patch("pcvs.helpers.system.MetaConfig.root",
+       system.MetaConfig({"validation": {"job_timeout": 30}}))
+@patch("pcvs.io.console")
+def test_async_runner_failure(mock_console):
+    rq, cq = queue.Queue(), queue.Queue()
+    r = tested.AsyncRunnerAdapter("/tmp", ready=rq, complete=cq,
+                                  concurrency=2)
+    s = make_set("broken", "true")
+    tested.RunnerAdapter.sched_in_progress = True
+    with patch("pcvs.orchestration.runner.process_args",
+               side_effect=RuntimeError("launch failure")):
+        r.start()
+        rq.put(s)
+        # the Set is given back, its jobs flagged as executed
+        assert(cq.get(timeout=5) is s)
+        rq.put(None)
+        r.join(timeout=5)
+    job = list(s.content)[0]
+    assert(job.been_executed())
+    assert(job.retcode == 1)
+    assert(job.output == "launch failure")
+
+
+def test_shell_worker(tmpdir):
+    worker = tested.ShellWorker("PCVS_PROFILE=loaded; export PCVS_PROFILE",
+                                outdir=str(tmpdir))
+    rc, _, out = worker.run('echo "$PCVS_PROFILE"; exit 4')
+    assert(rc == 4)
+    assert(out.strip() == b"loaded")
+    pid = worker._proc.pid
+
+    # directory changes & env deltas do not leak to the next job
+    job = test.Test(te_name="env", label="label", wd=str(tmpdir),
+                    environment=["MY_VAR=a value"],
+                    command='echo "$MY_VAR"; pwd')
+    rc, _, out = worker.run(job.generate_worker_script())
+    assert(rc == 0)
+    assert(out.split(b"\n")[:2] == [b"a value", str(tmpdir).encode()])
+    rc, _, out = worker.run('echo "${MY_VAR:-unset}"; pwd')
+    assert(out.split(b"\n")[0] == b"unset")
+    assert(out.split(b"\n")[1] != str(tmpdir).encode())
+
+    rc, final, out = worker.run("echo start; sleep 10", timeout=0.5)
+    assert(rc == test.Test.Timeout_RC)
+    assert(final == 0.5)
+    assert(out.strip() == b"start")
+
+    # the same process served every job
+    assert(worker._proc.pid == pid)
+    worker.stop()
+    assert(not worker.alive)
+    assert(os.listdir(str(tmpdir)) == [])
+
+
+@patch("pcvs.helpers.system.MetaConfig.root",
+       system.MetaConfig({"validation": {"job_timeout": 30,
+                                         "simulated": False}}))
+def test_direct_exec(tmpdir):
+    job = test.Test(te_name="direct", label="label", direct_exec=True,
+                    wd=str(tmpdir), environment=["MY_VAR=a value"],
+                    command="sh -c 'echo \"$MY_VAR\"; pwd'")
+    args = tested.process_args(job)
+    assert(args['shell'] is False)
+    assert(args['args'] == ["sh", "-c", 'echo "$MY_VAR"; pwd'])
+    assert(args['env']['MY_VAR'] == "a value")
+    assert(args['cwd'] == str(tmpdir))
+
+    r = tested.RunnerAdapter("/tmp")
+    rc, _, out = r.run_job(job)
+    assert(rc == 0)
+    assert(out == "a value\n{}\n".format(tmpdir).encode())
+
+    rc, _, _ = r.run_job(test.Test(te_name="none", label="label",
+                                   direct_exec=True,
+                                   command="/this/does/not/exist"))
+    assert(rc == 127)
+
+
+def test_environment_snapshot():
+    env = tested.environment_snapshot("PCVS_SNAP=loaded; export PCVS_SNAP")
+    assert(env['PCVS_SNAP'] == "loaded")
+    assert(tested.environment_snapshot(
+        "PCVS_SNAP=loaded; export PCVS_SNAP") is env)
+    with pytest.raises(RunnerException.LaunchError):
+        tested.environment_snapshot("exit 3")
+
+
+@patch("pcvs.helpers.system.MetaConfig.root", system.MetaConfig({}))
+def test_remote_context(tmpdir):
+    s = make_set("multiline", "true")
+    job = list(s.content)[0]
+    job.save_raw_run(rc=1, time=2.0, out=b"first\nsecond\n\x00\xff")
+
+    path = os.path.join(str(tmpdir), str(s.id))
+    os.makedirs(path)
+    ctx = tested.RemoteContext(str(tmpdir), s)
+    ctx.save_result_to_disk(job)
+    ctx.mark_as_completed()
+
+    s = make_set("multiline", "true")
+    tested.RemoteContext(path).load_result_from_disk(s)
+    job = list(s.content)[0]
+    assert(job.raw_output == b"first\nsecond\n\x00\xff")
+    assert(job.retcode == 1)
+
+
+@patch("pcvs.helpers.system.MetaConfig.root",
+       system.MetaConfig({"validation": {"job_timeout": 30,
+                                         "simulated": False,
+                                         "result": {"output_cap": 1,
+                                                    "output_spill": True}}}))
+def test_bounded_output(tmpdir):
+    job = test.Test(te_name="verbose", label="label",
+                    matchers={"mid": {"expr": "^50000$"}},
+                    command="seq 100000")
+    r = tested.RunnerAdapter(str(tmpdir))
+    capture = tested.new_capture(job, str(tmpdir))
+    rc, _, out = r.run_job(job, capture)
+    job.save_raw_run(rc=rc, time=1.0, out=out)
+    job.save_capture(capture)
+    assert(rc == 0)
+    assert(len(out) < 3 * 1024)
+    assert(job.output_info['truncated'] is True)
+    assert(job.output_info['size'] == len(b"".join(
+        b"%d\n" % i for i in range(1, 100001))))
+    assert(os.path.isfile(job.output_info['spill']))
+    job.evaluate()
+    assert(job.state == test.Test.State.SUCCESS)
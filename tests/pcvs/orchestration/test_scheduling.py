@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from pcvs import NAME_BUILD_RESDIR
+from pcvs.helpers.exceptions import OrchestratorException
+from pcvs.orchestration import scheduling as tested
+from pcvs.orchestration.publishers import ResultDatabaseManager
+from pcvs.testing import test
+
+
+def make_job(name, time=-1, deps=[]):
+    job = test.Test(te_name=name, label="label", time=time)
+    for d in deps:
+        job._depnames.append(d.name)
+        job.resolve_a_dep(d.name, d)
+    return job
+
+
+def test_build_policy():
+    assert(isinstance(tested.build_policy("fifo"), tested.SchedPolicy))
+    assert(isinstance(tested.build_policy("critical_path"),
+                      tested.CriticalPathPolicy))
+    with pytest.raises(OrchestratorException.UnknownPolicyError):
+        tested.build_policy("random")
+
+
+def test_ready_heap():
+    heap = tested.ReadyHeap(key=lambda x: x % 10, iterable=[15, 3, 22])
+    heap.append(13)
+    assert(len(heap) == 4)
+    assert(sorted(heap) == [3, 13, 15, 22])
+    # same keys are returned in insertion order
+    assert([heap.popleft() for _ in range(4)] == [22, 3, 13, 15])
+
+    heap.append(5)
+    heap.appendleft(25)
+    assert(heap.popleft() == 25)
+
+
+def test_estimate():
+    policy = tested.SchedPolicy(history={"label/a": 12.0})
+    assert(policy.estimate(make_job("a", time=3)) == 12.0)
+    assert(policy.estimate(make_job("b", time=3)) == 3)
+    assert(policy.estimate(make_job("c")) == 0)
+
+
+def test_critical_path():
+    # compile (1s) -> short run (2s)
+    # compile (1s) -> long run (10s)
+    # independent (5s)
+    comp = make_job("comp", time=1)
+    short = make_job("short", time=2, deps=[comp])
+    long = make_job("long", time=10, deps=[comp])
+    alone = make_job("alone", time=5)
+
+    policy = tested.CriticalPathPolicy()
+    policy.prepare([comp, alone, short, long])
+    queue = policy.new_queue([alone, comp])
+    assert(queue.popleft() == comp)
+    assert(queue.popleft() == alone)
+
+    queue.append(short)
+    queue.append(long)
+    assert(queue.popleft() == long)
+
+
+def test_durations_from_buildir(tmpdir):
+    resdir = os.path.join(tmpdir, NAME_BUILD_RESDIR)
+    os.makedirs(resdir)
+    content = {}
+    for name, state, time in [("a", test.Test.State.SUCCESS, 4.2),
+                              ("b", test.Test.State.FAILURE, 1.0),
+                              ("c", test.Test.State.ERR_DEP, 0.0)]:
+        job = test.Test(te_name=name, label="label")
+        job.save_final_result(time=time, state=state)
+        data = job.to_json()
+        data['result']['output'] = {'file': "", 'offset': -1, 'length': 0}
+        content[job.jid] = data
+    with open(os.path.join(resdir, "jobs-0.json"), "w") as fh:
+        json.dump(content, fh)
+
+    assert(tested.durations_from_buildir(tmpdir) == {"label/a": 4.2,
+                                                     "label/b": 1.0})
+    assert(tested.durations_from_buildir(os.path.join(tmpdir, "none")) == {})
+
+
+def test_durations_from_database(tmpdir):
+    resdir = os.path.join(tmpdir, NAME_BUILD_RESDIR)
+    os.makedirs(resdir)
+    hdl = ResultDatabaseManager(prefix=resdir)
+    job = test.Test(te_name="a", label="label")
+    job.save_final_result(time=4.2, state=test.Test.State.SUCCESS)
+    hdl.save(job)
+    hdl.finalize()
+
+    assert(tested.durations_from_buildir(tmpdir) == {"label/a": 4.2})
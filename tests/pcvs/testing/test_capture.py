@@ -0,0 +1,70 @@
+import gzip
+import os
+
+from pcvs.testing import capture as tested
+
+
+def test_output_capture_unlimited():
+    cap = tested.OutputCapture()
+    for i in range(100):
+        cap.feed(b"line %d\n" % i)
+    cap.close()
+    assert(not cap.truncated)
+    assert(cap.output == b"".join(b"line %d\n" % i for i in range(100)))
+    assert(cap.info == {'size': len(cap.output), 'truncated': False})
+    assert(cap.scan is None)
+
+
+def test_output_capture_head_tail(tmpdir):
+    spill = os.path.join(str(tmpdir), "spill", "job.gz")
+    scanner = tested.OutputScanner(tested.OutputPatterns(
+        matchers={"middle": {"expr": "^line 5000$"},
+                  "never": {"expr": "not printed"}},
+        metrics={"values": {"key": r"line (\d+)0000"}}))
+    cap = tested.OutputCapture(limit=64, spill=spill, scanner=scanner)
+    out = b"".join(b"line %d\n" % i for i in range(50000))
+    for i in range(0, len(out), 1000):
+        cap.feed(out[i:i+1000])
+    cap.close()
+
+    assert(cap.truncated)
+    assert(cap.info == {'size': len(out), 'truncated': True, 'spill': spill})
+    head, tail = cap.output.split(b"\n[PCVS: ", 1)
+    assert(head == out[:64])
+    assert(tail.endswith(out[-64:]))
+    with gzip.open(spill) as fh:
+        assert(fh.read() == out[64:-64])
+
+    # matchers & metrics were evaluated over the whole output
+    assert(cap.scan['matchers'] == {"middle": True, "never": False})
+    assert(cap.scan['metrics']['values'] == ["1", "2", "3", "4"])
+
+
+def test_output_capture_drop():
+    cap = tested.OutputCapture(limit=4)
+    cap.feed(b"0123456789")
+    cap.close()
+    assert(cap.output == b"0123\n[PCVS: 2 bytes omitted]\n6789")
+    assert('spill' not in cap.info)
+    assert(cap.scan is None)
+
+
+def test_output_patterns():
+    patterns = tested.OutputPatterns(
+        matchers={"ok": {"expr": r"^PASS$"}, "err": {"expr": "error"}},
+        metrics={"time": {"key": r"time=(\d+\.\d+)"},
+                 "span": {"key": r"begin\n(\w+)\nend"}})
+    out = b"time=1.5\nbegin\nfoo\nend\ntime=2.0\n\xff\nPASS"
+    assert(patterns.scan(out) == {
+        'matchers': {"ok": False, "err": False},
+        'metrics': {"time": ["1.5", "2.0"], "span": ["foo"]}})
+    # compiled once, reused by every scan & scanner
+    assert(patterns.matchers["ok"] is patterns.matchers["ok"])
+    scanner = tested.OutputScanner(patterns)
+    scanner.feed(out)
+    scanner.close()
+    assert(scanner.results['metrics']["time"] == ["1.5", "2.0"])
+
+    empty = tested.OutputPatterns()
+    assert(empty.empty)
+    assert(empty.scan(b"\xff") == {'matchers': {}, 'metrics': {}})
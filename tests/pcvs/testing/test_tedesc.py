@@ -78,6 +78,9 @@ def test_handle_job_deps(mock_id):
     "compiler": {
       "cc": {'program': "/path/to/cc"}
     },
+    "machine": {
+        "resources": {"n_mpi": 4, "n_core": 8}
+    },
     "criterion": {
         "n_mpi": {"option": "-n ", "numeric": True, "values": [1, 2, 3, 4]}}
 }))
@@ -95,6 +98,7 @@ def test_tedesc_regular():
             "group": "GRPSERIAL",
             "run": {
                 "program": "test_MPI_2INT",
+                "resources": {"n_core": 2},
                 "iterate": {
                     "n_mpi": {
                         "values": [1, 2, 3, 4]
@@ -115,6 +119,11 @@ def test_tedesc_regular():
     assert(tedesc.name == "te_name")
     for i in tedesc.construct_tests():
         print(i.command)
+        if "compilation" in i.tags:
+            assert(i.resources == {"n_node": 1})
+        else:
+            assert(i.get_dim("n_mpi") == i.combination.get("n_mpi", 0))
+            assert(i.get_dim("n_core") == 2)
 
     
     with pytest.raises(exceptions.TestException.TestExpressionError):
@@ -1,3 +1,5 @@
+import base64
+import json
 from unittest.mock import patch
 
 from pcvs.helpers import log, pm, system
@@ -26,6 +28,7 @@ def test_Test():
         artifacts={},
         command = "testcommand", 
         dim = 10,
+        resources = {"n_core": 4},
         te_name = "testte_name",
         subtree = "testsubtree",
         wd = "testchdir",
@@ -37,6 +40,9 @@ def test_Test():
     assert(test.name == "label/testsubtree/testte_name")
     assert(test.command == "testcommand")
     assert(test.get_dim() == 10)
+    assert(test.get_dim("n_core") == 4)
+    assert(test.get_dim("mem") == 0)
+    assert(test.resources == {"n_node": 10, "n_core": 4})
     assert(not test.been_executed())
     assert(test.state == tested.Test.State.WAITING)
     test.executed()
@@ -48,3 +54,18 @@ def test_Test():
 
     test.save_final_result()
     test.generate_script("output_file.sh")
+
+
+def test_output_encoding():
+    job = tested.Test(te_name="job", label="label")
+    job.save_final_result(out=b"raw\noutput")
+    assert(job.raw_output == b"raw\noutput")
+    assert(job.output == "raw\noutput")
+
+    data = job.to_json()
+    assert(base64.b64decode(data['result']['output']['raw']) == b"raw\noutput")
+    assert('raw' not in job.to_json(raw_output=False)['result']['output'])
+
+    other = tested.Test()
+    other.from_json(json.loads(json.dumps(data)))
+    assert(other.raw_output == b"raw\noutput")
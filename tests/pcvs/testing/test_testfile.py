@@ -1,6 +1,7 @@
 import getpass
 import os
 import pathlib
+import subprocess
 from unittest.mock import patch
 
 import pytest
@@ -11,6 +12,7 @@ import pcvs
 from pcvs import NAME_BUILDIR, PATH_INSTDIR
 from pcvs.helpers import log, pm, system
 from pcvs.plugins import Collection
+from pcvs.testing import test
 from pcvs.testing import testfile as tested
 
 
@@ -106,3 +108,47 @@ def test_TestFile(tedesc, isolated_yml_test):
     testfile.process()
     testfile.generate_debug_info()
     testfile.flush_sh_file()
+
+
+class DummyOrchestrator:
+    def __init__(self):
+        self.jobs = []
+
+    def add_new_job(self, job):
+        self.jobs.append(job)
+
+
+@pytest.mark.parametrize("script_format", ["indexed", "case"])
+def test_flush_sh_file_formats(script_format, tmpdir):
+    orch = DummyOrchestrator()
+    config = system.MetaConfig({
+        "validation": {"simulated": False, "script_format": script_format}})
+    config.set_internal("orchestrator", orch)
+    with patch("pcvs.helpers.system.MetaConfig.root", config):
+        testfile = tested.TestFile(None, str(tmpdir), data={}, label="label")
+        testfile._tests = [
+            test.Test(te_name="te{}".format(i), label="label",
+                        subtree="sub", environment=["VAR=val{}".format(i)],
+                        command='echo "$VAR"')
+            for i in range(3)]
+        testfile.flush_sh_file()
+    assert(orch.jobs == testfile._tests)
+
+    script = os.path.join(str(tmpdir), "list_of_tests.sh")
+
+    def launch(*args, **env):
+        full_env = dict(os.environ)
+        full_env.update(env)
+        return subprocess.run(["bash", script] + list(args),
+                              env=full_env, capture_output=True)
+
+    res = launch("label/sub/te1")
+    assert(res.returncode == 0)
+    assert(res.stdout == b"val1\n")
+    assert(launch("--list").stdout.split() ==
+           [b"label/sub/te0", b"label/sub/te1", b"label/sub/te2"])
+    assert(launch("label/sub/nope").returncode == 1)
+
+    res = launch("label/sub/te2", PCVS_SHOW="1", PCVS_SHOW_ENV="1",
+                 PCVS_SHOW_CMD="1")
+    assert(res.stdout == b"VAR=val2; export VAR\necho \"$VAR\"\n")
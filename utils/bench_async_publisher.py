@@ -0,0 +1,73 @@
+import sys
+import tempfile
+import time
+
+from pcvs.orchestration.publishers import (AsyncResultPublisher, ResultFile,
+                                           ResultFileManager)
+from pcvs.testing.test import Test
+
+# Measure scheduling latency (time the orchestrator spends publishing a job)
+# when results are written to a slow file system. Throttling is emulated by
+# delaying every result write and every flush (e.g. a loaded Lustre/GPFS),
+# jobs completing at a fixed interval.
+#
+# usage: python3 utils/bench_async_publisher.py [nb_jobs] [interval_ms]
+#                                               [write_ms] [flush_ms]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+JOB_INTERVAL = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+WRITE_DELAY = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.001
+FLUSH_DELAY = float(sys.argv[4]) / 1000 if len(sys.argv) > 4 else 0.02
+# the orchestrator flushes results every 5% of the workload
+NB_FLUSHES = 20
+
+
+def throttle(func, delay):
+    def wrapper(*args, **kwargs):
+        time.sleep(delay)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+ResultFile.save = throttle(ResultFile.save, WRITE_DELAY)
+ResultFile.flush = throttle(ResultFile.flush, FLUSH_DELAY)
+
+
+def build_job(i):
+    job = Test(te_name="job{}".format(i), label="bench",
+               subtree="dir{}".format(i % 10))
+    job.save_final_result(time=1.0, state=Test.State.SUCCESS,
+                          out=b"step done\n" * 100)
+    return job
+
+
+def bench(path, async_queue):
+    pub = ResultFileManager(prefix=path)
+    if async_queue:
+        pub = AsyncResultPublisher(pub, queue_size=async_queue)
+    jobs = [build_job(i) for i in range(NB_JOBS)]
+    lat = []
+    start = time.time()
+    for i, job in enumerate(jobs):
+        time.sleep(JOB_INTERVAL)
+        t = time.time()
+        pub.save(job)
+        if (i + 1) % max(1, NB_JOBS // NB_FLUSHES) == 0:
+            pub.flush()
+        lat.append(time.time() - t)
+    sched = sum(lat)
+    pub.finalize()
+    lat.sort()
+    return sched, time.time() - start, lat
+
+
+if __name__ == '__main__':
+    print("{} jobs (one per {} ms), {} ms per write, {} ms per flush".format(
+        NB_JOBS, JOB_INTERVAL * 1000, WRITE_DELAY * 1000, FLUSH_DELAY * 1000))
+    for name, async_queue in [("sync", 0), ("async", 1024)]:
+        with tempfile.TemporaryDirectory() as path:
+            sched, total, lat = bench(path, async_queue)
+        print("{:>6}: scheduler blocked {:.2f} s (run {:.2f} s), latency "
+              "p50 {:.3f} ms, p99 {:.3f} ms, max {:.1f} ms".format(
+                  name, sched, total, lat[len(lat) // 2] * 1000,
+                  lat[len(lat) * 99 // 100] * 1000, lat[-1] * 1000))
@@ -0,0 +1,70 @@
+import json
+import shutil
+import sys
+import tempfile
+import time
+
+from pcvs.helpers import git
+
+# Measure the time needed to build the Git tree of a run saved into a bank,
+# each test being stored as a JSON file (<label>/<subtree>/<test name>).
+# Successive insert_tree() calls (rewriting every intermediate tree on each
+# insertion) are compared to the bulk writers (pygit2 & git fast-import).
+#
+# usage: python3 utils/bench_bank_commit.py [nb_tests] [nb_tests_legacy]
+
+NB_TESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+# successive insertions grow quadratically, keep it smaller
+NB_LEGACY = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+
+def build_run(nb):
+    run = dict()
+    for i in range(nb):
+        # TE combinations share the same directory
+        name = "label{}/subtree{}/test{}_c{}".format(
+            i % 2, i % 10, i // 100, i % 100)
+        run[name] = json.dumps({"id": {"fq_name": name},
+                                "result": {"rc": 0, "state": i % 3,
+                                           "time": i * 0.01}})
+    return run
+
+
+def run(name, nb, func):
+    prefix = tempfile.mkdtemp()
+    try:
+        run = build_run(nb)
+        start = time.perf_counter()
+        func(prefix, run)
+        elapsed = time.perf_counter() - start
+        print("{:<14}: {:>6} tests, {:.2f}s ({:.1f} us/test)".format(
+            name, nb, elapsed, 1e6 * elapsed / nb))
+    finally:
+        shutil.rmtree(prefix)
+
+
+def legacy(prefix, data):
+    repo = git.GitByAPI(prefix)
+    repo.open()
+    root = None
+    for k, v in data.items():
+        root = repo.insert_tree(k, v, root)
+    root.hdl.write()
+    repo.close()
+
+
+def bulk(cls):
+    def func(prefix, data):
+        repo = cls(prefix)
+        repo.open()
+        repo.insert_trees(data)
+        repo.close()
+    return func
+
+
+if git.has_pygit2:
+    run("insert_tree", NB_LEGACY, legacy)
+    run("bulk (pygit2)", NB_LEGACY, bulk(git.GitByAPI))
+    run("bulk (pygit2)", NB_TESTS, bulk(git.GitByAPI))
+run("bulk (git)", NB_LEGACY, bulk(git.GitByCLI))
+run("bulk (git)", NB_TESTS, bulk(git.GitByCLI))
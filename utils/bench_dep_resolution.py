@@ -0,0 +1,58 @@
+import sys
+import time
+
+from pcvs.helpers.system import MetaConfig
+from pcvs.orchestration.manager import Manager
+from pcvs.plugins import Collection
+from pcvs.testing.test import Test
+
+# Measure the dependency resolution cost over a synthetic DAG, shaped like a
+# real test base: a few shared libraries, each compiled program depending on
+# one of them, and every program being run with multiple combinations.
+#
+# usage: python3 utils/bench_dep_resolution.py [nb_jobs] [runs_per_program]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+RUNS_PER_PROGRAM = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+NB_LIBS = 100
+
+
+def build_jobs(jobman):
+    nb_programs = (NB_JOBS - NB_LIBS) // (RUNS_PER_PROGRAM + 1)
+    for i in range(0, NB_LIBS):
+        jobman.add_job(Test(te_name="lib{}".format(i), label="bench",
+                            tags=["compilation"]))
+
+    for i in range(0, nb_programs):
+        prog = "prog{}".format(i)
+        jobman.add_job(Test(te_name=prog, label="bench",
+                            tags=["compilation"],
+                            job_deps=["bench/lib{}".format(i % NB_LIBS)]))
+        for j in range(0, RUNS_PER_PROGRAM):
+            # deps by jid (compilation) & by rule (all 'prog' combinations)
+            jobman.add_job(Test(te_name="run{}".format(i), label="bench",
+                                user_suffix="c{}".format(j),
+                                job_deps=["bench/{}".format(prog)]))
+    return NB_LIBS + nb_programs * (RUNS_PER_PROGRAM + 1)
+
+
+if __name__ == '__main__':
+    MetaConfig.root = MetaConfig({
+        'validation': {},
+        'machine': {'concurrent_run': 1}
+    })
+    MetaConfig.root.set_internal('pColl', Collection())
+    Manager.job_hashes.clear()
+    Manager.dep_rules.clear()
+    jobman = Manager(max_size=1)
+
+    start = time.time()
+    nb_jobs = build_jobs(jobman)
+    print("Built {} jobs in {:.3f} s".format(nb_jobs, time.time() - start))
+
+    start = time.process_time()
+    jobman.resolve_deps()
+    elapsed = time.process_time() - start
+    print("Dependency resolution:    {:.3f} s".format(elapsed))
+    print("Per 10k jobs:             {:.3f} s".format(elapsed * 10000 / nb_jobs))
+    print("Ready jobs after resolve: {}".format(len(jobman.get_dim(1))))
@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pcvs.helpers.system import MetaConfig
+from pcvs.orchestration.runner import RunnerAdapter, ShellWorker
+from pcvs.testing.test import Test
+from pcvs.testing.testfile import TestFile
+
+# Compare the launch cost of short jobs between the regular path (one
+# `bash list_of_tests.sh <name>` per job), a pre-warmed shell worker and a
+# direct exec (no shell, see the 'direct_exec' TE attribute).
+# The profile environment is emulated by a loop exporting many variables,
+# standing for `module load`/`spack load` commands.
+#
+# usage: python3 utils/bench_job_launch.py [nb_jobs] [nb_tests_in_script]
+#                                          [script_format]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+NB_TESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+SCRIPT_FORMAT = sys.argv[3] if len(sys.argv) > 3 else "indexed"
+PROFILE = 'for i in $(seq 1 200); do export PCVS_BENCH_MOD_$i=$i; done'
+
+
+class DummyOrchestrator:
+    def add_new_job(self, job):
+        pass
+
+
+def build_script(path):
+    tf = TestFile(file_in=None, path_out=path, data={}, label="bench")
+    tf._tests = [Test(te_name="t{}".format(i), label="bench",
+                      environment=["PCVS_BENCH_ID={}".format(i)],
+                      command="printenv PCVS_BENCH_ID", direct_exec=True)
+                 for i in range(NB_TESTS)]
+    tf.flush_sh_file()
+    return tf._tests
+
+
+def bench_direct(jobs):
+    runner = RunnerAdapter(buildir=None)
+    start = time.time()
+    for job in jobs:
+        rc, _, _ = runner.run_job(job)
+        assert(rc == 0)
+    return time.time() - start
+
+
+def bench_popen(jobs):
+    start = time.time()
+    for job in jobs:
+        p = subprocess.Popen(job.invocation_command, shell=True,
+                             stderr=subprocess.STDOUT, stdout=subprocess.PIPE,
+                             start_new_session=True)
+        p.communicate()
+        assert(p.returncode == 0)
+    return time.time() - start
+
+
+def bench_worker(jobs):
+    worker = ShellWorker(TestFile.profile_pm_string())
+    start = time.time()
+    for job in jobs:
+        rc, _, _ = worker.run(job.generate_worker_script())
+        assert(rc == 0)
+    elapsed = time.time() - start
+    worker.stop()
+    return elapsed
+
+
+if __name__ == '__main__':
+    MetaConfig.root = MetaConfig({'validation': {
+        'simulated': False, 'script_format': SCRIPT_FORMAT,
+        'job_timeout': 60}})
+    MetaConfig.root.set_internal('orchestrator', DummyOrchestrator())
+    TestFile.cc_pm_string = PROFILE
+
+    with tempfile.TemporaryDirectory() as path:
+        tests = build_script(path)
+        jobs = [tests[i % NB_TESTS] for i in range(NB_JOBS)]
+        popen = bench_popen(jobs)
+        worker = bench_worker(jobs)
+        direct = bench_direct(jobs)
+
+    print("{} jobs, {} tests per script ({})".format(
+        NB_JOBS, NB_TESTS, SCRIPT_FORMAT))
+    print("bash list_of_tests.sh: {:.3f} s ({:.2f} ms/job)".format(
+        popen, popen * 1000 / NB_JOBS))
+    print("shell worker:          {:.3f} s ({:.2f} ms/job)".format(
+        worker, worker * 1000 / NB_JOBS))
+    print("direct exec:           {:.3f} s ({:.2f} ms/job)".format(
+        direct, direct * 1000 / NB_JOBS))
+    print("Speedup (worker):      x{:.1f}".format(popen / worker))
+    print("Speedup (direct):      x{:.1f}".format(popen / direct))
@@ -0,0 +1,71 @@
+import base64
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from pcvs.orchestration.publishers import ResultFile, ResultFileManager
+from pcvs.testing.test import Test
+
+# Measure throughput & peak memory of the output pipeline (saving the run,
+# matching regexes, storing the result) for jobs printing a large output.
+# Outputs are now kept raw, the former pipeline (outputs base64-encoded when
+# saved and decoded back for matching) is emulated for comparison.
+#
+# usage: python3 utils/bench_large_output.py [output_MiB] [nb_jobs]
+
+OUTPUT_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+NB_JOBS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+MATCHERS = {"m{}".format(i): {"expr": "step {} done".format(i)}
+            for i in range(4)}
+
+
+def build_output():
+    line = b"step %d done: residual=0.%012d\n"
+    out = b"".join(line % (i % 8, i * 7919) for i in range(OUTPUT_SIZE << 15))
+    return out[:OUTPUT_SIZE << 20]
+
+
+def run_raw(man, i, out):
+    job = Test(te_name="job{}".format(i), label="bench", matchers=MATCHERS)
+    job.save_raw_run(rc=0, time=1.0, out=out)
+    job.evaluate()
+    assert(job.state == Test.State.SUCCESS)
+    man.save(job)
+
+
+def run_base64(man, i, out):
+    encoded = base64.b64encode(out)
+    decoded = base64.b64decode(encoded).decode('utf-8')
+    for matcher in MATCHERS.values():
+        assert(re.search(matcher['expr'], decoded))
+    man._current_file._rawout.write(zlib.compress(
+        ResultFile.MAGIC_TOKEN.encode("utf-8") + encoded))
+
+
+def bench(func, out):
+    with tempfile.TemporaryDirectory() as path:
+        man = ResultFileManager(prefix=path)
+        tracemalloc.start()
+        start = time.time()
+        for i in range(NB_JOBS):
+            func(man, i, out)
+        elapsed = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        man.finalize()
+        size = sum(os.path.getsize(os.path.join(path, f))
+                   for f in os.listdir(path) if f.endswith(".zlib"))
+    return NB_JOBS * OUTPUT_SIZE / elapsed, peak >> 20, size >> 20
+
+
+if __name__ == '__main__':
+    out = build_output()
+    print("{} jobs printing {} MiB".format(NB_JOBS, OUTPUT_SIZE))
+    for name, func in [("raw", run_raw), ("base64", run_base64)]:
+        rate, peak, size = bench(func, out)
+        print("{:>7}: {:.1f} MiB/s, peak memory {} MiB, {} MiB stored".format(
+            name, rate, peak, size))
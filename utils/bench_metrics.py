@@ -0,0 +1,101 @@
+import gc
+import re
+import sys
+import time
+
+from pcvs.testing.capture import OutputPatterns
+from pcvs.testing.test import Test
+
+# Measure the time spent evaluating matchers & extracting metrics once jobs
+# completed: every job from the same TE declares 5 metrics & 2 matchers, and
+# produces an output of a few KiB. The former per-job path (decoding the
+# output for each step, regexes looked up by their source string) is compared
+# to patterns compiled once per TE & a single scan per output.
+#
+# usage: python3 utils/bench_metrics.py [nb_jobs] [output_lines]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+NB_LINES = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+METRICS = {"m{}".format(i): {"key": r"metric{} = (\d+\.\d+)".format(i)}
+           for i in range(5)}
+MATCHERS = {"pass": {"expr": "TEST PASSED"},
+            "leak": {"expr": "memory leak", "expect": False}}
+
+
+def build_output(i):
+    lines = ["iteration {} step {}: residual {}".format(i, j, 1.0 / (j + 1))
+             for j in range(NB_LINES)]
+    lines += ["metric{} = {}.{}".format(k, i, k) for k in range(5)]
+    return ("\n".join(lines) + "\nTEST PASSED\n").encode("utf-8")
+
+
+class LegacyTest(Test):
+    """Former path: each step decodes the output & looks regexes up."""
+
+    def extract_metrics(self):
+        raw_output = self.output
+        for name, node in self._data['metrics'].items():
+            try:
+                ens = set if node['attributes']['unique'] else list
+            except KeyError:
+                ens = list
+            node['values'] = list(ens(re.findall(node['key'], raw_output)))
+
+    def evaluate(self):
+        state = Test.State.SUCCESS
+        if self._validation['expect_rc'] != self._rc:
+            state = Test.State.FAILURE
+        raw_output = self.output
+        if state == Test.State.SUCCESS and \
+                self._validation['matchers'] is not None:
+            for v in self._validation['matchers'].values():
+                expected = (v.get('expect', True) is True)
+                found = re.search(v['expr'], raw_output)
+                if (found and not expected) or (not found and expected):
+                    state = Test.State.FAILURE
+                    break
+        if state == Test.State.SUCCESS and \
+                self._validation['analysis'] is not None:
+            raise NotImplementedError
+        if state == Test.State.SUCCESS and \
+                self._validation['script'] is not None:
+            raise NotImplementedError
+        self._state = state
+
+
+def build_jobs(cls, patterns=None, metrics=METRICS, matchers=MATCHERS):
+    jobs = []
+    for i in range(NB_JOBS):
+        job = cls(te_name="te", label="bench", subtree="metrics",
+                  metrics={k: dict(v) for k, v in metrics.items()},
+                  matchers=matchers, patterns=patterns)
+        job.save_raw_run(rc=0, out=build_output(i % 1000), time=0.1)
+        jobs.append(job)
+    return jobs
+
+
+def run(name, jobs, func):
+    gc.collect()
+    start = time.perf_counter()
+    for job in jobs:
+        func(job)
+    elapsed = time.perf_counter() - start
+    print("  {:<8}: {:.2f}s ({:.1f} us/job)".format(
+        name, elapsed, 1e6 * elapsed / NB_JOBS))
+
+
+def evaluate(job):
+    job.extract_metrics()
+    job.evaluate()
+
+
+print("jobs with 5 metrics & 2 matchers:")
+run("legacy", build_jobs(LegacyTest), evaluate)
+# patterns compiled per job (no shared TE patterns)
+run("per-job", build_jobs(Test), evaluate)
+run("shared", build_jobs(Test, OutputPatterns(MATCHERS, METRICS)), evaluate)
+
+print("jobs without metrics & matchers:")
+run("legacy", build_jobs(LegacyTest, metrics={}, matchers=None), evaluate)
+run("shared", build_jobs(Test, OutputPatterns(), {}, None), evaluate)
@@ -0,0 +1,90 @@
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from pcvs import io
+from pcvs.helpers.system import MetaConfig
+from pcvs.orchestration import Orchestrator
+from pcvs.orchestration.manager import Manager
+from pcvs.orchestration.publishers import BuildDirectoryManager
+from pcvs.plugins import Collection
+from pcvs.testing.test import Test
+
+# Measure the orchestrator overhead (CPU time burnt by PCVS itself, not by the
+# jobs) when scheduling a large number of trivially short jobs.
+# Results are not persisted (see NullPublisher) to only account for the
+# scheduling core.
+#
+# usage: python3 utils/bench_orchestrator.py [nb_jobs] [concurrent_run]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+CONCURRENT_RUN = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+
+class NullPublisher:
+    """Drop results, to keep result-file I/O out of the measure."""
+
+    def save(self, job):
+        pass
+
+    def flush(self):
+        pass
+
+    def finalize(self):
+        pass
+
+
+def setup_config(prefix):
+    MetaConfig.root = MetaConfig({
+        'validation': {
+            'output': prefix,
+            'job_timeout': 60,
+            'print_level': 'none',
+            'scheduling': {},
+        },
+        'machine': {
+            'nodes': CONCURRENT_RUN,
+            'concurrent_run': CONCURRENT_RUN,
+        }
+    })
+    MetaConfig.root.set_internal('pColl', Collection())
+    build_manager = BuildDirectoryManager(build_dir=prefix)
+    build_manager._results = NullPublisher()
+    MetaConfig.root.set_internal('build_manager', build_manager)
+    return build_manager
+
+
+if __name__ == '__main__':
+    prefix = tempfile.mkdtemp(prefix="pcvs-bench-orch")
+    io.init()
+    io.console.file = open(os.devnull, 'w')
+    build_manager = setup_config(prefix)
+
+    # start from a clean slate (job registry is class-scoped)
+    Manager.job_hashes.clear()
+    Manager.dep_rules.clear()
+    orch = Orchestrator()
+    for i in range(0, NB_JOBS):
+        orch.add_new_job(Test(te_name="job_{}".format(i),
+                              label="bench",
+                              command="true"))
+
+    print("Running {} jobs ({} runners)".format(NB_JOBS, CONCURRENT_RUN))
+    wall_start = time.time()
+    cpu_start = time.process_time()
+    orch.start_run()
+    cpu_self = time.process_time() - cpu_start
+    wall = time.time() - wall_start
+    cpu_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    build_manager.finalize()
+
+    print("Wall time:                {:.3f} s".format(wall))
+    print("PCVS CPU time:            {:.3f} s".format(cpu_self))
+    print("PCVS CPU time per 10k:    {:.3f} s".format(cpu_self * 10000 / NB_JOBS))
+    print("Jobs CPU time (children): {:.3f} s".format(
+        cpu_children.ru_utime + cpu_children.ru_stime))
+    print("PCVS CPU usage:           {:.1f} core(s)".format(cpu_self / wall))
+    shutil.rmtree(prefix)
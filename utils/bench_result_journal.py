@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+from pcvs.orchestration.publishers import ResultFileManager
+from pcvs.testing.test import Test
+
+# Measure write amplification (bytes written to disk / final size) of job
+# metadata, maps & views while saving results of a synthetic run.
+# The former scheme (whole metadata file rewritten every 10 jobs, maps & views
+# at each progression flush) being quadratic, it is only run over a subset
+# of jobs and extrapolated. Bytes written are read from /proc (Linux only).
+#
+# usage: python3 utils/bench_result_journal.py [nb_jobs] [nb_legacy_jobs]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+NB_LEGACY_JOBS = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+# the orchestrator flushes results every 5% of the workload
+NB_FLUSHES = 20
+
+
+def written_bytes():
+    with open("/proc/self/io", "r") as fh:
+        for line in fh:
+            if line.startswith("wchar:"):
+                return int(line.split()[1])
+
+
+def build_job(i):
+    job = Test(te_name="job{}".format(i), label="bench",
+               subtree="dir{}/sub{}".format(i % 10, i % 100), tags=["tag"])
+    job.save_final_result(time=1.0, state=Test.State.SUCCESS, out=b"")
+    return job
+
+
+def final_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+               if f.endswith(".json"))
+
+
+def bench_journal(path, nb):
+    man = ResultFileManager(prefix=path)
+    start, wchar = time.time(), written_bytes()
+    for i in range(nb):
+        man.save(build_job(i))
+        if (i + 1) % max(1, nb // NB_FLUSHES) == 0:
+            man.flush()
+    man.finalize()
+    return time.time() - start, written_bytes() - wchar, final_size(path)
+
+
+def bench_rewrite(path, nb):
+    # maps & views are still maintained by the manager, its (linear) journal
+    # writes are accounted as well
+    man = ResultFileManager(prefix=path)
+    data = {}
+    start, wchar = time.time(), written_bytes()
+    for i in range(nb):
+        job = build_job(i)
+        man.save(job)
+        elt = job.to_json()
+        elt['result']['output'] = {'file': "", 'offset': -1, 'length': 0}
+        data[job.jid] = elt
+        if (i + 1) % 10 == 0:
+            with open(os.path.join(path, "jobs-legacy.json"), "w") as fh:
+                json.dump(data, fh)
+        if (i + 1) % max(1, nb // NB_FLUSHES) == 0:
+            man.compact()
+    with open(os.path.join(path, "jobs-legacy.json"), "w") as fh:
+        json.dump(data, fh)
+    man.compact()
+    man.finalize()
+    return time.time() - start, written_bytes() - wchar, final_size(path)
+
+
+with tempfile.TemporaryDirectory() as path:
+    t, w, sz = bench_journal(path, NB_JOBS)
+print("journal: {} jobs, {:.2f} s, {} MiB written, {} MiB on disk, "
+      "amplification x{:.2f}".format(NB_JOBS, t, w >> 20, sz >> 20, w / sz))
+
+with tempfile.TemporaryDirectory() as path:
+    t, w, sz = bench_rewrite(path, NB_LEGACY_JOBS)
+# rewrites every 10 jobs: amplification grows linearly with the job count
+print("rewrite: {} jobs, {:.2f} s, {} MiB written, {} MiB on disk, "
+      "amplification x{:.2f} (x{:.0f} extrapolated to {} jobs)".format(
+          NB_LEGACY_JOBS, t, w >> 20, sz >> 20, w / sz,
+          w / sz * NB_JOBS / NB_LEGACY_JOBS, NB_JOBS))
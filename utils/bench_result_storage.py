@@ -0,0 +1,85 @@
+import bz2
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pcvs.orchestration.publishers import ResultFile
+from pcvs.testing.test import Test
+
+# Measure random access to job outputs stored in a single result file.
+# The current format (zlib blocks of outputs, indexed by block & offset) is
+# compared to the former single BZ2 stream, read back through seek() as
+# previous versions did (only over a subset of jobs, as it is quadratic).
+#
+# usage: python3 utils/bench_result_storage.py [nb_jobs] [nb_legacy_reads]
+
+NB_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+NB_LEGACY_READS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+
+def build_jobs():
+    jobs = []
+    for i in range(NB_JOBS):
+        job = Test(te_name="job{}".format(i), label="bench")
+        job.save_final_result(time=1.0, state=Test.State.SUCCESS,
+                              out="line {} of a test output\n".format(i).encode() * 8)
+        jobs.append(job)
+    return jobs
+
+
+def bench_blocks(path, jobs):
+    # only measure output storage, not metadata compaction
+    ResultFile.COMPACT_MIN_ENTRIES = len(jobs) + 1
+    hdl = ResultFile(path, "jobs-0")
+    outputs = []
+    start = time.time()
+    for job in jobs:
+        data = job.to_json()
+        hdl.save(job.jid, data, job.raw_output)
+        outputs.append(data['result']['output'])
+    hdl.flush()
+    write = time.time() - start
+
+    random.shuffle(outputs)
+    start = time.time()
+    for output in outputs:
+        assert(hdl.read_output(output))
+    read = time.time() - start
+    return write, read, os.path.getsize(os.path.join(path, "jobs-0.zlib"))
+
+
+def bench_bz2_stream(path, jobs):
+    rawfile = os.path.join(path, "legacy.bz2")
+    index = []
+    start = time.time()
+    with bz2.open(rawfile, "a") as fh:
+        for job in jobs:
+            offset = fh.tell()
+            length = fh.write(ResultFile.MAGIC_TOKEN.encode() + job.encoded_output)
+            index.append((offset, length))
+    write = time.time() - start
+
+    sample = random.sample(index, min(NB_LEGACY_READS, len(index)))
+    reader = bz2.open(rawfile, "r")
+    start = time.time()
+    for offset, length in sample:
+        reader.seek(offset)
+        assert(reader.read(length).startswith(ResultFile.MAGIC_TOKEN.encode()))
+    read = (time.time() - start) * len(index) / len(sample)
+    reader.close()
+    return write, read, os.path.getsize(rawfile)
+
+
+if __name__ == '__main__':
+    jobs = build_jobs()
+    with tempfile.TemporaryDirectory() as path:
+        f_write, f_read, f_size = bench_blocks(path, jobs)
+        b_write, b_read, b_size = bench_bz2_stream(path, jobs)
+
+    print("{} jobs, outputs read in random order".format(NB_JOBS))
+    print("zlib blocks: write {:.2f} s, read {:.2f} s, {} KiB".format(
+        f_write, f_read, f_size // 1024))
+    print("bz2 stream:  write {:.2f} s, read {:.2f} s (extrapolated from {} reads), {} KiB".format(
+        b_write, b_read, NB_LEGACY_READS, b_size // 1024))